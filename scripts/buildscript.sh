@@ -168,6 +168,9 @@ if [ -d "$POSIXUTILS_ROOT" ]; then
   if [ -n "${POSIXUTILS_FLAGS:-}" ]; then
     POSIX_ARGS+=(--flags "$POSIXUTILS_FLAGS")
   fi
+  if [ "${POSIXUTILS_MULTICALL:-0}" = "1" ]; then
+    POSIX_ARGS+=(--multicall)
+  fi
   python3 "${POSIX_ARGS[@]}"
   if [ -d "$POSIXUTILS_BIN_DIR" ]; then
     rm -rf "$KERNEL_POSIX_STAGING"
@@ -478,14 +481,13 @@ else
     echo "[!] mbedTLS build script not found, skipping TLS library"
 fi
 
-for source in "${KERNEL_SOURCES[@]}"; do
-  base="$(basename "${source%.d}")"
-  obj="$OUT_DIR/${base}.o"
-  echo "[*] Compiling D source: $source -> $obj"
-  ldc2 -I. -Isrc -J. -Jsrc/anonymos -mtriple="$TARGET" -betterC $DFLAGS \
-       -c "$source" -of="$obj"
-  KERNEL_OBJECTS+=("$obj")
-done
+# Compiles in parallel and only rebuilds sources whose imports (per ldc2 -deps)
+# changed since the last build. Set KERNEL_JOBS to cap the parallelism.
+echo "[*] Compiling kernel D sources..."
+python3 tools/build_kernel.py --dc ldc2 --target "$TARGET" --dflags "$DFLAGS" \
+    --out-dir "$OUT_DIR" --objects-file "$OUT_DIR/kernel-objects.txt" \
+    ${KERNEL_JOBS:+--jobs "$KERNEL_JOBS"} "${KERNEL_SOURCES[@]}"
+mapfile -t KERNEL_OBJECTS < "$OUT_DIR/kernel-objects.txt"
 
 # Startup (asm)
 CLANGFLAGS=("--target=$TARGET")
@@ -690,7 +692,11 @@ if [ -d "$DESKTOP_STAGING_DIR" ]; then
     # We create it temporarily.
     PAYLOAD_INITRD="/tmp/anonymos_payload_initrd.tar"
     # Exclude the install directory itself
-    tar -cf "$PAYLOAD_INITRD" -C "$DESKTOP_STAGING_DIR" --exclude="usr/share/install" .
+    python3 tools/build_integrity_manifest.py "$DESKTOP_STAGING_DIR" --exclude "usr/share/install"
+    python3 tools/pack_initrd.py "$DESKTOP_STAGING_DIR" -o "$PAYLOAD_INITRD" --exclude "usr/share/install"
+    # Chunk map for the installed kernel and payload initrd (loaded as a GRUB module).
+    PAYLOAD_CHUNKS="/tmp/anonymos_payload_integrity.chunks"
+    python3 tools/build_chunk_merkle.py --kernel "$KERNEL_ELF" --initrd "$PAYLOAD_INITRD" -o "$PAYLOAD_CHUNKS"
     
     # 2. Base Filesystem Image (Partition Content)
     # Size needs to be enough for Kernel (2MB) + Initrd (20-30MB) + Overhead.
@@ -704,7 +710,8 @@ if [ -d "$DESKTOP_STAGING_DIR" ]; then
     debugfs -w -R "mkdir /boot/grub" "$BASE_FS_IMG"
     debugfs -w -R "write $KERNEL_ELF /boot/kernel.elf" "$BASE_FS_IMG"
     debugfs -w -R "write $PAYLOAD_INITRD /boot/initrd.tar" "$BASE_FS_IMG"
-    rm "$PAYLOAD_INITRD"
+    debugfs -w -R "write $PAYLOAD_CHUNKS /boot/integrity.chunks" "$BASE_FS_IMG"
+    rm "$PAYLOAD_INITRD" "$PAYLOAD_CHUNKS"
     
     # Grub config for the INSTALLED system
     cat > installed_grub.cfg <<EOF
@@ -713,6 +720,7 @@ set default=0
 menuentry "AnonymOS" {
     multiboot /boot/kernel.elf
     module /boot/initrd.tar initrd
+    module /boot/integrity.chunks integrity-chunks
     boot
 }
 EOF
@@ -741,7 +749,10 @@ EOF
     # 4. Create the Final Initrd (for the ISO)
     # This INCLUDES the installation assets we just created.
     echo "[*] Creating ISO initrd from $DESKTOP_STAGING_DIR"
-    tar -cf "$INITRD_IMG" -C "$DESKTOP_STAGING_DIR" .
+    python3 tools/build_integrity_manifest.py "$DESKTOP_STAGING_DIR" -o "$OUT_DIR/manifest.json"
+    python3 tools/pack_initrd.py "$DESKTOP_STAGING_DIR" -o "$INITRD_IMG"
+    python3 tools/build_chunk_merkle.py --kernel "$KERNEL_ELF" --initrd "$INITRD_IMG" \
+        -o "$ISO_STAGING_DIR/boot/integrity.chunks"
 fi
 
 if [ -f "$GRUB_CFG_SRC" ]; then
@@ -754,6 +765,7 @@ set default=0
 menuentry "AnonymOS" {
     multiboot /boot/kernel.elf install_mode
     module /boot/initrd.tar initrd
+    module /boot/integrity.chunks integrity-chunks
     boot
 }
 EOF
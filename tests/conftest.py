@@ -0,0 +1,266 @@
+"""Shared fixtures for the test suites.
+
+D binaries needed by tests are built through ``compiled_binaries`` and
+cached across sessions under pytest's cache directory. Each binary is
+keyed by the compiler identity, its flags, its sources, every D file
+under its -I directories and every file under its -J directories, so an
+unchanged binary is never rebuilt and a changed input always is. Builds
+hold an exclusive lock per key, which keeps ``pytest -n`` workers from
+compiling the same binary twice or seeing a half-written one.
+
+Build-tool tests that only need to watch what gets compiled use the
+``fake_ldc`` fixture, a shell stand-in for ldc2, instead.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+from textwrap import dedent
+from typing import Any, Iterator, Sequence
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_posixutils
+
+POSIXUTILS_ROOT = ROOT / "src" / "anonymos" / "kernel" / "posixutils"
+
+
+_FAKE_LDC = dedent(
+    """\
+    #!/bin/sh
+    if [ "$1" = "--version" ]; then echo "fake-ldc 1.0"; exit 0; fi
+    inputs=""
+    for arg in "$@"; do
+        case "$arg" in
+            -of=*) out="${arg#-of=}" ;;
+            -deps=*) deps="${arg#-deps=}" ;;
+            -*) ;;
+            *) inputs="$inputs $arg" ;;
+        esac
+    done
+    echo "$(basename "$out")" >> "$(dirname "$0")/invocations.log"
+    sleep @DELAY@
+    if grep -q BROKEN $inputs 2>/dev/null; then echo "error: broken module:$inputs" >&2; exit 1; fi
+    if [ -n "$deps" ]; then
+        for src in $inputs; do
+            sed -n 's|^// dep: \\(.*\\)|mod ('"$src"') : private : dep (\\1)|p' "$src"
+        done > "$deps"
+    fi
+    @EMIT@
+    chmod +x "$out"
+    """
+)
+
+# What the fake writes to -of: "object" concatenates the inputs minus "//"
+# comment lines (so compiles, links and archives all work and comment-only
+# edits yield identical bytes); "unittest" writes a test executable whose
+# behaviour is picked by a FAIL or HANG marker in the module source.
+_FAKE_LDC_EMIT = {
+    "object": """grep -hv '^//' $inputs > "$out" 2>/dev/null""",
+    "unittest": dedent(
+        """\
+        if grep -q HANG $inputs; then printf '#!/bin/sh\\nexec sleep 5\\n' > "$out"
+        elif grep -q FAIL $inputs; then printf '#!/bin/sh\\necho "core.exception.AssertError"\\nexit 1\\n' > "$out"
+        else printf '#!/bin/sh\\necho "1 modules passed unittests"\\n' > "$out"
+        fi"""
+    ),
+}
+
+
+class FakeLdc:
+    """A shell stand-in for ldc2 that logs every output it is asked to produce.
+
+    Any input containing ``BROKEN`` fails to compile, ``-deps`` files list
+    each ``// dep: <file>`` line of the inputs, and ``--version`` answers
+    like a real compiler so build caches can key on it.
+    """
+
+    def __init__(self, path: Path, emit: str = "object", delay: float = 0.0) -> None:
+        self.path = path
+        self.log = path.parent / "invocations.log"
+        script = _FAKE_LDC.replace("@DELAY@", str(delay)).replace("@EMIT@", _FAKE_LDC_EMIT[emit])
+        path.write_text(script, encoding="utf-8")
+        path.chmod(0o755)
+
+    def __fspath__(self) -> str:
+        return str(self.path)
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+    def invocations(self) -> list[str]:
+        """Outputs produced since the last call, in order, minus any ``.tmp.`` scratch prefix."""
+
+        lines = self.log.read_text(encoding="utf-8").splitlines() if self.log.exists() else []
+        self.log.unlink(missing_ok=True)
+        return [line.removeprefix(".tmp.") for line in lines]
+
+
+def find_d_compiler() -> str | None:
+    for candidate in ("ldc2", "ldmd2", "dmd", "gdc"):
+        path = shutil.which(candidate)
+        if path:
+            return path
+    return None
+
+
+@contextmanager
+def _exclusive(lock_path: Path) -> Iterator[None]:
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class BinaryCache:
+    """Build D binaries on demand and reuse them while their inputs are unchanged."""
+
+    def __init__(self, root: Path, compiler: str) -> None:
+        self.root = root
+        self.compiler = compiler
+        self._identity: str | None = None
+        self._tree_digests: dict[tuple[Path, str], str] = {}
+
+    @property
+    def identity(self) -> str:
+        if self._identity is None:
+            self._identity = build_posixutils.compiler_identity(self.compiler)
+        return self._identity
+
+    def _tree_digest(self, directory: Path, pattern: str) -> str:
+        """Hash every file matching ``pattern`` under ``directory``."""
+
+        if (directory, pattern) not in self._tree_digests:
+            digest = hashlib.sha256()
+            for path in sorted(p for p in directory.rglob(pattern) if p.is_file()):
+                digest.update(str(path.relative_to(directory)).encode() + b"\0")
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+            self._tree_digests[(directory, pattern)] = digest.hexdigest()
+        return self._tree_digests[(directory, pattern)]
+
+    def key(
+        self,
+        name: str,
+        sources: Sequence[Path],
+        flags: Sequence[str],
+        import_dirs: Sequence[Path],
+        string_import_dirs: Sequence[Path] = (),
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{name}\0{self.identity}\0{list(flags)}\0".encode())
+        for source in sources:
+            digest.update(hashlib.sha256(source.read_bytes()).digest())
+        # Imports can reach any D source under -I; import("...") any file under -J.
+        for directory in import_dirs:
+            digest.update(f"-I{directory}\0{self._tree_digest(directory, '*.d')}".encode())
+        for directory in string_import_dirs:
+            digest.update(f"-J{directory}\0{self._tree_digest(directory, '*')}".encode())
+        return digest.hexdigest()[:32]
+
+    def build(
+        self,
+        name: str,
+        sources: Sequence[Path],
+        flags: Sequence[str] = (),
+        import_dirs: Sequence[Path] = (),
+        string_import_dirs: Sequence[Path] = (),
+    ) -> Path:
+        """Return a binary built from ``sources``, compiling it only on a cache miss."""
+
+        entry = self.root / self.key(name, sources, flags, import_dirs, string_import_dirs)
+        binary = entry / name
+        if binary.is_file():
+            return binary
+        with _exclusive(entry.with_suffix(".lock")):
+            # Another worker may have finished the build while we waited.
+            if binary.is_file():
+                return binary
+            entry.mkdir(parents=True, exist_ok=True)
+            scratch = entry / f".tmp.{name}"
+            cmd = [self.compiler, *map(str, sources), *flags]
+            cmd.extend(f"-I{directory}" for directory in import_dirs)
+            cmd.extend(f"-J{directory}" for directory in string_import_dirs)
+            cmd.append(f"-of={scratch}")
+            completed = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+            if completed.returncode != 0:
+                scratch.unlink(missing_ok=True)
+                pytest.fail(f"Compiling {name} failed:\n{completed.stderr}{completed.stdout}", pytrace=False)
+            os.replace(scratch, binary)
+        return binary
+
+    def posix_utility(self, name: str, source_root: Path = POSIXUTILS_ROOT) -> Path:
+        """Build just ``name`` (plus the helper library, if it imports it) with build_posixutils' defaults."""
+
+        if not source_root.is_dir():
+            pytest.fail(f"posixutils sources not found at {source_root}", pytrace=False)
+        flags = build_posixutils.default_flags_for(self.compiler)
+        # build_posixutils passes each command directory as -J, so every file counts.
+        entry = self.root / self.key("posixutils", (), flags, (), (source_root,))
+        binary = entry / "bin" / name
+        if binary.is_file():
+            return binary
+        with _exclusive(entry.with_suffix(".lock")):
+            if binary.is_file():
+                return binary
+            helper = build_posixutils.plan_helper_library(flags, source_root, entry / "lib")
+            if helper is not None:
+                jobs = build_posixutils.plan_jobs(
+                    flags,
+                    source_root,
+                    entry / "bin",
+                    [helper.output],
+                    library_modules=build_posixutils.declared_modules(helper.sources),
+                )
+            else:
+                jobs = build_posixutils.plan_jobs(flags, source_root, entry / "bin")
+            job = next((job for job in jobs if job.name == name), None)
+            if job is None:
+                pytest.fail(f"no posixutils command named {name!r} under {source_root}", pytrace=False)
+            if helper is not None and job.libraries and not helper.output.is_file():
+                outcome = build_posixutils.run_job(self.compiler, helper)
+                if outcome.returncode != 0:
+                    pytest.fail(f"Building the posixutils helper library failed:\n{outcome.log}", pytrace=False)
+            outcome = build_posixutils.run_job(self.compiler, job)
+            if outcome.returncode != 0:
+                pytest.fail(f"Building {name} failed:\n{outcome.log}", pytrace=False)
+        return binary
+
+
+@pytest.fixture()
+def fake_ldc(request: pytest.FixtureRequest, tmp_path: Path) -> FakeLdc:
+    """A fresh FakeLdc; parametrize indirectly with FakeLdc keyword arguments to change it."""
+
+    options: dict[str, Any] = getattr(request, "param", {})
+    return FakeLdc(tmp_path / "ldc2", **options)
+
+
+@pytest.fixture(scope="session")
+def d_compiler() -> str:
+    compiler = find_d_compiler()
+    if compiler is None:
+        pytest.skip("no D compiler available in PATH")
+    return compiler
+
+
+@pytest.fixture(scope="session")
+def compiled_binaries(request: pytest.FixtureRequest, d_compiler: str) -> BinaryCache:
+    cache = request.config.cache
+    if cache is not None:
+        root = cache.mkdir("compiled-binaries")
+    else:
+        root = ROOT / "build" / "test-binaries"
+    return BinaryCache(Path(root), d_compiler)
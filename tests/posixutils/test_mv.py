@@ -1,46 +1,19 @@
 from __future__ import annotations
 
 import os
-import shutil
 import stat
 import subprocess
-import sys
 import time
 from pathlib import Path
 
 import pytest
 
-
-def _find_compiler() -> str | None:
-    for candidate in ("ldc2", "ldmd2", "dmd", "gdc"):
-        path = shutil.which(candidate)
-        if path:
-            return path
-    return None
+from conftest import BinaryCache
 
 
 @pytest.fixture(scope="session")
-def mv_binary(tmp_path_factory: pytest.TempPathFactory) -> Path:
-    compiler = _find_compiler()
-    if compiler is None:
-        pytest.skip("no D compiler available in PATH")
-
-    repo_root = Path(__file__).resolve().parents[2]
-    output_dir = tmp_path_factory.mktemp("posixutils-bin")
-    build_script = repo_root / "tools" / "build_posixutils.py"
-    cmd = [
-        sys.executable,
-        str(build_script),
-        "--dc",
-        compiler,
-        "--output",
-        str(output_dir),
-    ]
-    subprocess.run(cmd, cwd=repo_root, check=True)
-    mv_path = output_dir / "mv"
-    if not mv_path.exists():
-        pytest.skip("mv binary was not built")
-    return mv_path
+def mv_binary(compiled_binaries: BinaryCache) -> Path:
+    return compiled_binaries.posix_utility("mv")
 
 
 @pytest.mark.skipif(os.geteuid() != 0, reason="requires root privileges to mount tmpfs")
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+from textwrap import dedent
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import bench_boot
+
+
+def _fake_qemu(path: Path) -> Path:
+    path.write_text(
+        dedent(
+            """\
+            #!/bin/sh
+            printf 'GRUB loading.\\r\\n'
+            printf '[kernel] Integrity chunk map loaded.\\r\\n'
+            if [ -n "$FAKE_INSTALL_MODE" ]; then
+                printf '[kernel] Install mode detected - skipping blockchain validation\\r\\n'
+            fi
+            printf '[integrity] Computing system fingerprint...\\r\\n'
+            sleep 0.1
+            printf '[integrity]   - Kernel hash computed\\r\\n'
+            printf '[kernel] Initrd loaded.\\r\\n'
+            printf '[desktop] desktopProcessEntry called\\r\\n'
+            printf '[desktop] entering main loop\\r\\n'
+            sleep 30
+            """
+        ),
+        encoding="utf-8",
+    )
+    path.chmod(0o755)
+    return path
+
+
+def test_first_matching_line_wins_and_stages_follow_boot_order() -> None:
+    lines = [
+        (0.5, "GRUB"),
+        (1.0, "[integrity] Computing system fingerprint..."),
+        (3.0, "[integrity]   - Kernel hash computed"),
+        (4.0, "[integrity]   - Kernel hash computed"),
+        (6.0, "[desktop] desktopProcessEntry called"),
+    ]
+    times = bench_boot.match_milestones(lines)
+    assert times == {
+        "first_output": 0.5,
+        "integrity_start": 1.0,
+        "integrity_kernel_hash": 3.0,
+        "desktop_start": 6.0,
+    }
+    assert bench_boot.stage_latencies(times) == {
+        "first_output->integrity_start": 0.5,
+        "integrity_start->integrity_kernel_hash": 2.0,
+        "integrity_kernel_hash->desktop_start": 3.0,
+    }
+
+
+def test_percentiles_interpolate() -> None:
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert bench_boot.percentile(values, 50) == pytest.approx(2.5)
+    assert bench_boot.percentile(values, 90) == pytest.approx(3.7)
+    assert bench_boot.percentile([7.0], 99) == 7.0
+    summary = bench_boot.summarize([{"a": 1.0}, {"a": 3.0}, {}], ["a", "b"])
+    assert summary == {"a": {"count": 2, "min": 1.0, "mean": 2.0, "max": 3.0, "p50": 2.0, "p90": 2.8, "p95": 2.9, "p99": 2.98}}
+
+
+@pytest.mark.parametrize("install_mode", [False, True])
+def test_cli_stops_each_boot_at_the_until_milestone(tmp_path: Path, install_mode: bool) -> None:
+    qemu = _fake_qemu(tmp_path / "qemu")
+    iso = tmp_path / "os.iso"
+    iso.write_bytes(b"iso")
+    output = tmp_path / "report.json"
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            str(TOOLS / "bench_boot.py"),
+            "--iso",
+            str(iso),
+            "--qemu",
+            str(qemu),
+            "-n",
+            "2",
+            "--timeout",
+            "20",
+            "-o",
+            str(output),
+            "--log-dir",
+            str(tmp_path / "logs"),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "FAKE_INSTALL_MODE": "1" if install_mode else ""},
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["completed"] == 2
+    assert report["install_mode_boots"] == (2 if install_mode else 0)
+    assert ("boot(s) ran in install mode" in completed.stdout) == install_mode
+    assert report["serial_hash_boots"] == 0
+    assert report["milestones"]["chunk_map_loaded"]["count"] == 2
+    assert report["milestones"]["desktop_start"]["count"] == 2
+    assert report["milestones"]["desktop_start"]["p50"] >= 0.1
+    assert "integrity_start->integrity_kernel_hash" in report["stages"]
+    assert "[integrity] Computing system fingerprint" in (tmp_path / "logs" / "boot-0.log").read_text(encoding="utf-8")
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from conftest import POSIXUTILS_ROOT, BinaryCache, FakeLdc
+
+
+# Slow compiles give the concurrent requests time to race.
+@pytest.mark.parametrize("fake_ldc", [{"delay": 0.2}], indirect=True)
+def test_concurrent_requests_build_once_and_reuse_across_sessions(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    source = tmp_path / "tool.d"
+    source.write_text("void main() {}\n", encoding="utf-8")
+    cache = BinaryCache(tmp_path / "cache", str(fake_ldc))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        binaries = set(pool.map(lambda _: cache.build("tool", [source]), range(4)))
+    assert len(binaries) == 1
+    assert fake_ldc.invocations() == ["tool"]
+
+    # A new session reuses the binary; changing the source or flags does not.
+    fresh = BinaryCache(tmp_path / "cache", str(fake_ldc))
+    assert fresh.build("tool", [source]) in binaries
+    assert fake_ldc.invocations() == []
+    fresh.build("tool", [source], ["-O"])
+    source.write_text("void main() { return; }\n", encoding="utf-8")
+    fresh.build("tool", [source])
+    assert len(fake_ldc.invocations()) == 2
+
+
+def test_import_directories_are_part_of_the_key(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    imports = tmp_path / "src"
+    (imports / "pkg").mkdir(parents=True)
+    (imports / "pkg" / "mod.d").write_text("module pkg.mod;\n", encoding="utf-8")
+    runner = tmp_path / "runner.d"
+    runner.write_text("import pkg.mod;\n", encoding="utf-8")
+
+    cache = BinaryCache(tmp_path / "cache", str(fake_ldc))
+    first = cache.build("runner", [runner], import_dirs=[imports])
+    (imports / "pkg" / "mod.d").write_text("module pkg.mod;\nenum x = 1;\n", encoding="utf-8")
+    second = BinaryCache(tmp_path / "cache", str(fake_ldc)).build("runner", [runner], import_dirs=[imports])
+
+    assert first != second
+    assert len(fake_ldc.invocations()) == 2
+
+
+def test_string_import_data_is_part_of_the_key(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    data = tmp_path / "views"
+    data.mkdir()
+    (data / "table.bin").write_bytes(b"\x01\x02")
+    source = tmp_path / "tool.d"
+    source.write_text('immutable table = import("table.bin");\n', encoding="utf-8")
+
+    cache = BinaryCache(tmp_path / "cache", str(fake_ldc))
+    first = cache.build("tool", [source], string_import_dirs=[data])
+    (data / "table.bin").write_bytes(b"\x01\x03")
+    second = BinaryCache(tmp_path / "cache", str(fake_ldc)).build("tool", [source], string_import_dirs=[data])
+
+    assert first != second
+    assert len(fake_ldc.invocations()) == 2
+
+
+def test_posix_utility_fails_loudly_without_sources(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    cache = BinaryCache(tmp_path / "cache", str(fake_ldc))
+    with pytest.raises(pytest.fail.Exception, match="posixutils sources not found"):
+        cache.posix_utility("mv", tmp_path / "missing")
+
+
+def test_default_posixutils_root_exists() -> None:
+    assert POSIXUTILS_ROOT.is_dir()
+    assert (POSIXUTILS_ROOT / "commands" / "mv").is_dir()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+import struct
+import subprocess
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_chunk_merkle
+
+
+def _elf(segments: list[tuple[int, int, bytes]]) -> bytes:
+    """A minimal ELF64 image with one PT_LOAD per (flags, vaddr, data)."""
+
+    phoff = 64
+    data_offset = phoff + 56 * len(segments)
+    header = struct.pack(
+        "<16sHHIQQQIHHHHHH",
+        b"\x7fELF\x02\x01\x01" + b"\0" * 9,
+        2,
+        0x3E,
+        1,
+        0x100000,
+        phoff,
+        0,
+        0,
+        64,
+        56,
+        len(segments),
+        64,
+        0,
+        0,
+    )
+    phdrs = b""
+    payload = b""
+    for flags, vaddr, data in segments:
+        phdrs += struct.pack("<IIQQQQQQ", 1, flags, data_offset + len(payload), vaddr, vaddr, len(data), len(data), 4096)
+        payload += data
+    return header + phdrs + payload
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def test_kernel_regions_skip_writable_segments() -> None:
+    text = b"\x90" * 5000
+    rodata = b"const" * 10
+    elf = _elf([(5, 0x100000, text), (4, 0x200000, rodata), (6, 0x300000, b"data")])
+
+    regions = build_chunk_merkle.kernel_regions(elf)
+    assert [(region.name, region.base, region.data) for region in regions] == [
+        ("kernel.0", 0x100000, text),
+        ("kernel.1", 0x200000, rodata),
+    ]
+    with pytest.raises(SystemExit, match="not a 64-bit"):
+        build_chunk_merkle.kernel_regions(b"MZ" + b"\0" * 100)
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_chunk_tree_root_folds_chunk_hashes(jobs: int) -> None:
+    data = bytes(range(256)) * 40  # 10240 bytes -> chunks of 4096, 4096, 2048
+    region = build_chunk_merkle.Region("initrd", build_chunk_merkle.KIND_INITRD, 0, data)
+
+    tree = build_chunk_merkle.chunk_tree(region, 4096, jobs)
+    leaves = [hashlib.sha256(data[start : start + 4096]).digest() for start in (0, 4096, 8192)]
+    assert tree.leaves == leaves
+    assert tree.root == _node(_node(leaves[0], leaves[1]), leaves[2])
+
+
+def test_regions_over_the_kernel_leaf_limit_are_rejected() -> None:
+    region = build_chunk_merkle.Region("initrd", build_chunk_merkle.KIND_INITRD, 0, b"")
+    at_limit = build_chunk_merkle.ChunkTree(region, [b"\0" * 32] * build_chunk_merkle.MAX_LEAVES, b"\0" * 32)
+    build_chunk_merkle.encode_map([at_limit], 4096)
+
+    over = build_chunk_merkle.ChunkTree(region, at_limit.leaves + [b"\0" * 32], b"\0" * 32)
+    with pytest.raises(SystemExit, match="at most 4096"):
+        build_chunk_merkle.encode_map([over], 4096)
+
+
+def test_cli_writes_a_map_the_decoder_reads_back(tmp_path: Path) -> None:
+    kernel = tmp_path / "kernel.elf"
+    kernel.write_bytes(_elf([(5, 0x100000, b"\xcc" * 70000), (6, 0x200000, b"rw")]))
+    initrd = tmp_path / "initrd.tar"
+    initrd.write_bytes(b"archive" * 20000)
+    output = tmp_path / "iso" / "integrity.chunks"
+
+    subprocess.run(
+        [
+            sys.executable,
+            str(TOOLS / "build_chunk_merkle.py"),
+            "--kernel",
+            str(kernel),
+            "--initrd",
+            str(initrd),
+            "-o",
+            str(output),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    chunk_size, regions = build_chunk_merkle.decode_map(output.read_bytes())
+    assert chunk_size == build_chunk_merkle.DEFAULT_CHUNK_SIZE
+    assert [(name, kind, base, length, len(leaves)) for name, kind, base, length, leaves, _ in regions] == [
+        ("kernel.0", build_chunk_merkle.KIND_KERNEL, 0x100000, 70000, 2),
+        ("initrd", build_chunk_merkle.KIND_INITRD, 0, 140000, 3),
+    ]
+    _, _, _, _, leaves, root = regions[1]
+    assert leaves[2] == hashlib.sha256(initrd.read_bytes()[2 * 65536 :]).digest()
+    assert root == _node(_node(leaves[0], leaves[1]), leaves[2])
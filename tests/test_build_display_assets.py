@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from pathlib import Path
+from textwrap import dedent
+import struct
+import sys
+import zlib
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import bench_gif_decode
+import build_display_assets
+import generate_wallpaper
+
+
+def _write_rgba_png(path: Path, width: int, height: int, pixels: list[tuple[int, int, int, int]]) -> None:
+    raw = b"".join(
+        b"\x00" + b"".join(bytes(pixel) for pixel in pixels[y * width : (y + 1) * width]) for y in range(height)
+    )
+
+    def chunk(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    path.write_bytes(
+        generate_wallpaper.PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+@pytest.fixture()
+def project(tmp_path: Path) -> Path:
+    (tmp_path / "src" / "anonymos" / "display").mkdir(parents=True)
+    (tmp_path / "art").mkdir()
+    bench_gif_decode.write_gif(
+        tmp_path / "art" / "wallpaper.gif", 4, 2, [bytes(range(8)), bytes(range(8, 16))], delay_cs=5
+    )
+    bench_gif_decode.write_gif(tmp_path / "art" / "cursor.gif", 2, 2, [bytes(4), bytes([255] * 4)])
+    white, clear = (255, 255, 255, 255), (0, 0, 0, 0)
+    # Two 4x2 glyphs side by side: a left bar and a right-hand diagonal.
+    sheet = [white, clear, clear, clear, clear, clear, clear, white,
+             white, clear, clear, clear, clear, clear, white, clear]
+    _write_rgba_png(tmp_path / "art" / "font.png", 8, 2, sheet)
+    _write_rgba_png(tmp_path / "art" / "splash.png", 2, 1, [(1, 2, 3, 255), (4, 5, 6, 128)])
+    (tmp_path / "display_assets.toml").write_text(
+        dedent(
+            """\
+            string_import_dir = "src/anonymos"
+
+            [[asset]]
+            name = "wallpaper"
+            kind = "wallpaper"
+            input = "art/wallpaper.gif"
+            output = "src/anonymos/display/generated_wallpaper.d"
+            format = "bin"
+            target = ["2x1"]
+
+            [[asset]]
+            name = "splash"
+            kind = "image"
+            input = "art/splash.png"
+            output = "src/anonymos/display/generated_splash.d"
+            symbol = "splashImage"
+
+            [[asset]]
+            name = "cursor"
+            kind = "cursor"
+            input = "art/cursor.gif"
+            output = "src/anonymos/display/generated_cursor.d"
+            symbol = "busyCursor"
+            hotspot_x = 1
+
+            [[asset]]
+            name = "font"
+            kind = "font"
+            input = "art/font.png"
+            output = "src/anonymos/display/generated_font.d"
+            symbol = "tinyFont"
+            glyph_width = 4
+            glyph_height = 2
+            columns = 2
+            first_char = 65
+            """
+        ),
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+def _build(project: Path, **kwargs) -> dict[str, list[Path]]:
+    assets, string_import_dir = build_display_assets.load_manifest(project / "display_assets.toml", project)
+    return build_display_assets.build_assets(
+        assets, string_import_dir, project / "build" / "state.json", jobs=2, **kwargs
+    )
+
+
+def test_pipeline_builds_every_asset_kind(project: Path) -> None:
+    outputs = _build(project)
+    display = project / "src" / "anonymos" / "display"
+
+    assert set(outputs) == {"wallpaper", "splash", "cursor", "font"}
+    assert (display / "generated_wallpaper_2x1.bin").is_file()
+    assert "module anonymos.display.generated_wallpaper;" in (display / "generated_wallpaper.d").read_text()
+
+    splash = (display / "generated_splash.d").read_text()
+    assert "module anonymos.display.generated_splash;" in splash
+    assert "enum uint splashImageWidth  = 2;" in splash
+    assert 'import("display/generated_splash.bin")' in splash
+    assert (display / "generated_splash.bin").read_bytes() == struct.pack("<II", 0xFF010203, 0x80040506)
+
+    cursor = (display / "generated_cursor.d").read_text()
+    assert "enum uint busyCursorHotspotX = 1;" in cursor
+    assert "enum uint[] busyCursorFrameDelays = [40, 40];" in cursor
+    assert len((display / "generated_cursor.bin").read_bytes()) == 2 * 2 * 2 * 4
+
+    font = (display / "generated_font.d").read_text()
+    assert "immutable ubyte[2][2] tinyFontGlyphs = [" in font
+    assert "[0x80, 0x80], // 65" in font
+    assert "[0x10, 0x20], // 66" in font
+
+
+def test_unchanged_assets_are_skipped(project: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _build(project)
+    capsys.readouterr()
+
+    _write_rgba_png(project / "art" / "splash.png", 2, 1, [(9, 9, 9, 255), (4, 5, 6, 128)])
+    (project / "src" / "anonymos" / "display" / "generated_font.d").unlink()
+    _build(project)
+
+    lines = sorted(capsys.readouterr().out.splitlines())
+    assert [line.split()[:2] for line in lines] == [
+        ["[build]", "font"],
+        ["[build]", "splash"],
+        ["[cached]", "cursor"],
+        ["[cached]", "wallpaper"],
+    ]
+
+    _build(project, force=True)
+    assert all(line.startswith("[build]") for line in capsys.readouterr().out.splitlines())
+
+
+def test_failures_are_reported_after_the_other_assets(project: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    (project / "art" / "cursor.gif").write_bytes(b"not an image")
+
+    with pytest.raises(SystemExit, match="cursor"):
+        _build(project)
+
+    out = capsys.readouterr().out
+    assert "[fail] cursor: Unsupported wallpaper format" in out
+    assert "[build] font" in out
+    assert "cursor" not in (project / "build" / "state.json").read_text()
+
+
+def test_manifest_rejects_unknown_kinds_and_bad_symbols(tmp_path: Path) -> None:
+    manifest = tmp_path / "display_assets.toml"
+    manifest.write_text('[[asset]]\nname = "x"\nkind = "icon"\ninput = "a"\noutput = "b"\n', encoding="utf-8")
+    with pytest.raises(SystemExit, match="unknown kind 'icon'"):
+        build_display_assets.load_manifest(manifest, tmp_path)
+
+    manifest.write_text(
+        '[[asset]]\nname = "x"\nkind = "image"\ninput = "a"\noutput = "b"\nsymbol = "not-valid"\n',
+        encoding="utf-8",
+    )
+    with pytest.raises(SystemExit, match="valid D identifier"):
+        build_display_assets.load_manifest(manifest, tmp_path)
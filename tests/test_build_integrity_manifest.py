@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_integrity_manifest as manifest_tool
+
+
+@pytest.fixture()
+def staging(tmp_path: Path) -> Path:
+    root = tmp_path / "staging"
+    files = {
+        "bin/sh": b"\x7fELF" + b"shell" * 100,
+        "boot/kernel.elf": b"kernel" * 1000,
+        "etc/empty": b"",
+        "etc/motd": b"hello\n",
+        "usr/share/install/base_fs.img": b"\0" * 100,
+    }
+    for relative, data in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    (root / "bin" / "ash").symlink_to("sh")
+    return root
+
+
+def _leaf(path: str, data: bytes) -> bytes:
+    name = path.encode()
+    return hashlib.sha256(b"\x00" + len(name).to_bytes(4, "big") + name + hashlib.sha256(data).digest()).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def test_manifest_lists_packed_files_and_their_root(staging: Path) -> None:
+    manifest = manifest_tool.build_manifest(staging, excludes=["usr/share/install"])
+
+    paths = [entry["path"] for entry in manifest["files"]]
+    assert paths == ["bin/sh", "boot/kernel.elf", "etc/empty", "etc/motd"]
+    motd = manifest["files"][3]
+    assert motd["sha256"] == hashlib.sha256(b"hello\n").hexdigest()
+    assert motd["size"] == 6
+
+    leaves = [_leaf(path, (staging / path).read_bytes()) for path in paths]
+    root = _node(_node(leaves[0], leaves[1]), _node(leaves[2], leaves[3]))
+    assert manifest["merkle_root"] == root.hex()
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 7, 8, 13])
+def test_every_proof_verifies_and_tampering_fails(count: int) -> None:
+    leaves = [hashlib.sha256(bytes([index])).digest() for index in range(count)]
+    levels = manifest_tool.merkle_levels(leaves)
+    root = levels[-1][0]
+    for index, leaf in enumerate(leaves):
+        proof = manifest_tool.merkle_proof(levels, index)
+        assert manifest_tool.verify_proof(leaf, index, count, proof, root)
+        assert not manifest_tool.verify_proof(hashlib.sha256(b"evil").digest(), index, count, proof, root)
+        if proof:
+            assert not manifest_tool.verify_proof(leaf, index, count, proof[:-1], root)
+
+
+def test_cli_writes_manifest_into_staging_and_skips_itself(staging: Path, tmp_path: Path) -> None:
+    copy = tmp_path / "out" / "manifest.json"
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, str(TOOLS / "build_integrity_manifest.py"), str(staging), "-o", str(copy)],
+            check=True,
+            capture_output=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+    inside = staging / manifest_tool.DEFAULT_MANIFEST_PATH
+    assert inside.read_bytes() == copy.read_bytes()
+    manifest = json.loads(inside.read_text(encoding="utf-8"))
+    assert manifest_tool.DEFAULT_MANIFEST_PATH not in [entry["path"] for entry in manifest["files"]]
+    assert "usr/share/install/base_fs.img" in [entry["path"] for entry in manifest["files"]]
+
+    root = bytes.fromhex(manifest["merkle_root"])
+    for entry in manifest["files"]:
+        leaf = _leaf(entry["path"], (staging / entry["path"]).read_bytes())
+        proof = [bytes.fromhex(sibling) for sibling in entry["proof"]]
+        assert manifest_tool.verify_proof(leaf, entry["index"], manifest["file_count"], proof, root)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_kernel
+from conftest import FakeLdc
+
+
+@pytest.fixture()
+def kernel(tmp_path: Path, fake_ldc: FakeLdc) -> tuple[FakeLdc, list[Path], Path]:
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "memory.d").write_text("module memory;\n", encoding="utf-8")
+    (src / "wallpaper.bin").write_bytes(b"\x00" * 4)
+    (src / "kernel.d").write_text(
+        f"module kernel;\n// dep: {src / 'memory.d'}\n// dep: {src / 'wallpaper.bin'}\n", encoding="utf-8"
+    )
+    (src / "fs.d").write_text("module fs;\n", encoding="utf-8")
+    return fake_ldc, [src / "kernel.d", src / "memory.d", src / "fs.d"], tmp_path / "build"
+
+
+def _build(dc: FakeLdc, sources: list[Path], out_dir: Path, dflags: tuple[str, ...] = ()) -> list[Path]:
+    units = build_kernel.plan_units(str(dc), "x86_64-unknown-linux-gnu", dflags, sources, out_dir, out_dir / "deps")
+    return build_kernel.build_kernel_objects(units, out_dir / "deps" / "state.json", jobs=4)
+
+
+def test_only_sources_with_changed_dependencies_recompile(kernel: tuple[FakeLdc, list[Path], Path]) -> None:
+    dc, sources, out_dir = kernel
+    objects = _build(dc, sources, out_dir)
+
+    assert [obj.name for obj in objects] == ["kernel.o", "memory.o", "fs.o"]
+    assert sorted(dc.invocations()) == ["fs.o", "kernel.o", "memory.o"]
+
+    _build(dc, sources, out_dir)
+    assert dc.invocations() == []
+
+    # A touch without a content change is not a rebuild.
+    os.utime(sources[1], ns=(0, 0))
+    _build(dc, sources, out_dir)
+    assert dc.invocations() == []
+
+    sources[1].write_text("module memory;\nenum pageSize = 4096;\n", encoding="utf-8")
+    _build(dc, sources, out_dir)
+    assert sorted(dc.invocations()) == ["kernel.o", "memory.o"]
+
+    (sources[0].parent / "wallpaper.bin").write_bytes(b"\xff" * 4)
+    _build(dc, sources, out_dir)
+    assert sorted(dc.invocations()) == ["kernel.o"]
+
+
+def test_flag_changes_and_missing_objects_recompile(kernel: tuple[FakeLdc, list[Path], Path]) -> None:
+    dc, sources, out_dir = kernel
+    _build(dc, sources, out_dir)
+    dc.invocations()
+
+    (out_dir / "fs.o").unlink()
+    _build(dc, sources, out_dir)
+    assert sorted(dc.invocations()) == ["fs.o"]
+
+    _build(dc, sources, out_dir, ("-O2",))
+    assert sorted(dc.invocations()) == ["fs.o", "kernel.o", "memory.o"]
+
+
+def test_failures_are_reported_and_retried(kernel: tuple[FakeLdc, list[Path], Path]) -> None:
+    dc, sources, out_dir = kernel
+    sources[2].write_text("module fs;\nBROKEN\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="fs.d"):
+        _build(dc, sources, out_dir)
+    assert sorted(dc.invocations()) == ["fs.o", "kernel.o", "memory.o"]
+
+    sources[2].write_text("module fs;\n", encoding="utf-8")
+    _build(dc, sources, out_dir)
+    assert sorted(dc.invocations()) == ["fs.o"]
+
+
+def test_basename_collisions_are_rejected(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit, match="util.o"):
+        build_kernel.plan_units(
+            "ldc2", "x86_64-unknown-linux-gnu", (), [Path("a/util.d"), Path("b/util.d")], tmp_path, tmp_path
+        )
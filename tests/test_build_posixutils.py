@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_posixutils
+from conftest import FakeLdc
+
+
+def _write_command(source_root: Path, name: str, body: str = "void main() {}\n") -> Path:
+    command_dir = source_root / "commands" / name
+    command_dir.mkdir(parents=True, exist_ok=True)
+    source = command_dir / f"{name}.d"
+    source.write_text(body, encoding="utf-8")
+    return source
+
+
+@pytest.fixture()
+def tree(tmp_path: Path, fake_ldc: FakeLdc) -> tuple[FakeLdc, Path, Path]:
+    source_root = tmp_path / "posixutils"
+    for name in ("true", "false", "echo"):
+        _write_command(source_root, name)
+    return fake_ldc, source_root, tmp_path / "out" / "bin"
+
+
+def test_parallel_build_returns_sorted_results(tree: tuple[FakeLdc, Path, Path]) -> None:
+    dc, source_root, output_dir = tree
+    results = build_posixutils.build_all(str(dc), [], source_root, output_dir, jobs=4)
+
+    assert [result.name for result in results] == ["echo", "false", "true"]
+    for result in results:
+        assert result.output.is_file()
+
+
+def test_failed_compile_is_reported_after_other_jobs(tree: tuple[FakeLdc, Path, Path]) -> None:
+    dc, source_root, output_dir = tree
+    _write_command(source_root, "broken", "BROKEN\n")
+
+    with pytest.raises(SystemExit, match="broken"):
+        build_posixutils.build_all(str(dc), [], source_root, output_dir, jobs=4)
+    assert sorted(dc.invocations()) == ["broken", "echo", "false", "true"]
+
+
+def test_cache_skips_unchanged_utilities(tree: tuple[FakeLdc, Path, Path], tmp_path: Path) -> None:
+    dc, source_root, output_dir = tree
+    cache = build_posixutils.BuildCache(tmp_path / "cache", "fake-compiler 1.0")
+
+    build_posixutils.build_all(str(dc), [], source_root, output_dir, cache=cache)
+    assert sorted(dc.invocations()) == ["echo", "false", "true"]
+
+    (output_dir / "echo").unlink()
+    _write_command(source_root, "true", "void main() { return; }\n")
+    build_posixutils.build_all(str(dc), [], source_root, output_dir, cache=cache)
+
+    assert dc.invocations() == ["true"]
+    assert (output_dir / "echo").is_file()
+
+
+def test_cache_key_tracks_flags_and_compiler(tree: tuple[FakeLdc, Path, Path], tmp_path: Path) -> None:
+    _, source_root, output_dir = tree
+    cache = build_posixutils.BuildCache(tmp_path / "cache", "fake-compiler 1.0")
+    job = build_posixutils.plan_jobs([], source_root, output_dir)[0]
+
+    optimised = build_posixutils.CompileJob(job.name, job.sources, job.output, ("-O2",))
+    other_compiler = build_posixutils.BuildCache(tmp_path / "cache", "fake-compiler 2.0")
+
+    assert cache.key_for(job) == cache.key_for(job)
+    assert cache.key_for(job) != cache.key_for(optimised)
+    assert cache.key_for(job) != other_compiler.key_for(job)
+
+
+def test_helper_directories_are_built_once_as_a_library(
+    tree: tuple[FakeLdc, Path, Path], tmp_path: Path
+) -> None:
+    dc, source_root, output_dir = tree
+    helper = source_root / "api" / "process.d"
+    helper.parent.mkdir(parents=True)
+    helper.write_text("module helpers.process; extern(C) int helper() { return 0; }\n", encoding="utf-8")
+    _write_command(source_root, "echo", "import std.stdio : writeln;\nimport helpers.process;\nvoid main() {}\n")
+    lib_dir = tmp_path / "out" / "lib"
+
+    results = build_posixutils.build_all(str(dc), [], source_root, output_dir, helper_lib_dir=lib_dir)
+
+    assert dc.invocations()[0] == build_posixutils.HELPER_LIBRARY_NAME
+    assert (lib_dir / build_posixutils.HELPER_LIBRARY_NAME).is_file()
+    assert [result.name for result in results] == ["echo", "false", "true"]
+    jobs = build_posixutils.plan_jobs(
+        [], source_root, output_dir, [lib_dir / "lib.a"], library_modules={"helpers.process"}
+    )
+    assert {job.name: bool(job.libraries) for job in jobs} == {"echo": True, "false": False, "true": False}
+
+
+def test_helper_library_is_skipped_when_no_command_imports_it(
+    tree: tuple[FakeLdc, Path, Path], tmp_path: Path
+) -> None:
+    dc, source_root, output_dir = tree
+    helper = source_root / "api" / "process.d"
+    helper.parent.mkdir(parents=True)
+    helper.write_text("module helpers.process;\n", encoding="utf-8")
+    lib_dir = tmp_path / "out" / "lib"
+
+    build_posixutils.build_all(str(dc), [], source_root, output_dir, helper_lib_dir=lib_dir)
+
+    assert sorted(dc.invocations()) == ["echo", "false", "true"]
+    assert not (lib_dir / build_posixutils.HELPER_LIBRARY_NAME).exists()
+
+
+def test_import_scanner_handles_aliases_lists_and_selective_imports(tmp_path: Path) -> None:
+    source = tmp_path / "cmd.d"
+    source.write_text(
+        "import std.stdio : writeln, File;\nimport io = core.stdc.stdio, helpers.a;\nstatic import helpers.b;\n",
+        encoding="utf-8",
+    )
+    assert build_posixutils.imported_modules([source]) == {"std.stdio", "core.stdc.stdio", "helpers.a", "helpers.b"}
+
+
+def test_library_digest_is_computed_once_per_build(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    lib = tmp_path / "lib" / "libhelpers.a"
+    lib.parent.mkdir()
+    lib.write_bytes(b"archive")
+    (tmp_path / "src").mkdir()
+    source = tmp_path / "src" / "cmd.d"
+    source.write_text("void main() {}\n", encoding="utf-8")
+    cache = build_posixutils.BuildCache(tmp_path / "cache", "fake-compiler 1.0")
+    reads: list[Path] = []
+    original = Path.read_bytes
+
+    def counting_read_bytes(self: Path) -> bytes:
+        if self == lib:
+            reads.append(self)
+        return original(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+    jobs = [build_posixutils.CompileJob(f"c{i}", (source,), tmp_path / f"c{i}", (), (lib,)) for i in range(3)]
+    keys = {job.name: cache.key_for(job) for job in jobs}
+    assert len(reads) == 1
+
+    before = keys["c0"]
+    lib.write_bytes(b"rebuilt archive")
+    assert cache.key_for(jobs[0]) != before
+
+
+def test_multicall_links_every_applet_into_one_binary(tree: tuple[FakeLdc, Path, Path]) -> None:
+    dc, source_root, output_dir = tree
+    _write_command(source_root, "echo", "module echo_d;\n\nint main(string[] args)\n{\n    return 0;\n}\n")
+    _write_command(source_root, "false", 'extern(C) int main(int argc, char** argv) { return 1; }\n')
+
+    results = build_posixutils.build_all(str(dc), [], source_root, output_dir, multicall=True)
+
+    binary = output_dir / build_posixutils.MULTICALL_BINARY_NAME
+    assert dc.invocations() == [build_posixutils.MULTICALL_BINARY_NAME]
+    assert {result.output for result in results} == {binary}
+    for name in ("echo", "false", "true"):
+        assert (output_dir / name).resolve() == binary.resolve()
+
+    staging = output_dir.parent / "multicall"
+    echo_source = (staging / "echo" / "echo.d").read_text(encoding="utf-8")
+    assert "int posixutils_echo_main(string[] args)" in echo_source
+    true_source = (staging / "true" / "true.d").read_text(encoding="utf-8")
+    assert true_source.startswith("module multicall_true;")
+    dispatcher = (staging / "multicall_main.d").read_text(encoding="utf-8")
+    assert "import applet0 = echo_d;" in dispatcher
+    assert 'case "false": return invoke!(applet1.posixutils_false_main)(args, shift);' in dispatcher
+
+
+def test_source_index_reuses_verdicts_for_unchanged_files(tmp_path: Path) -> None:
+    source = tmp_path / "port.d"
+    source.write_text("// header\nmodule port;\n", encoding="utf-8")
+    c_source = tmp_path / "legacy.d"
+    c_source.write_text("/* C */\n#include <stdio.h>\n", encoding="utf-8")
+    index_path = tmp_path / "sources.json"
+
+    index = build_posixutils.SourceIndex(index_path)
+    assert index.is_d_source(source)
+    assert not index.is_d_source(c_source)
+    index.save()
+
+    # Same size and mtime: the persisted verdict wins without rereading.
+    stat = source.stat()
+    source.write_text("#  header\nmodule port;\n", encoding="utf-8")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert build_posixutils.SourceIndex(index_path).is_d_source(source)
+
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not build_posixutils.SourceIndex(index_path).is_d_source(source)
+
+
+def test_is_d_source_reads_past_the_prefix_when_comments_are_long(tmp_path: Path) -> None:
+    source = tmp_path / "long.d"
+    banner = "/*" + "x" * (build_posixutils.SOURCE_PREFIX_BYTES * 3) + "*/\n"
+    source.write_text(banner + "#define LEGACY 1\n", encoding="utf-8")
+    assert not build_posixutils.is_d_source(source)
+
+    source.write_text(banner + "module modern;\n", encoding="utf-8")
+    assert build_posixutils.is_d_source(source)
+
+
+def test_report_records_sizes_and_keeps_compile_times_for_cache_hits(
+    tree: tuple[FakeLdc, Path, Path], tmp_path: Path
+) -> None:
+    dc, source_root, output_dir = tree
+    cache = build_posixutils.BuildCache(tmp_path / "cache", "fake-compiler 1.0")
+
+    cold = build_posixutils.BuildReport(output_dir.parent)
+    build_posixutils.build_all(str(dc), [], source_root, output_dir, cache=cache, report=cold)
+    cold.write()
+
+    warm = build_posixutils.BuildReport(output_dir.parent)
+    build_posixutils.build_all(str(dc), [], source_root, output_dir, cache=cache, report=warm)
+
+    assert set(warm.entries) == {"echo", "false", "true"}
+    for name, entry in warm.entries.items():
+        assert entry["cached"] is True
+        assert entry["binary_bytes"] == (output_dir / name).stat().st_size
+        assert entry["seconds"] == cold.entries[name]["seconds"]
+    assert (output_dir.parent / "report.tsv").read_text(encoding="utf-8").startswith("name\tseconds")
+
+
+def test_affected_commands_maps_changes_to_utilities(tmp_path: Path) -> None:
+    source_root = tmp_path / "posixutils"
+    (source_root / "commands").mkdir(parents=True)
+
+    changed = [
+        source_root / "commands" / "cat" / "cat.d",
+        source_root / "commands" / "getconf" / "getconf-path.data",
+        source_root / "registry.d",
+    ]
+    assert build_posixutils.affected_commands(changed, source_root) == {"cat", "getconf"}
+    assert build_posixutils.affected_commands([source_root / "api" / "process.d"], source_root) is None
+
+
+def test_only_rebuilds_selected_utilities_but_keeps_full_results(tree: tuple[FakeLdc, Path, Path]) -> None:
+    dc, source_root, output_dir = tree
+    build_posixutils.build_all(str(dc), [], source_root, output_dir)
+
+    results = build_posixutils.build_all(str(dc), [], source_root, output_dir, only={"true"})
+
+    assert sorted(dc.invocations()) == ["echo", "false", "true", "true"]
+    assert [result.name for result in results] == ["echo", "false", "true"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_vmo_pack
+
+
+def _canonical_page(data: bytes) -> bytes:
+    # VmoStore.canonicalize for a page node, spelled out independently.
+    length = len(data).to_bytes(8, "big")
+    return hashlib.sha256(b"page" + length + length + data).digest()
+
+
+def test_root_hashes_follow_vmo_store_from_bytes() -> None:
+    pool = build_vmo_pack.PagePool(4096)
+
+    empty = pool.add_file("empty", b"", 0o644)
+    assert empty.root == _canonical_page(b"")
+
+    small = pool.add_file("small", b"hello", 0o644)
+    assert small.root == _canonical_page(b"hello")
+
+    data = b"A" * 4096 + b"B" * 100
+    large = pool.add_file("large", data, 0o644)
+    children = [_canonical_page(b"A" * 4096), _canonical_page(b"B" * 100)]
+    expected = hashlib.sha256(
+        b"concat" + len(data).to_bytes(8, "big") + (2).to_bytes(8, "big") + b"".join(children)
+    ).digest()
+    assert large.root == expected
+    assert [pool.hashes[index] for index in large.pages] == children
+
+
+def test_identical_pages_are_stored_once(tmp_path: Path) -> None:
+    staging = tmp_path / "staging"
+    (staging / "bin").mkdir(parents=True)
+    shared = bytes(range(256)) * 16
+    (staging / "bin" / "a").write_bytes(shared * 3 + b"tail-a")
+    (staging / "bin" / "b").write_bytes(shared * 2 + b"tail-b")
+    (staging / "etc").mkdir()
+    (staging / "etc" / "empty").write_bytes(b"")
+    (staging / "bin" / "link").symlink_to("a")
+
+    output = tmp_path / "out" / "image.vmopack"
+    pool, files = build_vmo_pack.build_pack(staging, output)
+
+    assert sorted(packed.path for packed in files) == ["bin/a", "bin/b", "etc/empty"]
+    assert pool.logical_pages == 4 + 3 + 1
+    assert len(pool.hashes) == 4  # shared page, two tails, empty page
+
+    blob = output.read_bytes()
+    header = build_vmo_pack.PACK_HEADER.unpack_from(blob, 0)
+    data_offset = header[-1]
+    assert data_offset % 4096 == 0
+    assert len(blob) == data_offset + 4 * 4096
+    assert build_vmo_pack.read_pack(blob) == {
+        "bin/a": shared * 3 + b"tail-a",
+        "bin/b": shared * 2 + b"tail-b",
+        "etc/empty": b"",
+    }
+
+
+def test_corrupted_page_is_rejected(tmp_path: Path) -> None:
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    (staging / "file").write_bytes(b"x" * 5000)
+    output = tmp_path / "image.vmopack"
+    build_vmo_pack.build_pack(staging, output)
+
+    blob = bytearray(output.read_bytes())
+    blob[build_vmo_pack.PACK_HEADER.unpack_from(blob, 0)[-1]] ^= 1
+    with pytest.raises(ValueError, match="page 0"):
+        build_vmo_pack.read_pack(bytes(blob))
+
+
+def test_output_is_deterministic(tmp_path: Path) -> None:
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    for name in ("z", "a", "m"):
+        (staging / name).write_bytes(name.encode() * 9000)
+    first = tmp_path / "first.vmopack"
+    second = tmp_path / "second.vmopack"
+    build_vmo_pack.build_pack(staging, first)
+    build_vmo_pack.build_pack(staging, second)
+    assert first.read_bytes() == second.read_bytes()
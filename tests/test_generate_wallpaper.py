@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+import random
+import struct
+import sys
+import zlib
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import bench_gif_decode
+import generate_wallpaper
+
+
+def _png_chunk(kind: bytes, payload: bytes) -> bytes:
+    crc = zlib.crc32(kind + payload) & 0xFFFFFFFF
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", crc)
+
+
+def _write_png(path: Path, width: int, height: int, color_type: int, rows: list[tuple[int, bytes]]) -> None:
+    """Write a PNG whose scanlines carry the given (filter type, filtered bytes)."""
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    raw = b"".join(bytes([filter_type]) + data for filter_type, data in rows)
+    path.write_bytes(
+        generate_wallpaper.PNG_SIGNATURE
+        + _png_chunk(b"IHDR", ihdr)
+        + _png_chunk(b"IDAT", zlib.compress(raw))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def _reference_decode(width: int, height: int, pixel_size: int, rows: list[tuple[int, bytes]]) -> bytes:
+    """Straightforward per-byte PNG unfiltering, used as the oracle."""
+
+    def paeth(a: int, b: int, c: int) -> int:
+        p = a + b - c
+        pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+        if pa <= pb and pa <= pc:
+            return a
+        return b if pb <= pc else c
+
+    stride = width * pixel_size
+    output = bytearray()
+    prev = bytearray(stride)
+    for filter_type, data in rows:
+        row = bytearray(data)
+        for i in range(stride):
+            a = row[i - pixel_size] if i >= pixel_size else 0
+            b = prev[i]
+            c = prev[i - pixel_size] if i >= pixel_size else 0
+            predictor = [0, a, b, (a + b) // 2, paeth(a, b, c)][filter_type]
+            row[i] = (row[i] + predictor) & 0xFF
+        for i in range(0, stride, pixel_size):
+            r, g, b = row[i : i + 3]
+            alpha = 255 if pixel_size == 3 else row[i + 3]
+            output += bytes((alpha, r, g, b))
+        prev = row
+    return bytes(output)
+
+
+@pytest.fixture(params=["pure", "numpy"])
+def decoder_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "pure":
+        monkeypatch.setattr(generate_wallpaper, "_np", None)
+    elif generate_wallpaper._np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("color_type, pixel_size", [(2, 3), (6, 4)])
+def test_png_decode_matches_reference_for_every_filter(
+    tmp_path: Path, decoder_backend: str, color_type: int, pixel_size: int
+) -> None:
+    rng = random.Random(color_type)
+    width, height = 13, 23
+    stride = width * pixel_size
+    # Cycle through all five filters, including on the very first row.
+    rows = [(y % 5, bytes(rng.randrange(256) for _ in range(stride))) for y in range(height)]
+    path = tmp_path / "image.png"
+    _write_png(path, width, height, color_type, rows)
+
+    decoded_width, decoded_height, frames = generate_wallpaper._read_png(path)
+
+    assert (decoded_width, decoded_height) == (width, height)
+    assert frames[0].pixels == _reference_decode(width, height, pixel_size, rows)
+
+
+def test_png_rejects_unknown_filter(tmp_path: Path, decoder_backend: str) -> None:
+    path = tmp_path / "bad.png"
+    _write_png(path, 2, 2, 2, [(0, bytes(6)), (7, bytes(6))])
+
+    with pytest.raises(generate_wallpaper.PngDecodeError, match="filter type 7"):
+        generate_wallpaper._read_png(path)
+
+
+@pytest.mark.parametrize("min_code_size", [2, 8])
+def test_lzw_decode_round_trips_and_matches_legacy_decoder(min_code_size: int) -> None:
+    rng = random.Random(min_code_size)
+    symbols = 1 << min_code_size
+    # Long runs exercise the KwKwK case; the noise fills the table and forces clears.
+    indexes = bytes(rng.randrange(symbols) for _ in range(6000)) + bytes([1]) * 3000
+    encoded = bench_gif_decode.lzw_encode(indexes, min_code_size)
+
+    decoded = generate_wallpaper._lzw_decode(min_code_size, encoded, len(indexes))
+
+    assert decoded == indexes
+    assert list(decoded) == bench_gif_decode.legacy_lzw_decode(min_code_size, encoded, len(indexes))
+
+
+def test_lzw_decode_stops_at_expected_pixels() -> None:
+    encoded = bench_gif_decode.lzw_encode(bytes([3]) * 500, 2)
+    assert generate_wallpaper._lzw_decode(2, encoded, 123) == bytes([3]) * 123
+
+
+def test_lzw_decode_rejects_codes_past_the_table() -> None:
+    # 3-bit codes, LSB first: clear (4), literal 0, then 7 while the next free code is 6.
+    encoded = (4 | 0 << 3 | 7 << 6).to_bytes(2, "little")
+    with pytest.raises(generate_wallpaper.GifDecodeError, match="Invalid LZW code"):
+        generate_wallpaper._lzw_decode(2, encoded, 4)
+
+
+def test_multi_frame_gif_decodes_every_frame(tmp_path: Path) -> None:
+    width, height = 17, 9
+    frames = bench_gif_decode.synthetic_frames(width, height, 3)
+    path = tmp_path / "wallpaper.gif"
+    bench_gif_decode.write_gif(path, width, height, frames, delay_cs=5)
+
+    decoded_width, decoded_height, decoded = generate_wallpaper._read_gif(path)
+
+    assert (decoded_width, decoded_height) == (width, height)
+    assert [frame.duration_ms for frame in decoded] == [50, 50, 50]
+    for indexes, frame in zip(frames, decoded):
+        assert frame.pixels == b"".join(bytes((255, i, i, 255 - i)) for i in indexes)
+
+
+def test_binary_asset_writes_native_words_and_metadata_module(tmp_path: Path) -> None:
+    import_root = tmp_path / "src" / "anonymos"
+    module = import_root / "display" / "generated_wallpaper.d"
+    module.parent.mkdir(parents=True)
+    frames = [
+        generate_wallpaper.Frame(40, bytes.fromhex("FF102030 80405060")),
+        generate_wallpaper.Frame(60, bytes.fromhex("FF708090 00A0B0C0")),
+    ]
+
+    blob = generate_wallpaper._write_binary_asset(module, import_root, 2, 1, frames)
+
+    assert blob == module.with_suffix(".bin")
+    assert blob.read_bytes() == bytes.fromhex("302010FF 60504080 908070FF C0B0A000")
+    source = module.read_text()
+    assert "module anonymos.display.generated_wallpaper;" in source
+    assert "enum uint wallpaperFrameCount = 2;" in source
+    assert "enum uint[] wallpaperFrameDurations = [40, 60];" in source
+    assert 'import("display/generated_wallpaper.bin")' in source
+
+
+def test_binary_asset_must_live_under_the_string_import_dir(tmp_path: Path) -> None:
+    frames = [generate_wallpaper.Frame(100, bytes(4))]
+    with pytest.raises(RuntimeError, match="string import directory"):
+        generate_wallpaper._write_binary_asset(tmp_path / "out.d", tmp_path / "src", 1, 1, frames)
+
+
+def _apply_delta_stream(width: int, height: int, offsets: list[int], stream: list[int]) -> list[list[int]]:
+    """Replay the delta stream the way wallpaper.d does, returning every frame."""
+
+    canvas = [0] * (width * height)
+    frames = []
+    for index in range(len(offsets) - 1):
+        pos = offsets[index]
+        x, y, w, h = stream[pos : pos + 4]
+        pos += 4
+        for row in range(y, y + h):
+            dest = row * width + x
+            row_end = dest + w
+            while dest < row_end:
+                op = stream[pos]
+                count = op & generate_wallpaper.DELTA_COUNT_MASK
+                pos += 1
+                if op >> 28 == generate_wallpaper.DELTA_OP_RUN:
+                    canvas[dest : dest + count] = [stream[pos]] * count
+                    pos += 1
+                elif op >> 28 == generate_wallpaper.DELTA_OP_LITERAL:
+                    canvas[dest : dest + count] = stream[pos : pos + count]
+                    pos += count
+                dest += count
+        assert pos == offsets[index + 1]
+        frames.append(list(canvas))
+    return frames
+
+
+@pytest.mark.parametrize("keyframe_interval", [0, 2])
+def test_delta_frames_replay_to_the_original_pixels(keyframe_interval: int) -> None:
+    width, height = 24, 10
+    rng = random.Random(keyframe_interval)
+    base = [0xFF000000 | (y * 16) for y in range(height) for _ in range(width)]
+    pixel_frames = [base]
+    for step in range(4):
+        pixels = list(pixel_frames[-1])
+        for y in range(2 + step, 5 + step):
+            for x in range(3 + step, 9 + step):
+                pixels[y * width + x] = rng.choice((0xFF112233, 0xFF445566, rng.randrange(1 << 32)))
+        pixel_frames.append(pixels)
+    pixel_frames.append(list(pixel_frames[-1]))  # An unchanged frame encodes as an empty rect.
+    frames = [generate_wallpaper.Frame(100, struct.pack(f">{width * height}I", *p)) for p in pixel_frames]
+
+    offsets, stream = generate_wallpaper._encode_delta_frames(width, height, frames, keyframe_interval)
+
+    assert _apply_delta_stream(width, height, offsets, list(stream)) == pixel_frames
+    assert list(stream[offsets[-2] : offsets[-1]]) == [0, 0, 0, 0]
+    assert list(stream[offsets[1] : offsets[1] + 4]) == [3, 2, 6, 3]
+    assert list(stream[offsets[2] : offsets[2] + 4]) == ([0, 0, width, height] if keyframe_interval else [4, 3, 6, 3])
+    assert len(stream) < len(frames) * width * height
+
+
+def test_delta_asset_writes_offsets_and_stream(tmp_path: Path) -> None:
+    import_root = tmp_path / "src" / "anonymos"
+    module = import_root / "display" / "generated_wallpaper.d"
+    module.parent.mkdir(parents=True)
+    frames = [generate_wallpaper.Frame(100, bytes.fromhex("FF000001") * 4)] * 2
+
+    blob = generate_wallpaper._write_delta_asset(module, import_root, 2, 2, frames)
+
+    # Keyframe: rect, then one op per row (too short for a run); the repeat is an empty rect.
+    color = 0xFF000001
+    expected = [0, 0, 2, 2, 2 << 28 | 2, color, color, 2 << 28 | 2, color, color, 0, 0, 0, 0]
+    assert blob.read_bytes() == struct.pack("<14I", *expected)
+    source = module.read_text()
+    assert "enum uint[] wallpaperFrameOffsets = [0, 10, 14];" in source
+    assert "immutable ubyte[56] wallpaperDeltaData" in source
+
+
+def _solid(color: int, duration_ms: int = 100, pixels: int = 4) -> generate_wallpaper.Frame:
+    return generate_wallpaper.Frame(duration_ms, struct.pack(">I", color) * pixels)
+
+
+def test_repeated_frames_are_merged_and_stored_once(tmp_path: Path) -> None:
+    red, green = 0xFFFF0000, 0xFF00FF00
+    frames = [_solid(red, 50), _solid(red, 70), _solid(green), _solid(red), _solid(green, 30)]
+
+    merged = list(generate_wallpaper._merge_repeated_frames(frames))
+    assert [frame.duration_ms for frame in merged] == [120, 100, 100, 30]
+
+    module = tmp_path / "generated_wallpaper.d"
+    generate_wallpaper._write_d_module(module, 2, 2, merged)
+    source = module.read_text()
+    assert "enum uint[] wallpaperFrameDurations = [120, 100, 100, 30];" in source
+    assert "wallpaperFrame2 =" not in source
+    assert "wallpaperFrame0\n    wallpaperFrame1\n    wallpaperFrame0\n    wallpaperFrame1\n" in source
+
+
+def test_indexed_binary_asset_stores_one_byte_per_pixel(tmp_path: Path) -> None:
+    import_root = tmp_path / "src" / "anonymos"
+    module = import_root / "display" / "generated_wallpaper.d"
+    module.parent.mkdir(parents=True)
+    first = generate_wallpaper.Frame(100, bytes.fromhex("FF0000FF FF00FF00 FF0000FF FFFF0000"))
+    frames = [first, _solid(0xFFFF0000), first]
+
+    blob = generate_wallpaper._write_binary_asset(module, import_root, 2, 2, frames, indexed=True)
+
+    # Palette is sorted: blue, green, red.
+    assert blob.read_bytes() == bytes([0, 1, 0, 2, 2, 2, 2, 2])
+    source = module.read_text()
+    assert "enum uint[] wallpaperFrameMap = [0, 1, 0];" in source
+    assert "enum uint[] wallpaperPalette = [0xFF0000FF, 0xFF00FF00, 0xFFFF0000, 0x00000000," in source
+    assert source.count("0x00000000") == 253
+    assert "immutable ubyte[wallpaperWidth * wallpaperHeight * 2] wallpaperIndexData" in source
+
+
+def test_indexed_output_rejects_more_than_256_colors(tmp_path: Path) -> None:
+    pixels = b"".join(struct.pack(">I", 0xFF000000 | color) for color in range(257))
+    frames = [generate_wallpaper.Frame(100, pixels)]
+    with pytest.raises(RuntimeError, match="257 colors"):
+        generate_wallpaper._write_binary_asset(tmp_path / "w.d", tmp_path, 257, 1, frames, indexed=True)
+
+
+def _write_composited_gif(
+    path: Path,
+    width: int,
+    height: int,
+    palette: list[tuple[int, int, int]],
+    images: list[tuple[int, int, int, int, bytes, int, int | None]],
+) -> None:
+    """Write (left, top, w, h, indexes, disposal, transparent) images with 2-bit LZW codes."""
+
+    packed = 0x80 | (len(palette).bit_length() - 2)
+    data = bytearray(b"GIF89a" + struct.pack("<HHBBB", width, height, packed, 0, 0))
+    for color in palette:
+        data += bytes(color)
+    for left, top, w, h, indexes, disposal, transparent in images:
+        packed = disposal << 2 | (transparent is not None)
+        data += b"\x21\xf9\x04" + struct.pack("<BHB", packed, 1, transparent or 0) + b"\x00"
+        data += b"\x2c" + struct.pack("<HHHHB", left, top, w, h, 0) + b"\x02"
+        compressed = bench_gif_decode.lzw_encode(indexes, 2)
+        data += bytes([len(compressed)]) + compressed + b"\x00"
+    path.write_bytes(bytes(data + b"\x3b"))
+
+
+def test_gif_compositor_handles_transparency_clipping_and_disposal(tmp_path: Path) -> None:
+    black, red, green, blue = 0xFF000000, 0xFFFF0000, 0xFF00FF00, 0xFF0000FF
+    path = tmp_path / "composite.gif"
+    _write_composited_gif(
+        path,
+        4,
+        3,
+        [(0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255)],
+        [
+            (0, 0, 4, 3, bytes([1] * 12), 1, None),  # Red background, kept.
+            (1, 1, 2, 2, bytes([2, 3, 3, 2]), 3, 3),  # Blue is transparent; restored afterwards.
+            (2, 0, 3, 1, bytes([3, 3, 3]), 2, None),  # Clipped at the right edge; cleared afterwards.
+            (0, 2, 1, 1, bytes([2]), 0, None),
+        ],
+    )
+
+    width, height, frames = generate_wallpaper._iter_gif(path)
+    decoded = [struct.unpack(">12I", frame.pixels) for frame in frames]
+
+    assert (width, height) == (4, 3)
+    assert decoded == [
+        (red,) * 12,
+        (red, red, red, red, red, green, red, red, red, red, green, red),
+        (red, red, blue, blue) + (red,) * 8,
+        (red, red, black, black) + (red,) * 4 + (green, red, red, red),
+    ]
+
+
+def test_gif_compositor_rejects_indexes_past_the_palette(tmp_path: Path) -> None:
+    path = tmp_path / "bad.gif"
+    palette = [(0, 0, 0), (255, 255, 255)]
+    _write_composited_gif(path, 2, 1, palette, [(0, 0, 2, 1, bytes([1, 3]), 0, None)])
+
+    with pytest.raises(generate_wallpaper.GifDecodeError, match="Color index out of range"):
+        generate_wallpaper._read_gif(path)
+
+
+def test_box_taps_cover_each_output_with_the_full_source_width() -> None:
+    assert generate_wallpaper._box_taps(3, 2) == [[(0, 2), (1, 1)], [(1, 1), (2, 2)]]
+    for src, dst in ((1920, 1280), (7, 3), (2, 5)):
+        assert all(sum(weight for _, weight in taps) == src for taps in generate_wallpaper._box_taps(src, dst))
+
+
+@pytest.mark.parametrize(
+    "pixel_format, expected",
+    [
+        ("xrgb8888", bytes([0x40, 0x80, 0xC0, 0])),
+        ("xbgr8888", bytes([0xC0, 0x80, 0x40, 0])),
+        ("rgb888", bytes([0x40, 0x80, 0xC0])),
+        ("bgr888", bytes([0xC0, 0x80, 0x40])),
+        ("rgb565", (0xC0 * 31 // 255 << 11 | 0x80 * 63 // 255 << 5 | 0x40 * 31 // 255).to_bytes(2, "little")),
+    ],
+)
+def test_scale_to_mode_averages_areas_into_native_pixels(
+    decoder_backend: str, pixel_format: str, expected: bytes
+) -> None:
+    # Two columns average to R=0xC0, G=0x80, B=0x40.
+    pixels = bytes.fromhex("FFFF8000 FF808080") * 2
+    fmt = generate_wallpaper.PIXEL_FORMATS[pixel_format]
+
+    assert generate_wallpaper._scale_to_mode(pixels, 2, 2, (1, 1), fmt) == expected
+
+
+def test_scale_to_mode_backends_agree_and_dither_preserves_the_mean(tmp_path: Path) -> None:
+    if generate_wallpaper._np is None:
+        pytest.skip("numpy is not installed")
+    rng = random.Random(14)
+    pixels = bytes(rng.randrange(256) for _ in range(37 * 23 * 4))
+    fmt = generate_wallpaper.PIXEL_FORMATS["rgb565"]
+
+    for dither in (False, True):
+        fast = generate_wallpaper._scale_to_mode(pixels, 37, 23, (16, 9), fmt, dither)
+        planes = generate_wallpaper._box_scale(pixels, 37, 23, 16, 9)
+        pure = generate_wallpaper._encode_native(planes, 37 * 23, 16, 9, fmt, dither)
+        assert fast == pure
+
+    # A flat mid-grey between two 5-bit levels alternates between them.
+    grey = bytes.fromhex("FF848484") * 64
+    dithered = generate_wallpaper._scale_to_mode(grey, 8, 8, (8, 8), fmt, dither=True)
+    reds = [int.from_bytes(dithered[i : i + 2], "little") >> 11 for i in range(0, len(dithered), 2)]
+    assert set(reds) == {16, 17}
+    assert sum(reds) / len(reds) == pytest.approx(0x84 * 31 / 255, abs=1 / 16)
+
+
+def test_binary_asset_adds_prescaled_native_modes(tmp_path: Path) -> None:
+    import_root = tmp_path / "src" / "anonymos"
+    module = import_root / "display" / "generated_wallpaper.d"
+    module.parent.mkdir(parents=True)
+    frames = [_solid(0xFF102030, pixels=16), _solid(0xFF405060, pixels=16), _solid(0xFF102030, pixels=16)]
+
+    generate_wallpaper._write_binary_asset(
+        module, import_root, 4, 4, frames, targets=[(2, 2), (8, 4)], pixel_format="xbgr8888"
+    )
+
+    assert (module.parent / "generated_wallpaper_2x2.bin").read_bytes() == (
+        bytes([0x10, 0x20, 0x30, 0]) * 4 + bytes([0x40, 0x50, 0x60, 0]) * 4
+    )
+    assert len((module.parent / "generated_wallpaper_8x4.bin").read_bytes()) == 8 * 4 * 4 * 2
+    source = module.read_text()
+    assert "enum uint wallpaperNativeBpp = 32;" in source
+    assert "enum bool wallpaperNativeIsBGR = true;" in source
+    assert "enum uint[2][] wallpaperNativeModes = [[2, 2], [8, 4]];" in source
+    assert 'import("display/generated_wallpaper_8x4.bin")' in source
+    assert "case 1: return wallpaperNative1[];" in source
+
+
+def _frames_then_error(frames: list[generate_wallpaper.Frame]) -> Iterator[generate_wallpaper.Frame]:
+    yield from frames
+    raise generate_wallpaper.GifDecodeError("truncated image data")
+
+
+def test_failed_writes_keep_the_previous_outputs(tmp_path: Path) -> None:
+    import_root = tmp_path / "src" / "anonymos"
+    module = import_root / "display" / "generated_wallpaper.d"
+    module.parent.mkdir(parents=True)
+    frames = [_solid(0xFF102030, pixels=16), _solid(0xFF405060, pixels=16)]
+    generate_wallpaper._write_binary_asset(module, import_root, 4, 4, frames, targets=[(2, 2)])
+    outputs = [module, module.with_suffix(".bin"), module.parent / "generated_wallpaper_2x2.bin"]
+    before = [path.read_bytes() for path in outputs]
+
+    with pytest.raises(generate_wallpaper.GifDecodeError):
+        generate_wallpaper._write_binary_asset(
+            module, import_root, 4, 4, _frames_then_error(frames[:1]), targets=[(2, 2)]
+        )
+    assert [path.read_bytes() for path in outputs] == before
+
+    source = tmp_path / "inline_wallpaper.d"
+    generate_wallpaper._write_d_module(source, 4, 4, frames)
+    text = source.read_text()
+    with pytest.raises(generate_wallpaper.GifDecodeError):
+        generate_wallpaper._write_d_module(source, 4, 4, _frames_then_error(frames[:1]))
+    assert source.read_text() == text
+
+    assert not list(tmp_path.rglob(".tmp.*"))
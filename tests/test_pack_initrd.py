@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+import tarfile
+from typing import Dict, List
+import zlib
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import pack_initrd
+
+
+@pytest.fixture()
+def staging(tmp_path: Path) -> Path:
+    root = tmp_path / "staging"
+    files = {
+        "bin/sh": b"\x7fELF" + bytes(range(256)) * 20,
+        "boot/kernel.elf": b"kernel" * 1000,
+        "etc/empty": b"",
+        "etc/motd": b"hello\n",
+        "usr/share/install/base_fs.img": b"\0" * 100,
+        "usr/share/fonts/" + "a" * 120 + ".ttf": b"font",
+        "deep/" + "/".join(["d" * 60] * 4) + "/leaf": b"leaf",
+        "usr/lib/" + "p" * 100 + "/libsplit.so": b"split",
+    }
+    for relative, data in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    (root / "bin" / "sh").chmod(0o755)
+    (root / "bin" / "ash").symlink_to("sh")
+    return root
+
+
+def test_archive_is_a_tar_with_page_aligned_payloads(staging: Path, tmp_path: Path) -> None:
+    output = tmp_path / "initrd.tar"
+    index = pack_initrd.pack(staging, output, excludes=["usr/share/install"])
+    blob = output.read_bytes()
+
+    with tarfile.open(output) as archive:
+        members = {member.name: member for member in archive.getmembers()}
+        assert archive.extractfile("bin/sh").read() == (staging / "bin" / "sh").read_bytes()
+        long_name = "usr/share/fonts/" + "a" * 120 + ".ttf"
+        assert archive.extractfile(long_name).read() == b"font"
+    assert members["bin/ash"].issym() and members["bin/ash"].linkname == "sh"
+    assert members["bin/sh"].mode == 0o755 and members["bin/sh"].mtime == 0
+    assert not any(name.startswith("usr/share/install") for name in members)
+
+    paths = [entry.path for entry in index]
+    assert sorted(paths, key=str.encode) == [entry.path for entry in pack_initrd.read_index(blob)]
+    for entry in pack_initrd.read_index(blob):
+        data = (staging / entry.path).read_bytes()
+        assert blob[entry.offset : entry.offset + entry.size] == data
+        if entry.size:
+            assert entry.offset % pack_initrd.PAGE == 0
+
+
+def test_archives_are_deterministic(staging: Path, tmp_path: Path) -> None:
+    first = tmp_path / "a.tar"
+    second = tmp_path / "b.tar"
+    pack_initrd.pack(staging, first)
+    os.utime(staging / "etc" / "motd", (1, 1))
+    pack_initrd.pack(staging, second)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_compressed_variant_inflates_each_file(staging: Path, tmp_path: Path) -> None:
+    output = tmp_path / "initrd.z"
+    pack_initrd.pack(staging, output, compress=True)
+    blob = output.read_bytes()
+
+    entries = pack_initrd.read_index(blob)
+    assert [entry.path for entry in entries] == sorted((entry.path for entry in entries), key=str.encode)
+    assert len(blob) < sum(entry.size for entry in entries)
+    for entry in entries:
+        assert entry.flags == pack_initrd.FLAG_ZLIB
+        stream = blob[entry.offset : entry.offset + entry.stored_size]
+        assert zlib.decompress(stream) == (staging / entry.path).read_bytes()
+
+
+def test_pax_padding_records_have_exact_lengths() -> None:
+    for size in (12, 99, 100, 101, 511, 512, 4096, 100000):
+        record = pack_initrd._pax_padding(size)
+        assert len(record) == size
+        assert int(record.split(b" ", 1)[0]) == size
+
+
+def _kernel_file_names(blob: bytes) -> Dict[str, bytes]:
+    """Walk the archive the way fs.d's parseTarball() does, returning each regular file."""
+
+    files: Dict[str, bytes] = {}
+    pending = None
+    offset = 0
+    while offset + pack_initrd.BLOCK <= len(blob) and blob[offset] != 0:
+        header = blob[offset : offset + pack_initrd.BLOCK]
+        size = int(header[124:136].rstrip(b"\0 ") or b"0", 8)
+        data = blob[offset + pack_initrd.BLOCK : offset + pack_initrd.BLOCK + size]
+        offset += pack_initrd.BLOCK + -(-size // pack_initrd.BLOCK) * pack_initrd.BLOCK
+        if header[156:157] == b"x":
+            paths = [record[5:-1] for record in _pax_records(data) if record.startswith(b"path=")]
+            pending = paths[-1] if paths else None
+            continue
+        name, pending = pending, None
+        if name is None:
+            name = header[0:100].split(b"\0", 1)[0]
+            prefix = header[345:500].split(b"\0", 1)[0] if header[257:262] == b"ustar" else b""
+            if prefix:
+                name = prefix + b"/" + name
+        if header[156:157] in (b"0", b"\0"):
+            files[name.decode()] = data
+    return files
+
+
+def _pax_records(data: bytes) -> List[bytes]:
+    records = []
+    while data:
+        length, rest = data.split(b" ", 1)
+        records.append(rest[: int(length) - len(length) - 1])
+        data = data[int(length) :]
+    return records
+
+
+def test_long_paths_keep_their_full_name_in_the_kernel_walk(staging: Path, tmp_path: Path) -> None:
+    output = tmp_path / "initrd.tar"
+    pack_initrd.pack(staging, output)
+    blob = output.read_bytes()
+
+    split = "usr/lib/" + "p" * 100 + "/libsplit.so"
+    assert len(split.encode()) > 100 and not pack_initrd._needs_pax_path(split)
+    files = _kernel_file_names(blob)
+    assert files[split] == b"split"
+    with tarfile.open(output) as archive:
+        assert archive.extractfile(split).read() == b"split"
+    for entry in pack_initrd.read_index(blob):
+        assert files[entry.path] == (staging / entry.path).read_bytes()
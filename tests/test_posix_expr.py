@@ -1,42 +1,18 @@
 from __future__ import annotations
 
 from pathlib import Path
-import shutil
 import subprocess
 
 import pytest
 
-ROOT = Path(__file__).resolve().parents[1]
-
+from conftest import BinaryCache
 
-def _find_compiler() -> str | None:
-    for candidate in ("ldc2", "ldmd2", "dmd", "gdc"):
-        path = shutil.which(candidate)
-        if path:
-            return path
-    return None
+ROOT = Path(__file__).resolve().parents[1]
 
 
 @pytest.fixture(scope="module")
-def expr_binary(tmp_path_factory: pytest.TempPathFactory) -> Path:
-    compiler = _find_compiler()
-    if compiler is None:
-        pytest.skip("no D compiler available in PATH")
-
-    build_dir = tmp_path_factory.mktemp("expr-bin")
-    binary = build_dir / "expr"
-    source = ROOT / "src" / "minimal_os" / "posixutils" / "commands" / "expr" / "expr.d"
-
-    cmd = [
-        compiler,
-        "-O",
-        "-release",
-        str(source),
-        f"-of={binary}",
-    ]
-    subprocess.run(cmd, check=True, cwd=ROOT)
-    binary.chmod(0o755)
-    return binary
+def expr_binary(compiled_binaries: BinaryCache) -> Path:
+    return compiled_binaries.posix_utility("expr")
 
 
 def _run_expr(expr_path: Path, *args: str) -> subprocess.CompletedProcess[str]:
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import run_d_unittests
+from conftest import FakeLdc
+
+
+def _module(root: Path, relative: str, body: str) -> None:
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+
+
+def test_discovery_finds_modules_with_unittests(tmp_path: Path) -> None:
+    root = tmp_path / "src" / "anonymos"
+    _module(root, "kernel/vmo.d", "module anonymos.kernel.vmo;\nunittest\n{\n}\n")
+    _module(root, "fs.d", "module anonymos.fs;\nvoid f() {}\n")
+    _module(root, "tools/diff.d", "int main(string[] args) { return 0; }\n  unittest {}\n")
+
+    modules = run_d_unittests.discover_test_modules(root)
+    assert [(m.name, m.has_main) for m in modules] == [
+        ("anonymos.kernel.vmo", False),
+        ("anonymos.tools.diff", True),
+    ]
+    assert [m.name for m in run_d_unittests.discover_test_modules(root, exclude=["*.tools.*"])] == [
+        "anonymos.kernel.vmo"
+    ]
+
+    runner = run_d_unittests.runner_source(modules[0])
+    assert 'm.name != "anonymos.kernel.vmo"' in runner
+    assert "void main() {}" in runner
+    assert "void main() {}" not in run_d_unittests.runner_source(modules[1])
+
+
+@pytest.mark.parametrize("fake_ldc", [{"emit": "unittest"}], indirect=True)
+def test_results_are_reported_per_module_as_junit(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    root = tmp_path / "src" / "anonymos"
+    _module(root, "a.d", "module anonymos.a;\nunittest {}\n")
+    _module(root, "b.d", "module anonymos.b;\nunittest { FAIL; }\n")
+    _module(root, "c.d", "module anonymos.c;\nunittest { HANG; }\n")
+    _module(root, "d.d", "module anonymos.d;\nunittest { BROKEN; }\n")
+
+    modules = run_d_unittests.discover_test_modules(root)
+    results = run_d_unittests.run_all(
+        str(fake_ldc), modules, tmp_path / "work", [root.parent], [root], jobs=4, timeout=0.5
+    )
+    assert [result.status for result in results] == ["passed", "failed", "timeout", "error"]
+    assert (tmp_path / "work" / "anonymos.a" / "runner.d").is_file()
+
+    report = tmp_path / "junit.xml"
+    run_d_unittests.junit_xml(results).write(report, encoding="utf-8", xml_declaration=True)
+    suite = ET.parse(report).getroot()
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors")) == ("4", "2", "1")
+    cases = {case.get("classname"): case for case in suite.iter("testcase")}
+    assert "AssertError" in cases["anonymos.b"].find("failure").text
+    assert cases["anonymos.c"].find("failure").get("type") == "timeout"
+    assert "error: broken module" in cases["anonymos.d"].find("error").text
+    assert cases["anonymos.a"].find("failure") is None
+
+
+def test_build_command_uses_the_kernel_search_paths_by_default() -> None:
+    module = run_d_unittests.TestModule("anonymos.fs", ROOT / "src" / "anonymos" / "fs.d", False)
+    cmd = run_d_unittests.build_command(
+        "ldc2",
+        module,
+        Path("runner.d"),
+        Path("unittests"),
+        run_d_unittests.DEFAULT_IMPORT_DIRS,
+        run_d_unittests.DEFAULT_STRING_IMPORT_DIRS,
+        (),
+    )
+    assert [arg for arg in cmd if arg.startswith(("-I", "-J"))] == [
+        f"-I{ROOT}",
+        f"-I{ROOT / 'src'}",
+        f"-J{ROOT}",
+        f"-J{ROOT / 'src' / 'anonymos'}",
+    ]
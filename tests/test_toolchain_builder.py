@@ -4,11 +4,15 @@ from pathlib import Path
 from textwrap import dedent
 import sys
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import toolchain_builder
 from toolchain_builder import build_settings_from_dict, load_config
+from conftest import FakeLdc
 
 
 def _touch_executable(path: Path) -> None:
@@ -81,3 +85,64 @@ def test_load_config_without_file(tmp_path: Path) -> None:
     data, base_dir = load_config(config_path)
     assert base_dir == config_path.parent.resolve()
     assert data["compiler"] == "/bin/false"
+
+
+def _project(tmp_path: Path) -> Path:
+    runtime = tmp_path / "runtime"
+    runtime.mkdir()
+    (runtime / "object.d").write_text("module object;\n", encoding="utf-8")
+    user = tmp_path / "app"
+    (user / "util").mkdir(parents=True)
+    (user / "main.d").write_text("module main;\nimport util.strings, object;\n", encoding="utf-8")
+    (user / "util" / "strings.d").write_text("module util.strings;\n", encoding="utf-8")
+    (user / "other.d").write_text("module other;\n", encoding="utf-8")
+    return tmp_path
+
+
+def _settings(tmp_path: Path, compiler: FakeLdc) -> toolchain_builder.ToolchainSettings:
+    return build_settings_from_dict(
+        {"compiler": str(compiler), "runtime": "runtime", "user": ["app"], "output": "out/app.bin"},
+        base_dir=tmp_path,
+    )
+
+
+def test_build_compiles_every_module_then_only_what_changed(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    root = _project(tmp_path)
+    settings = _settings(root, fake_ldc)
+    output = toolchain_builder.build(settings, jobs=4)
+
+    assert output.read_text(encoding="utf-8").count("module") == 4
+    assert sorted(fake_ldc.invocations()) == ["app.bin", "main.o", "object.o", "other.o", "strings.o"]
+
+    toolchain_builder.build(settings, jobs=4)
+    assert fake_ldc.invocations() == []
+
+    # Importers of a changed module are rebuilt along with it.
+    (root / "app" / "util" / "strings.d").write_text("module util.strings;\nenum x = 1;\n", encoding="utf-8")
+    toolchain_builder.build(settings, jobs=4)
+    assert sorted(fake_ldc.invocations()) == ["app.bin", "main.o", "strings.o"]
+    assert "[build] main" in settings.log_file.read_text(encoding="utf-8")
+
+
+def test_unchanged_objects_do_not_relink(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    root = _project(tmp_path)
+    settings = _settings(root, fake_ldc)
+    toolchain_builder.build(settings)
+    fake_ldc.invocations()
+
+    # A comment-only edit recompiles but yields identical object bytes.
+    (root / "app" / "other.d").write_text("// note\nmodule other;\n", encoding="utf-8")
+    toolchain_builder.build(settings)
+    assert fake_ldc.invocations() == ["other.o"]
+
+
+def test_failed_module_stops_before_linking(tmp_path: Path, fake_ldc: FakeLdc) -> None:
+    root = _project(tmp_path)
+    (root / "app" / "other.d").write_text("module other;\nBROKEN\n", encoding="utf-8")
+    settings = _settings(root, fake_ldc)
+    settings.keep_going = True
+
+    with pytest.raises(SystemExit, match="Failed to compile: other"):
+        toolchain_builder.build(settings)
+    assert "app.bin" not in fake_ldc.invocations()
+    assert "error: broken module" in settings.log_file.read_text(encoding="utf-8")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = ROOT / "tools"
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import update_sh_metadata
+
+
+def test_source_count_cache_tracks_nested_changes(tmp_path: Path) -> None:
+    src = tmp_path / "sh" / "src"
+    (src / "builtins" / "io").mkdir(parents=True)
+    for path in ("main.d", "notes.txt", "builtins/cd.d", "builtins/io/echo.d"):
+        (src / path).write_text("", encoding="utf-8")
+    cache = tmp_path / "counts.json"
+
+    assert update_sh_metadata.count_source_files(tmp_path / "sh", cache) == 3
+    assert cache.is_file()
+    assert update_sh_metadata.count_source_files(tmp_path / "sh", cache) == 3
+
+    (src / "builtins" / "io" / "printf.d").write_text("", encoding="utf-8")
+    (src / "main.d").unlink()
+    assert update_sh_metadata.count_source_files(tmp_path / "sh", cache) == 3
+    (src / "builtins" / "io" / "read.d").write_text("", encoding="utf-8")
+    assert update_sh_metadata.count_source_files(tmp_path / "sh", cache) == 4
+
+
+def test_git_revision_reads_loose_and_packed_refs(tmp_path: Path) -> None:
+    git_dir = tmp_path / ".git"
+    (git_dir / "refs" / "heads").mkdir(parents=True)
+    (tmp_path / "src").mkdir()
+    (git_dir / "HEAD").write_text("ref: refs/heads/main\n", encoding="utf-8")
+    (git_dir / "packed-refs").write_text(
+        "# pack-refs with: peeled fully-peeled sorted\n" + "a" * 40 + " refs/heads/main\n", encoding="utf-8"
+    )
+    assert update_sh_metadata.git_revision(tmp_path / "src") == "a" * 40
+
+    (git_dir / "refs" / "heads" / "main").write_text("b" * 40 + "\n", encoding="utf-8")
+    assert update_sh_metadata.git_revision(tmp_path) == "b" * 40
+
+    (git_dir / "HEAD").write_text("c" * 40 + "\n", encoding="utf-8")
+    assert update_sh_metadata.git_revision(tmp_path) == "c" * 40
+    assert update_sh_metadata.git_revision(tmp_path / "missing") == "unknown"
+
+
+def test_write_if_changed_keeps_mtime_of_identical_output(tmp_path: Path) -> None:
+    target = tmp_path / "sh_metadata.d"
+    assert update_sh_metadata.write_if_changed(target, "module sh_metadata;\n")
+    os.utime(target, ns=(0, 0))
+
+    assert not update_sh_metadata.write_if_changed(target, "module sh_metadata;\n")
+    assert target.stat().st_mtime_ns == 0
+    assert update_sh_metadata.write_if_changed(target, "module sh_metadata;\n// v2\n")
+    assert target.stat().st_mtime_ns != 0
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""Compile a D runtime plus user sources with the toolchain described in TOML.
+
+The configuration (see toolchain_config.example.toml) names the compiler,
+the runtime directory, extra user source directories, include/library
+paths and flags. Every ``*.d`` file found under those directories is
+compiled to its own object in parallel; objects are only rebuilt when the
+module or anything it imports changed, and the final binary is only
+relinked when an object's bytes actually changed. Commands and compiler
+output are appended to ``log_file``.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import tomllib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, List, Sequence, TextIO
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_CONFIG = ROOT / "toolchain_config.toml"
+STATE_FILE = "toolchain_state.json"
+
+_MODULE_DECL = re.compile(rb"^\s*module\s+([\w.]+)\s*;", re.MULTILINE)
+_IMPORT_LIST = re.compile(rb"\bimport\s+([^;{}()]+);")
+_IMPORT_NAME = re.compile(rb"^(?:\w+\s*=\s*)?([\w.]+)")
+
+
+@dataclass
+class ToolchainSettings:
+    compiler: Path
+    runtime: Path
+    user_dirs: List[Path] = field(default_factory=list)
+    build_dir: Path = Path("build")
+    output: Path = Path("build/output")
+    log_file: Path = Path("build/build.log")
+    include_dirs: List[Path] = field(default_factory=list)
+    lib_dirs: List[Path] = field(default_factory=list)
+    sysroot: Path | None = None
+    archiver: Path | None = None
+    phobos: Path | None = None
+    mstd: Path | None = None
+    gcc: Path | None = None
+    target_triple: str | None = None
+    compile_flags: List[str] = field(default_factory=list)
+    link_flags: List[str] = field(default_factory=list)
+    libs: List[str] = field(default_factory=list)
+    skip: List[str] = field(default_factory=list)
+    dry_run: bool = False
+    force: bool = False
+    keep_going: bool = False
+
+
+@dataclass(frozen=True)
+class SourceUnit:
+    source: Path
+    object: Path
+    module: str
+
+
+@dataclass(frozen=True)
+class CompileOutcome:
+    unit: SourceUnit
+    returncode: int
+    log: str
+    elapsed: float
+    changed: bool = False
+
+
+def load_config(path: Path | None) -> tuple[dict[str, Any], Path | None]:
+    """Parse ``path`` as TOML; returns the table and the directory it lives in."""
+
+    if path is None:
+        return {}, None
+    try:
+        with path.open("rb") as handle:
+            data = tomllib.load(handle)
+    except FileNotFoundError:
+        raise SystemExit(f"Toolchain config not found: {path}") from None
+    except tomllib.TOMLDecodeError as exc:
+        raise SystemExit(f"Invalid toolchain config {path}: {exc}") from None
+    return data, path.resolve().parent
+
+
+def _resolve(value: str | os.PathLike[str], base_dir: Path) -> Path:
+    path = Path(value).expanduser()
+    if not path.is_absolute():
+        path = base_dir / path
+    return path.resolve()
+
+
+def _resolve_tool(value: str, base_dir: Path) -> Path:
+    # Bare names such as "ldc2" are looked up on PATH like a shell would.
+    if os.sep not in value and (os.altsep is None or os.altsep not in value):
+        found = shutil.which(value)
+        if found is not None:
+            return Path(found).resolve()
+    return _resolve(value, base_dir)
+
+
+def _string_list(data: dict[str, Any], key: str) -> List[str]:
+    value = data.get(key, [])
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise SystemExit(f"Toolchain setting {key!r} must be a string or a list of strings")
+    return list(value)
+
+
+def build_settings_from_dict(data: dict[str, Any], base_dir: Path | None = None) -> ToolchainSettings:
+    """Turn a parsed config into settings, resolving relative paths against ``base_dir``."""
+
+    base = (base_dir or Path.cwd()).resolve()
+    for key in ("compiler", "runtime"):
+        if not data.get(key):
+            raise SystemExit(f"Toolchain config is missing {key!r}")
+
+    def optional_path(key: str) -> Path | None:
+        value = data.get(key)
+        return _resolve(value, base) if value else None
+
+    def optional_tool(key: str) -> Path | None:
+        value = data.get(key)
+        return _resolve_tool(value, base) if value else None
+
+    build_dir = _resolve(data.get("build_dir", "build"), base)
+    return ToolchainSettings(
+        compiler=_resolve_tool(data["compiler"], base),
+        runtime=_resolve(data["runtime"], base),
+        user_dirs=[_resolve(item, base) for item in _string_list(data, "user")],
+        build_dir=build_dir,
+        output=_resolve(data["output"], base) if data.get("output") else build_dir / "output",
+        log_file=_resolve(data["log_file"], base) if data.get("log_file") else build_dir / "build.log",
+        include_dirs=[_resolve(item, base) for item in _string_list(data, "include_dirs")],
+        lib_dirs=[_resolve(item, base) for item in _string_list(data, "lib_dirs")],
+        sysroot=optional_path("sysroot"),
+        archiver=optional_tool("archiver"),
+        phobos=optional_path("phobos"),
+        mstd=optional_path("mstd"),
+        gcc=optional_tool("gcc"),
+        target_triple=data.get("target_triple") or None,
+        compile_flags=_string_list(data, "compile_flags"),
+        link_flags=_string_list(data, "link_flags"),
+        libs=_string_list(data, "libs"),
+        skip=_string_list(data, "skip"),
+        dry_run=bool(data.get("dry_run", False)),
+        force=bool(data.get("force", False)),
+        keep_going=bool(data.get("keep_going", False)),
+    )
+
+
+def source_roots(settings: ToolchainSettings) -> List[tuple[str, Path]]:
+    """(object subdirectory, source directory) pairs in link order."""
+
+    roots = [("runtime", settings.runtime)]
+    if settings.phobos is not None:
+        roots.append(("phobos", settings.phobos))
+    if settings.mstd is not None:
+        roots.append(("mstd", settings.mstd))
+    for index, user_dir in enumerate(settings.user_dirs):
+        roots.append((f"user{index}-{user_dir.name}", user_dir))
+    return roots
+
+
+def discover_sources(settings: ToolchainSettings) -> List[SourceUnit]:
+    """Find every D module to compile, mapping each to an object under build_dir/obj."""
+
+    units: List[SourceUnit] = []
+    seen: set[Path] = set()
+    for tag, root in source_roots(settings):
+        if not root.is_dir():
+            raise SystemExit(f"Source directory not found: {root}")
+        for source in sorted(root.rglob("*.d")):
+            source = source.resolve()
+            if source in seen or any(fnmatch.fnmatch(str(source), pattern) for pattern in settings.skip):
+                continue
+            seen.add(source)
+            relative = source.relative_to(root)
+            module = ".".join(relative.with_suffix("").parts)
+            obj = settings.build_dir / "obj" / tag / relative.with_suffix(".o")
+            units.append(SourceUnit(source, obj, module))
+    return units
+
+
+def _imports(text: bytes) -> set[str]:
+    names: set[str] = set()
+    for match in _IMPORT_LIST.finditer(text):
+        # "import a, b = c.d : x, y;" -- bindings after ':' name symbols, not modules.
+        modules = match.group(1).split(b":", 1)[0]
+        for part in modules.split(b","):
+            name = _IMPORT_NAME.match(part.strip())
+            if name is not None:
+                names.add(name.group(1).decode())
+    return names
+
+
+def source_keys(units: Sequence[SourceUnit], command_digest: str) -> dict[Path, str]:
+    """Hash each module together with everything it transitively imports.
+
+    Separate compilation bakes struct layouts, templates and inlined code
+    from imported modules into an object, so an object is stale whenever
+    any module reachable through its imports changes.
+    """
+
+    contents = {unit.source: unit.source.read_bytes() for unit in units}
+    by_module: dict[str, Path] = {}
+    for unit in units:
+        declared = _MODULE_DECL.search(contents[unit.source])
+        by_module[declared.group(1).decode() if declared else unit.module] = unit.source
+    digests = {source: hashlib.sha256(data).hexdigest() for source, data in contents.items()}
+    edges = {
+        source: sorted({by_module[name] for name in _imports(data) if name in by_module})
+        for source, data in contents.items()
+    }
+
+    keys: dict[Path, str] = {}
+    for unit in units:
+        reachable = {unit.source}
+        stack = [unit.source]
+        while stack:
+            for dependency in edges[stack.pop()]:
+                if dependency not in reachable:
+                    reachable.add(dependency)
+                    stack.append(dependency)
+        digest = hashlib.sha256(command_digest.encode())
+        for source in sorted(reachable):
+            digest.update(f"{source}\0{digests[source]}\n".encode())
+        keys[unit.source] = digest.hexdigest()
+    return keys
+
+
+def compile_flags(settings: ToolchainSettings) -> List[str]:
+    flags = list(settings.compile_flags)
+    if settings.target_triple:
+        flags.append(f"-mtriple={settings.target_triple}")
+    for _, root in source_roots(settings):
+        flags.append(f"-I{root}")
+    flags.extend(f"-I{path}" for path in settings.include_dirs)
+    return flags
+
+
+def compile_command(settings: ToolchainSettings, unit: SourceUnit, output: Path) -> List[str]:
+    return [str(settings.compiler), "-c", str(unit.source), *compile_flags(settings), f"-of={output}"]
+
+
+def link_command(settings: ToolchainSettings, objects: Sequence[Path], output: Path) -> List[str]:
+    """Archive into a static library for ``.a`` outputs, otherwise link an executable."""
+
+    if output.suffix == ".a":
+        archiver = settings.archiver or shutil.which("ar") or "ar"
+        return [str(archiver), "rcs", str(output), *map(str, objects)]
+    if settings.gcc is not None:
+        cmd = [str(settings.gcc), *map(str, objects), *settings.link_flags]
+        if settings.sysroot is not None:
+            cmd.append(f"--sysroot={settings.sysroot}")
+        cmd.extend(f"-L{path}" for path in settings.lib_dirs)
+        cmd.extend(f"-l{lib}" for lib in settings.libs)
+        return [*cmd, "-o", str(output)]
+    cmd = [str(settings.compiler), *map(str, objects), *settings.link_flags]
+    if settings.target_triple:
+        cmd.append(f"-mtriple={settings.target_triple}")
+    cmd.extend(f"-L-L{path}" for path in settings.lib_dirs)
+    cmd.extend(f"-L-l{lib}" for lib in settings.libs)
+    return [*cmd, f"-of={output}"]
+
+
+def _file_digest(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _run(cmd: Sequence[str]) -> subprocess.CompletedProcess[str]:
+    try:
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError as exc:
+        return subprocess.CompletedProcess(list(cmd), 127, f"{cmd[0]}: {exc.strerror}\n", None)
+
+
+def compile_unit(settings: ToolchainSettings, unit: SourceUnit, previous_digest: str | None) -> CompileOutcome:
+    """Compile one module into a scratch object and move it into place.
+
+    ``changed`` reports whether the object's bytes differ from the ones the
+    last link used, which is what decides whether to relink.
+    """
+
+    started = time.monotonic()
+    unit.object.parent.mkdir(parents=True, exist_ok=True)
+    scratch = unit.object.with_name(f".tmp.{unit.object.name}")
+    completed = _run(compile_command(settings, unit, scratch))
+    if completed.returncode != 0:
+        scratch.unlink(missing_ok=True)
+        return CompileOutcome(unit, completed.returncode, completed.stdout or "", time.monotonic() - started)
+    changed = _file_digest(scratch) != previous_digest
+    os.replace(scratch, unit.object)
+    return CompileOutcome(unit, 0, completed.stdout or "", time.monotonic() - started, changed=changed)
+
+
+class BuildLog:
+    """Echo status lines to stdout and append commands plus output to the log file."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle: TextIO = path.open("a", encoding="utf-8")
+        self.handle.write(f"==> build started {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    def status(self, line: str) -> None:
+        print(line)
+        self.handle.write(line + "\n")
+
+    def command(self, cmd: Sequence[str], output: str = "") -> None:
+        self.handle.write("$ " + " ".join(cmd) + "\n")
+        if output:
+            self.handle.write(output if output.endswith("\n") else output + "\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def _load_state(path: Path) -> dict[str, Any]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save_state(path: Path, state: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scratch = path.with_name(f".tmp.{path.name}")
+    scratch.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(scratch, path)
+
+
+def build(settings: ToolchainSettings, jobs: int | None = None) -> Path:
+    """Compile stale modules in parallel and relink when any object changed."""
+
+    units = discover_sources(settings)
+    if not units:
+        raise SystemExit("No D sources found to compile")
+    state_path = settings.build_dir / STATE_FILE
+    state = {} if settings.force else _load_state(state_path)
+    objects_state: dict[str, dict[str, str]] = state.get("objects", {})
+    command_digest = hashlib.sha256(
+        json.dumps([str(settings.compiler), compile_flags(settings)]).encode()
+    ).hexdigest()
+    keys = source_keys(units, command_digest)
+
+    stale = [
+        unit
+        for unit in units
+        if objects_state.get(str(unit.object), {}).get("key") != keys[unit.source] or not unit.object.is_file()
+    ]
+    log = BuildLog(settings.log_file)
+    try:
+        if settings.dry_run:
+            for unit in stale:
+                log.status("[dry-run] " + " ".join(compile_command(settings, unit, unit.object)))
+            log.status("[dry-run] " + " ".join(link_command(settings, [unit.object for unit in units], settings.output)))
+            return settings.output
+
+        for unit in units:
+            if unit not in stale:
+                log.status(f"[cached] {unit.module}")
+        failures: List[CompileOutcome] = []
+        changed = False
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            futures: List[Future[CompileOutcome]] = [
+                pool.submit(compile_unit, settings, unit, objects_state.get(str(unit.object), {}).get("digest"))
+                for unit in stale
+            ]
+            for future in futures:
+                if future.cancelled():
+                    continue
+                outcome = future.result()
+                log.command(compile_command(settings, outcome.unit, outcome.unit.object), outcome.log)
+                if outcome.returncode != 0:
+                    log.status(f"[fail] {outcome.unit.module} ({outcome.elapsed:.1f}s)")
+                    if outcome.log:
+                        sys.stdout.write(outcome.log if outcome.log.endswith("\n") else outcome.log + "\n")
+                    failures.append(outcome)
+                    objects_state.pop(str(outcome.unit.object), None)
+                    if not settings.keep_going:
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                log.status(f"[build] {outcome.unit.module} ({outcome.elapsed:.1f}s)")
+                changed |= outcome.changed
+                objects_state[str(outcome.unit.object)] = {
+                    "key": keys[outcome.unit.source],
+                    "digest": _file_digest(outcome.unit.object) or "",
+                }
+
+        # Objects for modules that disappeared must not linger in the next link.
+        live = {str(unit.object) for unit in units}
+        for stale_object in set(objects_state) - live:
+            Path(stale_object).unlink(missing_ok=True)
+            del objects_state[stale_object]
+            changed = True
+        state["objects"] = objects_state
+
+        if failures:
+            _save_state(state_path, state)
+            raise SystemExit(f"[error] Failed to compile: {', '.join(f.unit.module for f in failures)}")
+
+        objects = [unit.object for unit in units]
+        link = link_command(settings, objects, settings.output)
+        if not changed and state.get("link") == link and settings.output.is_file():
+            log.status(f"[cached] {settings.output.name} (no object changed)")
+            _save_state(state_path, state)
+            return settings.output
+
+        settings.output.parent.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        completed = _run(link)
+        log.command(link, completed.stdout or "")
+        if completed.returncode != 0:
+            state.pop("link", None)
+            _save_state(state_path, state)
+            if completed.stdout:
+                sys.stdout.write(completed.stdout)
+            raise SystemExit(f"[error] Link failed: {settings.output}")
+        state["link"] = link
+        _save_state(state_path, state)
+        log.status(f"[ok] Linked {settings.output} ({time.monotonic() - started:.1f}s)")
+        return settings.output
+    finally:
+        log.close()
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the D runtime and user sources with a TOML toolchain config")
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=DEFAULT_CONFIG if DEFAULT_CONFIG.is_file() else None,
+        help="Toolchain config (default: toolchain_config.toml next to this script)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Parallel compiles (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Recompile every module and relink")
+    parser.add_argument("--dry-run", action="store_true", help="Print the commands without running them")
+    parser.add_argument("--keep-going", action="store_true", help="Keep compiling other modules after a failure")
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        raise SystemExit(f"--jobs must be at least 1 (got {args.jobs})")
+    data, base_dir = load_config(args.config)
+    if not data:
+        raise SystemExit("No toolchain config found; copy toolchain_config.example.toml to toolchain_config.toml")
+    settings = build_settings_from_dict(data, base_dir=base_dir)
+    settings.force |= args.force
+    settings.dry_run |= args.dry_run
+    settings.keep_going |= args.keep_going
+    if not settings.compiler.is_file():
+        raise SystemExit(f"Compiler not found: {settings.compiler}")
+    build(settings, args.jobs)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
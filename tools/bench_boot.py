@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Measure boot time of the ISO under QEMU from its serial console.
+
+Boots the image headless ``--iterations`` times (TCG by default) with the
+same machine, network and serial setup ``scripts/buildscript.sh`` uses,
+timestamps the first console line matching each boot milestone, and stops
+a run once the ``--until`` milestone appears or ``--timeout`` expires.
+The JSON report holds per-milestone times since QEMU was launched, the
+per-stage latency between consecutive milestones (both as percentiles),
+and every individual run, so boot regressions can be tracked over time.
+
+The default ISO boots with ``install_mode`` on the kernel command line
+(src/grub/grub.cfg), which skips ``performBootIntegrityCheck()``, so none
+of the ``[integrity]`` milestones appear. The report counts such boots
+under ``install_mode_boots``. To time the integrity check, including the
+chunk-map path, build the ISO with
+``GRUB_CFG_SRC=src/grub/grub-verified.cfg scripts/buildscript.sh``; boots
+that ran the check without a chunk map (serial hashing) are counted under
+``serial_hash_boots``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ISO = ROOT / "build" / "os.iso"
+DEFAULT_OUTPUT = ROOT / "build" / "boot-bench" / "boot-times.json"
+PERCENTILES = (50, 90, 95, 99)
+
+# (name, pattern) in boot order; the first console line matching each counts.
+MILESTONES: List[Tuple[str, str]] = [
+    ("first_output", r"."),
+    ("chunk_map_loaded", r"\[kernel\] Integrity chunk map loaded"),
+    ("install_mode", r"\[kernel\] Install mode detected"),
+    ("integrity_start", r"\[integrity\] Computing system fingerprint"),
+    ("integrity_kernel_hash", r"\[integrity\]\s+- Kernel hash computed"),
+    ("integrity_initrd_hash", r"\[integrity\]\s+- Initrd hash computed"),
+    ("integrity_manifest_hash", r"\[integrity\]\s+- Manifest hash computed"),
+    ("integrity_fingerprint_done", r"\[integrity\] Fingerprint computation complete"),
+    ("integrity_rootkit_scan_done", r"\[integrity\] Rootkit scan complete"),
+    ("initrd_loaded", r"\[kernel\] Initrd loaded"),
+    ("posix_manifest", r"\[posix\] Manifest status"),
+    ("desktop_start", r"\[desktop\] desktopProcessEntry called"),
+    ("desktop_main_loop", r"\[desktop\] entering main loop"),
+]
+
+
+def qemu_command(
+    qemu: str, iso: Path, accel: str, memory: Optional[str], extra: Sequence[str] = ()
+) -> List[str]:
+    cmd = [qemu, "-cdrom", str(iso), "-machine", f"pc,i8042=on,accel={accel}"]
+    cmd += ["-netdev", "user,id=u1", "-device", "e1000,netdev=u1"]
+    cmd += ["-display", "none", "-monitor", "none", "-serial", "stdio", "-no-reboot"]
+    if memory:
+        cmd += ["-m", memory]
+    return cmd + list(extra)
+
+
+def match_milestones(
+    lines: Iterable[Tuple[float, str]], milestones: Sequence[Tuple[str, str]] = MILESTONES
+) -> Dict[str, float]:
+    """Time of the first line matching each milestone (milestones never seen are absent)."""
+
+    compiled = [(name, re.compile(pattern)) for name, pattern in milestones]
+    seen: Dict[str, float] = {}
+    for stamp, line in lines:
+        for name, pattern in compiled:
+            if name not in seen and pattern.search(line):
+                seen[name] = stamp
+    return seen
+
+
+def stage_latencies(times: Dict[str, float], milestones: Sequence[Tuple[str, str]] = MILESTONES) -> Dict[str, float]:
+    """Seconds between consecutive reached milestones, keyed "previous->next"."""
+
+    reached = [name for name, _ in milestones if name in times]
+    return {f"{before}->{after}": times[after] - times[before] for before, after in zip(reached, reached[1:])}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile of ``values`` (q in 0..100)."""
+
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile of an empty sequence")
+    rank = (len(ordered) - 1) * q / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: Sequence[Dict[str, float]], names: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    summary: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        values = [sample[name] for sample in samples if name in sample]
+        if not values:
+            continue
+        stats = {"count": len(values), "min": min(values), "mean": sum(values) / len(values), "max": max(values)}
+        stats.update({f"p{q}": percentile(values, q) for q in PERCENTILES})
+        summary[name] = {key: round(value, 6) for key, value in stats.items()}
+    return summary
+
+
+def boot_once(cmd: Sequence[str], until: str, timeout: float, log_path: Optional[Path] = None) -> Dict[str, float]:
+    """Boot once, returning milestone times in seconds since QEMU was started."""
+
+    lines: "queue.Queue[Optional[Tuple[float, str]]]" = queue.Queue()
+    started = time.monotonic()
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    def read() -> None:
+        assert process.stdout is not None
+        for raw in iter(process.stdout.readline, b""):
+            lines.put((time.monotonic() - started, raw.decode(errors="replace").rstrip("\r\n")))
+        lines.put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    transcript: List[Tuple[float, str]] = []
+    times: Dict[str, float] = {}
+    deadline = started + timeout
+    try:
+        while until not in times:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = lines.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            transcript.append(item)
+            for name, stamp in match_milestones([item]).items():
+                times.setdefault(name, stamp)
+    finally:
+        process.kill()
+        process.wait()
+        reader.join(timeout=5)
+    if log_path is not None:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log_path.write_text("".join(f"{stamp:10.3f} {line}\n" for stamp, line in transcript), encoding="utf-8")
+    return times
+
+
+def main() -> int:
+    names = [name for name, _ in MILESTONES]
+    parser = argparse.ArgumentParser(description="Benchmark ISO boot milestones under QEMU")
+    parser.add_argument("--iso", type=Path, default=DEFAULT_ISO, help="ISO to boot (default: build/os.iso)")
+    parser.add_argument("--qemu", default=os.environ.get("QEMU_BIN", "qemu-system-x86_64"), help="QEMU binary")
+    parser.add_argument("--accel", default="tcg", help="QEMU accelerator (default: tcg)")
+    parser.add_argument("--memory", help="Guest memory, e.g. 1G (default: QEMU's)")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="Boots to run (default: 5)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a boot is abandoned")
+    parser.add_argument(
+        "--until", default="desktop_start", choices=names, help="Milestone that ends a boot (default: desktop_start)"
+    )
+    parser.add_argument("--qemu-arg", action="append", default=[], metavar="ARG", help="Extra QEMU argument")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="JSON report path")
+    parser.add_argument("--log-dir", type=Path, help="Keep each boot's timestamped serial transcript here")
+    args = parser.parse_args()
+
+    if args.iterations < 1:
+        raise SystemExit(f"--iterations must be at least 1 (got {args.iterations})")
+    if not args.iso.is_file():
+        raise SystemExit(f"ISO not found: {args.iso}")
+
+    cmd = qemu_command(args.qemu, args.iso, args.accel, args.memory, args.qemu_arg)
+    print(f"[→] {' '.join(cmd)}")
+    runs: List[Dict[str, float]] = []
+    for iteration in range(args.iterations):
+        log_path = args.log_dir / f"boot-{iteration}.log" if args.log_dir else None
+        times = boot_once(cmd, args.until, args.timeout, log_path)
+        runs.append(times)
+        if args.until in times:
+            print(f"[ok] Boot {iteration + 1}/{args.iterations}: {args.until} after {times[args.until]:.2f}s")
+        else:
+            last = max(times, key=times.get) if times else "nothing"
+            print(f"[warn] Boot {iteration + 1}/{args.iterations}: no {args.until} (last milestone: {last})")
+
+    stages = [stage_latencies(times) for times in runs]
+    stage_names = list(dict.fromkeys(name for sample in stages for name in sample))
+    report = {
+        "iso": str(args.iso),
+        "command": cmd,
+        "iterations": args.iterations,
+        "completed": sum(args.until in times for times in runs),
+        "until": args.until,
+        "install_mode_boots": sum("install_mode" in times for times in runs),
+        "serial_hash_boots": sum(
+            "integrity_start" in times and "chunk_map_loaded" not in times for times in runs
+        ),
+        "milestones": summarize(runs, names),
+        "stages": summarize(stages, stage_names),
+        "runs": [{name: round(times[name], 6) for name in names if name in times} for times in runs],
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    for name, stats in report["milestones"].items():
+        print(f"  {name:<28} p50 {stats['p50']:8.3f}s  p95 {stats['p95']:8.3f}s  ({stats['count']} runs)")
+    print(f"[ok] Wrote {args.output}")
+    if report["install_mode_boots"]:
+        print(
+            f"[warn] {report['install_mode_boots']} boot(s) ran in install mode, which skips the integrity check; "
+            "build the ISO with GRUB_CFG_SRC=src/grub/grub-verified.cfg to time it"
+        )
+    if report["serial_hash_boots"]:
+        print(
+            f"[warn] {report['serial_hash_boots']} boot(s) loaded no integrity chunk map and hashed serially; "
+            "check that the ISO ships boot/integrity.chunks"
+        )
+    if not report["completed"]:
+        raise SystemExit(f"[error] No boot reached {args.until}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
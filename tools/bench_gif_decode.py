@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Benchmark GIF LZW decoding in generate_wallpaper.py.
+
+Builds a synthetic multi-frame GIF, then decodes it with the current
+table-driven ``_lzw_decode`` and with the original dictionary-of-bytes
+decoder it replaced, checking that both produce the same frames.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import generate_wallpaper
+
+
+def lzw_encode(indexes: bytes, min_code_size: int) -> bytes:
+    """Encode palette indexes as a GIF LZW stream, resetting when the table fills."""
+
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    out = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+    code_size = min_code_size + 1
+
+    def emit(code: int) -> None:
+        nonlocal bit_buffer, bit_count
+        bit_buffer |= code << bit_count
+        bit_count += code_size
+        while bit_count >= 8:
+            out.append(bit_buffer & 0xFF)
+            bit_buffer >>= 8
+            bit_count -= 8
+
+    def reset() -> dict[bytes, int]:
+        return {bytes([i]): i for i in range(clear_code)}
+
+    table = reset()
+    next_code = end_code + 1
+    emit(clear_code)
+    current = b""
+    for value in indexes:
+        candidate = current + bytes([value])
+        if candidate in table:
+            current = candidate
+            continue
+        emit(table[current])
+        if next_code < 4096:
+            table[candidate] = next_code
+            next_code += 1
+            if next_code > (1 << code_size) and code_size < 12:
+                code_size += 1
+        else:
+            emit(clear_code)
+            table = reset()
+            next_code = end_code + 1
+            code_size = min_code_size + 1
+        current = bytes([value])
+    if current:
+        emit(table[current])
+    emit(end_code)
+    if bit_count:
+        out.append(bit_buffer & 0xFF)
+    return bytes(out)
+
+
+def write_gif(path: Path, width: int, height: int, frames: Sequence[bytes], delay_cs: int = 4) -> None:
+    """Write full-canvas frames of 8-bit palette indexes with a grey-ramp palette."""
+
+    data = bytearray(b"GIF89a")
+    data += struct.pack("<HHBBB", width, height, 0xF7, 0, 0)
+    for i in range(256):
+        data += bytes((i, i, 255 - i))
+    for indexes in frames:
+        data += b"\x21\xf9\x04" + struct.pack("<BHB", 0x04, delay_cs, 0) + b"\x00"
+        data += b"\x2c" + struct.pack("<HHHHB", 0, 0, width, height, 0)
+        data.append(8)
+        compressed = lzw_encode(indexes, 8)
+        for start in range(0, len(compressed), 255):
+            chunk = compressed[start : start + 255]
+            data.append(len(chunk))
+            data += chunk
+        data.append(0)
+    data.append(0x3B)
+    path.write_bytes(bytes(data))
+
+
+def synthetic_frames(width: int, height: int, count: int, seed: int = 0) -> list[bytes]:
+    """Moving gradient bands with some noise, roughly like a photographic wallpaper."""
+
+    rng = random.Random(seed)
+    frames = []
+    for frame in range(count):
+        pixels = bytearray(width * height)
+        for y in range(height):
+            row = y * width
+            for x in range(width):
+                value = ((x + frame * 3) // 4 + (y // 8)) & 0xFF
+                if rng.random() < 0.05:
+                    value = rng.randrange(256)
+                pixels[row + x] = value
+        frames.append(bytes(pixels))
+    return frames
+
+
+def legacy_lzw_decode(min_code_size: int, data: bytes, expected_pixels: int) -> list[int]:
+    """The dictionary-of-bytes decoder that ``_lzw_decode`` replaced."""
+
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    code_size = min_code_size + 1
+    next_code = end_code + 1
+    max_code = 1 << code_size
+
+    dictionary = {i: bytes([i]) for i in range(clear_code)}
+
+    output: list[int] = []
+    bit_pos = 0
+    data_bits = len(data) * 8
+    prev_code: int | None = None
+
+    def read_code() -> int | None:
+        nonlocal bit_pos
+        if bit_pos + code_size > data_bits:
+            return None
+        raw = 0
+        for i in range(code_size):
+            byte_index = (bit_pos + i) // 8
+            bit_index = (bit_pos + i) % 8
+            raw |= ((data[byte_index] >> bit_index) & 1) << i
+        bit_pos += code_size
+        return raw
+
+    while True:
+        code = read_code()
+        if code is None:
+            break
+        if code == clear_code:
+            dictionary = {i: bytes([i]) for i in range(clear_code)}
+            code_size = min_code_size + 1
+            next_code = end_code + 1
+            max_code = 1 << code_size
+            prev_code = None
+            continue
+        if code == end_code:
+            break
+
+        if code in dictionary:
+            entry = dictionary[code]
+        elif prev_code is not None and code == next_code:
+            entry = dictionary[prev_code] + dictionary[prev_code][:1]
+        else:
+            raise generate_wallpaper.GifDecodeError("Invalid LZW code encountered")
+
+        output.extend(entry)
+
+        if prev_code is not None:
+            dictionary[next_code] = dictionary[prev_code] + entry[:1]
+            next_code += 1
+            if next_code >= max_code and code_size < 12:
+                code_size += 1
+                max_code = 1 << code_size
+
+        prev_code = code
+
+        if len(output) >= expected_pixels:
+            break
+
+    return output[:expected_pixels]
+
+
+def _time_decode(path: Path, decoder: Callable[[int, bytes, int], Sequence[int]], repeat: int) -> tuple[float, float, list]:
+    """Return (best total seconds, best seconds inside the decoder, frames)."""
+
+    original = generate_wallpaper._lzw_decode
+    spent = 0.0
+
+    def timed(min_code_size: int, data: bytes, expected_pixels: int) -> Sequence[int]:
+        nonlocal spent
+        start = time.perf_counter()
+        try:
+            return decoder(min_code_size, data, expected_pixels)
+        finally:
+            spent += time.perf_counter() - start
+
+    best_total = best_decode = float("inf")
+    frames: list = []
+    generate_wallpaper._lzw_decode = timed
+    try:
+        for _ in range(repeat):
+            spent = 0.0
+            start = time.perf_counter()
+            _, _, frames = generate_wallpaper._read_gif(path)
+            best_total = min(best_total, time.perf_counter() - start)
+            best_decode = min(best_decode, spent)
+    finally:
+        generate_wallpaper._lzw_decode = original
+    return best_total, best_decode, frames
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", type=Path, help="Benchmark an existing GIF instead of a synthetic one")
+    parser.add_argument("--size", default="640x360", help="Synthetic GIF dimensions (default: 640x360)")
+    parser.add_argument("--frames", type=int, default=8, help="Synthetic GIF frame count (default: 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per decoder; the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = args.input
+        if path is None:
+            try:
+                width, height = (int(part) for part in args.size.lower().split("x"))
+            except ValueError:
+                parser.error(f"Invalid --size {args.size!r}; expected WIDTHxHEIGHT")
+            path = Path(scratch) / "bench.gif"
+            write_gif(path, width, height, synthetic_frames(width, height, args.frames))
+
+        legacy_total, legacy_decode, legacy_frames = _time_decode(path, legacy_lzw_decode, args.repeat)
+        table_total, table_decode, table_frames = _time_decode(path, generate_wallpaper._lzw_decode, args.repeat)
+        size = path.stat().st_size
+
+    if legacy_frames != table_frames:
+        raise SystemExit("Decoders disagree on the decoded frames")
+
+    print(f"{path.name}: {len(table_frames)} frames, {size} bytes")
+    print(f"{'decoder':<8} {'lzw (s)':>9} {'read_gif (s)':>13}")
+    print(f"{'legacy':<8} {legacy_decode:>9.3f} {legacy_total:>13.3f}")
+    print(f"{'table':<8} {table_decode:>9.3f} {table_total:>13.3f}")
+    print(f"LZW speedup: {legacy_decode / table_decode:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
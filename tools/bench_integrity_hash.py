@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark serial versus chunked hashing of the boot images.
+
+Hashes the kernel's read-only segments and the initrd four ways: one
+serial SHA-256 per region (``computeSystemFingerprint()`` without a chunk
+map), the chunked Merkle tree on one thread and on ``--jobs`` threads, and
+the lazy case where only ``--touch`` of the chunks are verified against a
+precomputed leaf table. Uses build/kernel.elf and the ISO initrd when they
+exist, otherwise a synthetic image of ``--synthetic-mib``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+TOOLS = Path(__file__).resolve().parent
+ROOT = TOOLS.parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import build_chunk_merkle
+from build_integrity_manifest import merkle_levels
+
+DEFAULT_KERNEL = ROOT / "build" / "kernel.elf"
+DEFAULT_INITRD = ROOT / "build" / "isodir" / "boot" / "initrd.tar"
+
+
+def _best(repeat: int, run: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_regions(kernel: Path | None, initrd: Path | None, synthetic_mib: int) -> List[build_chunk_merkle.Region]:
+    regions: List[build_chunk_merkle.Region] = []
+    if kernel is not None and kernel.is_file():
+        regions += build_chunk_merkle.kernel_regions(kernel.read_bytes())
+    if initrd is not None and initrd.is_file():
+        regions.append(build_chunk_merkle.Region("initrd", build_chunk_merkle.KIND_INITRD, 0, initrd.read_bytes()))
+    if not regions:
+        data = random.Random(0).randbytes(synthetic_mib << 20)
+        regions.append(build_chunk_merkle.Region("synthetic", build_chunk_merkle.KIND_INITRD, 0, data))
+    return regions
+
+
+def lazy_verify(data: bytes, leaves: List[bytes], chunk_size: int, touched: List[int]) -> None:
+    """Check the leaf table against its root, then only the touched chunks."""
+
+    merkle_levels(leaves)
+    view = memoryview(data)
+    for index in touched:
+        if hashlib.sha256(view[index * chunk_size : (index + 1) * chunk_size]).digest() != leaves[index]:
+            raise SystemExit(f"Chunk {index} does not match its leaf")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kernel", type=Path, default=DEFAULT_KERNEL, help="Kernel ELF (default: build/kernel.elf)")
+    parser.add_argument("--initrd", type=Path, default=DEFAULT_INITRD, help="Packed initrd (default: the ISO's)")
+    parser.add_argument("--synthetic-mib", type=int, default=64, help="Synthetic image size when neither exists")
+    parser.add_argument("--chunk-size", type=int, default=build_chunk_merkle.DEFAULT_CHUNK_SIZE, help="Bytes per leaf")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Threads for the parallel run")
+    parser.add_argument("--touch", type=float, default=0.1, help="Fraction of chunks the lazy run verifies")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per strategy; the best is reported")
+    args = parser.parse_args()
+
+    if args.chunk_size <= 0 or args.chunk_size % 4096:
+        parser.error(f"--chunk-size must be a positive multiple of 4096 (got {args.chunk_size})")
+    if not 0.0 <= args.touch <= 1.0:
+        parser.error(f"--touch must be between 0 and 1 (got {args.touch})")
+
+    regions = load_regions(args.kernel, args.initrd, args.synthetic_mib)
+    total = sum(len(region.data) for region in regions)
+    print(f"{len(regions)} regions, {total} bytes, {args.chunk_size}-byte chunks, {args.jobs} threads")
+    print(f"{'region':<12} {'serial (s)':>10} {'chunked (s)':>11} {'parallel (s)':>12} {'lazy (s)':>9}")
+    sums = [0.0, 0.0, 0.0, 0.0]
+    for region in regions:
+        serial_root = build_chunk_merkle.chunk_tree(region, args.chunk_size).root
+        parallel_root = build_chunk_merkle.chunk_tree(region, args.chunk_size, args.jobs).root
+        if serial_root != parallel_root:
+            raise SystemExit(f"{region.name}: serial and parallel chunk roots differ")
+
+        leaves = build_chunk_merkle.chunk_leaves(region.data, args.chunk_size)
+        rng = random.Random(0)
+        touched = rng.sample(range(len(leaves)), max(1, round(len(leaves) * args.touch)) if args.touch else 0)
+        timings = [
+            _best(args.repeat, lambda: hashlib.sha256(region.data).digest()),
+            _best(args.repeat, lambda: build_chunk_merkle.chunk_tree(region, args.chunk_size)),
+            _best(args.repeat, lambda: build_chunk_merkle.chunk_tree(region, args.chunk_size, args.jobs)),
+            _best(args.repeat, lambda: lazy_verify(region.data, leaves, args.chunk_size, touched)),
+        ]
+        sums = [total_time + timing for total_time, timing in zip(sums, timings)]
+        print(f"{region.name:<12} {timings[0]:>10.4f} {timings[1]:>11.4f} {timings[2]:>12.4f} {timings[3]:>9.4f}")
+    print(f"{'total':<12} {sums[0]:>10.4f} {sums[1]:>11.4f} {sums[2]:>12.4f} {sums[3]:>9.4f}")
+    if sums[2] > 0:
+        print(f"Parallel speedup over serial: {sums[0] / sums[2]:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
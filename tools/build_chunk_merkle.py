@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Precompute chunk-level SHA-256 Merkle trees for the kernel and initrd.
+
+Without one, ``computeSystemFingerprint()`` hashes the kernel image and
+the initrd serially at boot. This tool splits each region into fixed-size
+chunks (64 KiB by default), hashes every chunk (leaf = SHA-256(chunk)) and
+folds the leaves with the manifest's node rule (node = SHA-256(0x01 ||
+left || right), unpaired nodes promoted). The result is a chunk map the
+kernel loads as a GRUB module: the fingerprint checks each leaf table
+against its region's root, and individual chunks are verified only where
+they are needed. A region may have at most ``MAX_LEAVES`` chunks.
+
+Regions:
+
+* kernel -- each read-only PT_LOAD segment of kernel.elf, as file bytes
+  at the segment's virtual address (writable data changes after boot)
+* initrd -- the packed initrd module, relative to the module start
+
+Map layout (little-endian; security/integrity.d mirrors it)::
+
+    header   magic "CHNKMAP1", u32 version, u32 chunk size, u32 region
+             count, u32 reserved
+    regions  per region: name[16], u32 kind, u32 leaf count, u64 base,
+             u64 length, u64 leaf table offset, root[32]
+    leaves   32-byte chunk hashes, one table per region
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+from build_integrity_manifest import merkle_levels
+
+MAP_MAGIC = b"CHNKMAP1"
+MAP_VERSION = 1
+MAP_HEADER = struct.Struct("<8sIIII")
+MAP_REGION = struct.Struct("<16sIIQQQ32s")
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_LEAVES = 4096  # security/integrity.d: chunkMapMaxLeaves
+
+KIND_KERNEL = 1  # base is a virtual address
+KIND_INITRD = 2  # base is an offset into the initrd module
+
+_ELF_HEADER = struct.Struct("<16sHHIQQQIHHHHHH")
+_ELF_PHDR = struct.Struct("<IIQQQQQQ")
+_PT_LOAD = 1
+_PF_W = 2
+
+
+@dataclass(frozen=True)
+class Region:
+    name: str
+    kind: int
+    base: int
+    data: bytes
+
+
+@dataclass(frozen=True)
+class ChunkTree:
+    region: Region
+    leaves: List[bytes]
+    root: bytes
+
+
+def kernel_regions(elf: bytes) -> List[Region]:
+    """Read-only, file-backed PT_LOAD segments of a 64-bit little-endian ELF."""
+
+    if elf[:4] != b"\x7fELF" or elf[4] != 2 or elf[5] != 1:
+        raise SystemExit("Kernel is not a 64-bit little-endian ELF")
+    header = _ELF_HEADER.unpack_from(elf, 0)
+    phoff, phentsize, phnum = header[5], header[9], header[10]
+    regions = []
+    for index in range(phnum):
+        p_type, p_flags, p_offset, p_vaddr, _, p_filesz, _, _ = _ELF_PHDR.unpack_from(elf, phoff + index * phentsize)
+        if p_type != _PT_LOAD or p_flags & _PF_W or not p_filesz:
+            continue
+        if p_offset + p_filesz > len(elf):
+            raise SystemExit(f"Kernel segment {index} runs past the end of the file")
+        regions.append(Region(f"kernel.{len(regions)}", KIND_KERNEL, p_vaddr, elf[p_offset : p_offset + p_filesz]))
+    if not regions:
+        raise SystemExit("Kernel has no read-only loadable segments")
+    return regions
+
+
+def chunk_leaves(data: bytes, chunk_size: int, jobs: int = 1) -> List[bytes]:
+    """SHA-256 of every chunk; hashlib releases the GIL, so threads scale."""
+
+    view = memoryview(data)
+    spans = [view[start : start + chunk_size] for start in range(0, len(data), chunk_size)] or [view[:0]]
+    if jobs <= 1:
+        return [hashlib.sha256(span).digest() for span in spans]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda span: hashlib.sha256(span).digest(), spans))
+
+
+def chunk_tree(region: Region, chunk_size: int, jobs: int = 1) -> ChunkTree:
+    leaves = chunk_leaves(region.data, chunk_size, jobs)
+    return ChunkTree(region, leaves, merkle_levels(leaves)[-1][0])
+
+
+def encode_map(trees: Sequence[ChunkTree], chunk_size: int) -> bytes:
+    offset = MAP_HEADER.size + MAP_REGION.size * len(trees)
+    table = bytearray()
+    for tree in trees:
+        name = tree.region.name.encode()
+        if len(name) > 16:
+            raise SystemExit(f"Region name {tree.region.name!r} is longer than 16 bytes")
+        if len(tree.leaves) > MAX_LEAVES:
+            raise SystemExit(
+                f"Region {tree.region.name!r} has {len(tree.leaves)} chunks; the kernel accepts at most "
+                f"{MAX_LEAVES} (use a larger --chunk-size)"
+            )
+        table += MAP_REGION.pack(
+            name, tree.region.kind, len(tree.leaves), tree.region.base, len(tree.region.data), offset, tree.root
+        )
+        offset += 32 * len(tree.leaves)
+    header = MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, chunk_size, len(trees), 0)
+    return header + bytes(table) + b"".join(leaf for tree in trees for leaf in tree.leaves)
+
+
+def decode_map(blob: bytes) -> tuple[int, List[tuple[str, int, int, int, List[bytes], bytes]]]:
+    """(chunk size, [(name, kind, base, length, leaves, root), ...])."""
+
+    magic, version, chunk_size, count, _ = MAP_HEADER.unpack_from(blob, 0)
+    if magic != MAP_MAGIC or version != MAP_VERSION:
+        raise ValueError("not a chunk map")
+    regions = []
+    for index in range(count):
+        name, kind, leaf_count, base, length, offset, root = MAP_REGION.unpack_from(
+            blob, MAP_HEADER.size + index * MAP_REGION.size
+        )
+        leaves = [blob[offset + i * 32 : offset + (i + 1) * 32] for i in range(leaf_count)]
+        regions.append((name.rstrip(b"\0").decode(), kind, base, length, leaves, root))
+    return chunk_size, regions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write chunked Merkle trees for the kernel and initrd")
+    parser.add_argument("--kernel", type=Path, help="Kernel ELF (its read-only segments are covered)")
+    parser.add_argument("--initrd", type=Path, help="Packed initrd module")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Chunk map to write")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes per leaf, a multiple of 4096 (default: 65536)"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Hashing threads")
+    args = parser.parse_args()
+
+    if args.chunk_size <= 0 or args.chunk_size % 4096:
+        raise SystemExit(f"--chunk-size must be a positive multiple of 4096 (got {args.chunk_size})")
+    if args.kernel is None and args.initrd is None:
+        raise SystemExit("Nothing to hash: pass --kernel and/or --initrd")
+
+    regions: List[Region] = []
+    if args.kernel is not None:
+        regions += kernel_regions(args.kernel.read_bytes())
+    if args.initrd is not None:
+        regions.append(Region("initrd", KIND_INITRD, 0, args.initrd.read_bytes()))
+    trees = [chunk_tree(region, args.chunk_size, args.jobs) for region in regions]
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    scratch = args.output.with_name(f".tmp.{args.output.name}")
+    scratch.write_bytes(encode_map(trees, args.chunk_size))
+    os.replace(scratch, args.output)
+    for tree in trees:
+        print(
+            f"[ok] {tree.region.name}: {len(tree.region.data)} bytes at {tree.region.base:#x}, "
+            f"{len(tree.leaves)} chunks, root {tree.root.hex()}"
+        )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
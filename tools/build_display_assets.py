@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Build every generated display asset listed in a manifest in one run.
+
+The manifest is TOML with one ``[[asset]]`` table per generated module:
+
+    string_import_dir = "src/anonymos"   # -J directory for .bin imports
+
+    [[asset]]
+    name = "wallpaper"
+    kind = "wallpaper"   # wallpaper | image | cursor | font
+    input = "cfwallpaper.gif"
+    output = "src/anonymos/display/generated_wallpaper.d"
+
+Wallpapers accept the generate_wallpaper.py options (``format``,
+``indexed``, ``target``, ``pixel_format``, ``dither``,
+``keyframe_interval``). Images (splash screens) and cursors are written as
+a .bin string import next to a metadata module whose symbols start with
+``symbol``; cursors also take ``hotspot_x``/``hotspot_y``. Fonts slice a
+glyph sheet into ``glyph_width`` x ``glyph_height`` cells, ``columns`` per
+row, starting at ``first_char``, and emit one byte mask per glyph row with
+the high bit on the left, like bitmap_font.d.
+
+Assets are decoded in a process pool with the PNG/GIF readers from
+generate_wallpaper.py. An asset is skipped when its input, its manifest
+entry and the generator sources hash the same as in the previous run and
+its outputs still exist.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import generate_wallpaper
+
+ROOT = TOOLS.parent
+DEFAULT_MANIFEST = ROOT / "display_assets.toml"
+DEFAULT_STATE = ROOT / "build" / "display_assets" / "state.json"
+ASSET_KINDS = ("wallpaper", "image", "cursor", "font")
+_SYMBOL = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+
+@dataclass(frozen=True)
+class Asset:
+    name: str
+    kind: str
+    input: Path
+    output: Path
+    options: dict[str, Any]
+
+
+def load_manifest(path: Path, root: Path) -> tuple[list[Asset], Path]:
+    """Return the manifest's assets and string import directory, resolved against ``root``."""
+
+    try:
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise SystemExit(f"Asset manifest not found: {path}") from None
+    except tomllib.TOMLDecodeError as exc:
+        raise SystemExit(f"Invalid asset manifest {path}: {exc}") from None
+
+    string_import_dir = root / data.get("string_import_dir", "src/anonymos")
+    assets: list[Asset] = []
+    seen: set[str] = set()
+    for index, entry in enumerate(data.get("asset", [])):
+        entry = dict(entry)
+        try:
+            name = entry.pop("name")
+            kind = entry.pop("kind")
+            source = entry.pop("input")
+            output = entry.pop("output")
+        except KeyError as exc:
+            raise SystemExit(f"Asset #{index + 1} in {path} is missing {exc.args[0]!r}") from None
+        if kind not in ASSET_KINDS:
+            raise SystemExit(f"Asset {name!r} has unknown kind {kind!r}; expected one of {', '.join(ASSET_KINDS)}")
+        if name in seen:
+            raise SystemExit(f"Asset {name!r} is listed more than once in {path}")
+        if kind in ("image", "cursor", "font") and not _SYMBOL.match(entry.get("symbol", "")):
+            raise SystemExit(f"Asset {name!r} needs a 'symbol' that is a valid D identifier")
+        seen.add(name)
+        assets.append(Asset(name, kind, root / source, root / output, entry))
+    return assets, string_import_dir
+
+
+def module_name(output: Path, string_import_dir: Path) -> str:
+    """Derive the D module name from the output path, e.g. anonymos.display.splash_image."""
+
+    relative = output.resolve().relative_to(string_import_dir.resolve().parent)
+    return ".".join(relative.with_suffix("").parts)
+
+
+def _write_blob_module(
+    asset: Asset, string_import_dir: Path, blob: bytes, declarations: list[str], blob_type: str
+) -> list[Path]:
+    """Write ``blob`` next to the output and a module that string-imports it."""
+
+    blob_path = asset.output.with_suffix(".bin")
+    import_name = generate_wallpaper._string_import_name(blob_path, string_import_dir)
+    symbol = asset.options["symbol"]
+    generate_wallpaper._write_atomic(blob_path, blob)
+    body = "\n".join(declarations)
+    generate_wallpaper._write_atomic(
+        asset.output,
+        f"""// Auto-generated by tools/build_display_assets.py. Do not edit by hand.
+module {module_name(asset.output, string_import_dir)};
+
+nothrow:
+@nogc:
+
+{body}
+
+align(16) immutable ubyte[{len(blob)}] {symbol}{blob_type} =
+    cast(immutable(ubyte)[]) import("{import_name}");
+"""
+    )
+    return [asset.output, blob_path]
+
+
+def _build_wallpaper(asset: Asset, string_import_dir: Path) -> list[Path]:
+    options = asset.options
+    width, height, frames = generate_wallpaper._read_image(asset.input)
+    frames = generate_wallpaper._merge_repeated_frames(frames)
+    fmt = options.get("format", "bin")
+    if fmt == "d":
+        generate_wallpaper._write_d_module(asset.output, width, height, frames)
+        return [asset.output]
+    if fmt == "delta":
+        blob = generate_wallpaper._write_delta_asset(
+            asset.output, string_import_dir, width, height, frames, options.get("keyframe_interval", 0)
+        )
+        return [asset.output, blob]
+
+    targets = [mode for text in options.get("target", []) for mode in generate_wallpaper._parse_modes(text)]
+    blob = generate_wallpaper._write_binary_asset(
+        asset.output,
+        string_import_dir,
+        width,
+        height,
+        frames,
+        options.get("indexed", False),
+        targets,
+        options.get("pixel_format", "xrgb8888"),
+        options.get("dither", False),
+    )
+    stem = asset.output.stem
+    return [asset.output, blob] + [asset.output.with_name(f"{stem}_{w}x{h}.bin") for w, h in targets]
+
+
+def _build_image(asset: Asset, string_import_dir: Path) -> list[Path]:
+    width, height, frames = generate_wallpaper._read_image(asset.input)
+    frame = next(iter(frames))
+    symbol = asset.options["symbol"]
+    declarations = [
+        f"enum uint {symbol}Width  = {width};",
+        f"enum uint {symbol}Height = {height};",
+        "",
+        "// Little-endian ARGB32 words, row-major.",
+    ]
+    blob = bytes(generate_wallpaper._little_endian_words(frame.pixels))
+    return _write_blob_module(asset, string_import_dir, blob, declarations, "PixelData")
+
+
+def _build_cursor(asset: Asset, string_import_dir: Path) -> list[Path]:
+    width, height, frames = generate_wallpaper._read_image(asset.input)
+    frames = list(generate_wallpaper._merge_repeated_frames(frames))
+    options = asset.options
+    symbol = options["symbol"]
+    hotspot_x = options.get("hotspot_x", 0)
+    hotspot_y = options.get("hotspot_y", 0)
+    if not (0 <= hotspot_x < width and 0 <= hotspot_y < height):
+        raise ValueError(f"hotspot ({hotspot_x}, {hotspot_y}) lies outside the {width}x{height} cursor")
+    # A single frame is static; CursorFrame uses a zero delay for that.
+    delays = [frame.duration_ms for frame in frames] if len(frames) > 1 else [0]
+    declarations = [
+        f"enum uint {symbol}Width  = {width};",
+        f"enum uint {symbol}Height = {height};",
+        f"enum uint {symbol}HotspotX = {hotspot_x};",
+        f"enum uint {symbol}HotspotY = {hotspot_y};",
+        f"enum uint {symbol}FrameCount = {len(frames)};",
+        f"enum uint[] {symbol}FrameDelays = [{', '.join(map(str, delays))}];",
+        "",
+        "// Frames back to back as little-endian ARGB32 words, for CursorFrame.pixels.",
+    ]
+    blob = b"".join(generate_wallpaper._little_endian_words(frame.pixels) for frame in frames)
+    return _write_blob_module(asset, string_import_dir, blob, declarations, "PixelData")
+
+
+def _build_font(asset: Asset, string_import_dir: Path) -> list[Path]:
+    options = asset.options
+    glyph_w = options.get("glyph_width", 8)
+    glyph_h = options.get("glyph_height", 8)
+    columns = options.get("columns", 16)
+    first_char = options.get("first_char", 0)
+    symbol = options["symbol"]
+    if not 1 <= glyph_w <= 8:
+        raise ValueError(f"glyph_width must be between 1 and 8 (got {glyph_w})")
+
+    width, height, frames = generate_wallpaper._read_image(asset.input)
+    pixels = next(iter(frames)).pixels
+    words = struct.unpack(f">{width * height}I", pixels)
+    rows = height // glyph_h
+    count = options.get("count", columns * rows)
+    if columns * glyph_w > width or count > columns * rows:
+        raise ValueError(f"{count} glyphs of {glyph_w}x{glyph_h} in {columns} columns do not fit {width}x{height}")
+
+    def lit(word: int) -> bool:
+        # Opaque, light pixels are ink; the rest is background.
+        alpha, red, green, blue = word >> 24, (word >> 16) & 0xFF, (word >> 8) & 0xFF, word & 0xFF
+        return alpha >= 0x80 and red + green + blue >= 3 * 0x80
+
+    glyph_lines = []
+    for glyph in range(count):
+        left = (glyph % columns) * glyph_w
+        top = (glyph // columns) * glyph_h
+        masks = []
+        for y in range(top, top + glyph_h):
+            mask = 0
+            for x in range(glyph_w):
+                if lit(words[y * width + left + x]):
+                    mask |= 0x80 >> x
+            masks.append(f"0x{mask:02X}")
+        glyph_lines.append(f"    [{', '.join(masks)}], // {first_char + glyph}")
+    glyphs = "\n".join(glyph_lines)
+
+    asset.output.write_text(
+        f"""// Auto-generated by tools/build_display_assets.py. Do not edit by hand.
+module {module_name(asset.output, string_import_dir)};
+
+nothrow:
+@nogc:
+
+enum uint {symbol}GlyphWidth  = {glyph_w};
+enum uint {symbol}GlyphHeight = {glyph_h};
+enum uint {symbol}FirstChar = {first_char};
+
+// One byte mask per glyph row; the high bit is the left-most pixel.
+immutable ubyte[{glyph_h}][{count}] {symbol}Glyphs = [
+{glyphs}
+];
+"""
+    )
+    return [asset.output]
+
+
+_BUILDERS = {
+    "wallpaper": _build_wallpaper,
+    "image": _build_image,
+    "cursor": _build_cursor,
+    "font": _build_font,
+}
+
+
+def build_asset(asset: Asset, string_import_dir: Path) -> list[Path]:
+    """Decode one asset and write its outputs; runs in a worker process."""
+
+    asset.output.parent.mkdir(parents=True, exist_ok=True)
+    return _BUILDERS[asset.kind](asset, string_import_dir)
+
+
+def _generator_digest() -> str:
+    digest = hashlib.sha256()
+    for source in (Path(generate_wallpaper.__file__), Path(__file__)):
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def asset_key(asset: Asset, string_import_dir: Path, generator: str) -> str:
+    """Content hash of everything that determines an asset's outputs."""
+
+    digest = hashlib.sha256()
+    digest.update(generator.encode())
+    entry = {
+        "kind": asset.kind,
+        "output": str(asset.output),
+        "string_import_dir": str(string_import_dir),
+        "options": asset.options,
+    }
+    digest.update(json.dumps(entry, sort_keys=True).encode())
+    digest.update(asset.input.read_bytes())
+    return digest.hexdigest()
+
+
+def _load_state(path: Path) -> dict[str, Any]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def build_assets(
+    assets: list[Asset],
+    string_import_dir: Path,
+    state_path: Path,
+    jobs: int | None = None,
+    force: bool = False,
+) -> dict[str, list[Path]]:
+    """Build stale assets in a process pool and return every asset's outputs."""
+
+    state = _load_state(state_path)
+    generator = _generator_digest()
+    outputs: dict[str, list[Path]] = {}
+    pending: list[tuple[Asset, str]] = []
+    failed: list[str] = []
+
+    for asset in assets:
+        try:
+            key = asset_key(asset, string_import_dir, generator)
+        except OSError as exc:
+            print(f"[fail] {asset.name}: cannot read {asset.input}: {exc.strerror}")
+            failed.append(asset.name)
+            continue
+        previous = state.get(asset.name, {})
+        recorded = [Path(path) for path in previous.get("outputs", [])]
+        if not force and previous.get("key") == key and recorded and all(path.exists() for path in recorded):
+            print(f"[cached] {asset.name}")
+            outputs[asset.name] = recorded
+        else:
+            pending.append((asset, key))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [(asset, key, pool.submit(build_asset, asset, string_import_dir)) for asset, key in pending]
+            for asset, key, future in futures:
+                try:
+                    written = future.result()
+                except (OSError, RuntimeError, ValueError, argparse.ArgumentTypeError) as exc:
+                    print(f"[fail] {asset.name}: {exc}")
+                    failed.append(asset.name)
+                    state.pop(asset.name, None)
+                    continue
+                print(f"[build] {asset.name} -> {', '.join(path.name for path in written)}")
+                outputs[asset.name] = written
+                state[asset.name] = {"key": key, "outputs": [str(path) for path in written]}
+
+    # Forget assets that left the manifest so a later re-add rebuilds them.
+    names = {asset.name for asset in assets}
+    state = {name: entry for name, entry in state.items() if name in names}
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_name(f".{state_path.name}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, state_path)
+
+    if failed:
+        raise SystemExit(f"[error] Failed to build: {', '.join(failed)}")
+    return outputs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build display assets (wallpaper, splash, cursors, fonts)")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST, help="Asset manifest (TOML)")
+    parser.add_argument("--root", type=Path, default=ROOT, help="Directory manifest paths are relative to")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE, help="Where to record content hashes")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every asset even if unchanged")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Build only the named assets")
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        raise SystemExit(f"--jobs must be at least 1 (got {args.jobs})")
+
+    root = args.root.resolve()
+    assets, string_import_dir = load_manifest(args.manifest, root)
+    if args.only:
+        unknown = set(args.only) - {asset.name for asset in assets}
+        if unknown:
+            raise SystemExit(f"Unknown asset(s): {', '.join(sorted(unknown))}")
+        assets = [asset for asset in assets if asset.name in args.only]
+    if not assets:
+        print("[warn] No assets listed; nothing to do")
+        return 0
+
+    outputs = build_assets(assets, string_import_dir, args.state, args.jobs, args.force)
+    print(f"[ok] {len(outputs)} display asset(s) up to date")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
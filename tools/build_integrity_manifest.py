@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Write the integrity manifest.json for an initrd staging tree.
+
+Every regular file that ``pack_initrd.py`` would pack becomes a leaf of a
+SHA-256 Merkle tree, in the packer's (byte-sorted path) order:
+
+    leaf = SHA-256(0x00 || u32be(len(path)) || path || SHA-256(file))
+    node = SHA-256(0x01 || left || right)
+
+A node without a sibling is promoted to the next level unchanged. Each
+file entry carries its leaf index and the sibling hashes from leaf to
+root, so the kernel (security/integrity.d: verifyMerkleProof) can check
+the files it actually touches against the root without rehashing the
+whole initrd. The manifest itself is written into the staging tree and
+left out of the leaves.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import pack_initrd
+
+MANIFEST_FORMAT = "anonymos-integrity-manifest"
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_PATH = "etc/integrity/manifest.json"
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def file_digest(path: Path) -> bytes:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def leaf_hash(path: str, digest: bytes) -> bytes:
+    name = path.encode()
+    return hashlib.sha256(LEAF_PREFIX + len(name).to_bytes(4, "big") + name + digest).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(leaves: Sequence[bytes]) -> List[List[bytes]]:
+    """All tree levels, leaves first; the last level holds the root alone."""
+
+    if not leaves:
+        return [[hashlib.sha256(b"").digest()]]
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        below = levels[-1]
+        above = [node_hash(below[i], below[i + 1]) for i in range(0, len(below) - 1, 2)]
+        if len(below) % 2:
+            above.append(below[-1])
+        levels.append(above)
+    return levels
+
+
+def merkle_proof(levels: Sequence[Sequence[bytes]], index: int) -> List[bytes]:
+    """Sibling hashes from leaf ``index`` up to the root (promotions contribute none)."""
+
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, index: int, count: int, proof: Sequence[bytes], root: bytes) -> bool:
+    """Reference for the kernel's verifyMerkleProof: fold ``proof`` into ``leaf``."""
+
+    if not 0 <= index < count:
+        return False
+    current = leaf
+    remaining = list(proof)
+    width = count
+    while width > 1:
+        if index % 2:
+            if not remaining:
+                return False
+            current = node_hash(remaining.pop(0), current)
+        elif index + 1 < width:
+            if not remaining:
+                return False
+            current = node_hash(current, remaining.pop(0))
+        index //= 2
+        width = (width + 1) // 2
+    return not remaining and current == root
+
+
+def build_manifest(root: Path, excludes: Sequence[str] = (), manifest_path: str = DEFAULT_MANIFEST_PATH) -> Dict:
+    if not root.is_dir():
+        raise SystemExit(f"Initrd source directory not found: {root}")
+    members = [
+        member
+        for member in pack_initrd.collect_members(root, excludes)
+        if member.kind == "file" and member.path != manifest_path
+    ]
+    digests = [file_digest(member.source) for member in members]
+    levels = merkle_levels([leaf_hash(member.path, digest) for member, digest in zip(members, digests)])
+    files = [
+        {
+            "path": member.path,
+            "size": member.size,
+            "sha256": digest.hex(),
+            "index": index,
+            "proof": [sibling.hex() for sibling in merkle_proof(levels, index)],
+        }
+        for index, (member, digest) in enumerate(zip(members, digests))
+    ]
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "hash": "sha256",
+        "leaf": "sha256(00 || u32be(len(path)) || path || sha256(file))",
+        "node": "sha256(01 || left || right); unpaired nodes are promoted",
+        "merkle_root": levels[-1][0].hex(),
+        "file_count": len(files),
+        "files": files,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write the Merkle integrity manifest for an initrd staging tree")
+    parser.add_argument("source", type=Path, help="Initrd staging directory")
+    parser.add_argument(
+        "--manifest-path",
+        default=DEFAULT_MANIFEST_PATH,
+        help=f"Where the manifest goes inside the staging tree (default: {DEFAULT_MANIFEST_PATH})",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Relative path or glob the initrd will leave out (same as pack_initrd.py --exclude)",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Also write the manifest here (e.g. next to the ISO)")
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.source, args.exclude, args.manifest_path)
+    text = json.dumps(manifest, indent=2) + "\n"
+    for target in filter(None, [args.source / args.manifest_path, args.output]):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        scratch = target.with_name(f".tmp.{target.name}")
+        scratch.write_text(text, encoding="utf-8")
+        os.replace(scratch, target)
+    print(f"[ok] {manifest['file_count']} files, Merkle root {manifest['merkle_root']}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Compile the kernel's D sources incrementally and in parallel.
+
+scripts/buildscript.sh hands this driver its KERNEL_SOURCES list. Each
+source is compiled to ``<out-dir>/<basename>.o`` with ``-deps``, and the
+files ldc2 reports there -- every module it imported, transitively, plus
+string-imported files -- are recorded together with the compile command.
+On the next run a source is only recompiled if its command changed, its
+object is missing or one of those recorded files changed. The object list
+is written (in source order) for the existing link step with linker.ld.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Sequence
+
+# Every "(path)" group in a -deps line names a file the module was built from.
+_DEPS_PATH = re.compile(r"\(([^()]+)\)")
+STATE_NAME = "state.json"
+
+
+@dataclass(frozen=True)
+class KernelUnit:
+    source: Path
+    object: Path
+    deps_file: Path
+    command: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class CompileOutcome:
+    unit: KernelUnit
+    returncode: int
+    log: str
+    elapsed: float
+    cached: bool = False
+    dependencies: dict[str, list] | None = None
+
+
+def plan_units(
+    dc: str, target: str, dflags: Sequence[str], sources: Sequence[Path], out_dir: Path, deps_dir: Path
+) -> List[KernelUnit]:
+    """Build one unit per source with the flags buildscript.sh used in its serial loop."""
+
+    units: List[KernelUnit] = []
+    seen: dict[str, Path] = {}
+    for source in sources:
+        base = source.with_suffix("").name
+        if base in seen:
+            raise SystemExit(f"{source} and {seen[base]} would both compile to {base}.o")
+        seen[base] = source
+        obj = out_dir / f"{base}.o"
+        command = (
+            dc, "-I.", "-Isrc", "-J.", "-Jsrc/anonymos", f"-mtriple={target}", "-betterC", *dflags,
+            "-c", str(source), f"-of={obj}",
+        )  # fmt: skip
+        units.append(KernelUnit(source, obj, deps_dir / f"{base}.deps", command))
+    return units
+
+
+def parse_deps(text: str) -> set[str]:
+    """Collect file paths from ldc2 ``-deps`` output (imports and string imports)."""
+
+    paths: set[str] = set()
+    for line in text.splitlines():
+        for match in _DEPS_PATH.finditer(line):
+            paths.add(match.group(1))
+    return paths
+
+
+def _fingerprint(path: Path) -> list | None:
+    try:
+        stat = path.stat()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, digest]
+
+
+def _dependency_changed(path: str, recorded: list) -> bool:
+    """Compare against the recorded fingerprint, hashing only when mtime or size moved."""
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return True
+    if [stat.st_mtime_ns, stat.st_size] == recorded[:2]:
+        return False
+    current = _fingerprint(Path(path))
+    return current is None or current[2] != recorded[2]
+
+
+def is_up_to_date(unit: KernelUnit, entry: dict[str, Any] | None) -> bool:
+    if not entry or entry.get("command") != list(unit.command) or not unit.object.is_file():
+        return False
+    dependencies = entry.get("dependencies") or {}
+    if str(unit.source) not in dependencies:
+        return False
+    return not any(_dependency_changed(path, recorded) for path, recorded in dependencies.items())
+
+
+def compile_unit(unit: KernelUnit) -> CompileOutcome:
+    started = time.monotonic()
+    unit.object.parent.mkdir(parents=True, exist_ok=True)
+    unit.deps_file.parent.mkdir(parents=True, exist_ok=True)
+    unit.deps_file.unlink(missing_ok=True)
+    # Snapshot inputs before compiling so an edit made mid-compile is seen
+    # as a change next time rather than being recorded as already built.
+    sources = {str(unit.source): _fingerprint(unit.source)}
+    completed = subprocess.run(
+        [*unit.command, f"-deps={unit.deps_file}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    elapsed = time.monotonic() - started
+    if completed.returncode != 0:
+        return CompileOutcome(unit, completed.returncode, completed.stdout or "", elapsed)
+
+    try:
+        deps_text = unit.deps_file.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        deps_text = ""
+    dependencies = dict(sources)
+    for path in sorted(parse_deps(deps_text)):
+        if path not in dependencies:
+            fingerprint = _fingerprint(Path(path))
+            if fingerprint is not None:
+                dependencies[path] = fingerprint
+    if dependencies[str(unit.source)] is None:
+        dependencies.pop(str(unit.source))
+    return CompileOutcome(unit, 0, completed.stdout or "", elapsed, dependencies=dependencies)
+
+
+def _load_state(path: Path) -> dict[str, Any]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scratch = path.with_name(f".tmp.{path.name}")
+    scratch.write_text(text, encoding="utf-8")
+    os.replace(scratch, path)
+
+
+def report_outcome(outcome: CompileOutcome) -> None:
+    if outcome.cached:
+        print(f"[cached] {outcome.unit.source}")
+    else:
+        status = "build" if outcome.returncode == 0 else "fail"
+        print(f"[{status}] {outcome.unit.source} -> {outcome.unit.object} ({outcome.elapsed:.1f}s)")
+    if outcome.log:
+        sys.stdout.write(outcome.log if outcome.log.endswith("\n") else outcome.log + "\n")
+    sys.stdout.flush()
+
+
+def build_kernel_objects(
+    units: Sequence[KernelUnit], state_path: Path, jobs: int | None = None, force: bool = False
+) -> List[Path]:
+    """Compile stale units concurrently, reporting in source order; returns every object."""
+
+    state = {} if force else _load_state(state_path)
+    failures: List[Path] = []
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        pending: List[tuple[KernelUnit, Future[CompileOutcome] | None]] = []
+        for unit in units:
+            if is_up_to_date(unit, state.get(str(unit.source))):
+                pending.append((unit, None))
+            else:
+                pending.append((unit, pool.submit(compile_unit, unit)))
+        for unit, future in pending:
+            if future is None:
+                report_outcome(CompileOutcome(unit, 0, "", 0.0, cached=True))
+                continue
+            outcome = future.result()
+            report_outcome(outcome)
+            if outcome.returncode != 0:
+                failures.append(unit.source)
+                state.pop(str(unit.source), None)
+                continue
+            state[str(unit.source)] = {"command": list(unit.command), "dependencies": outcome.dependencies}
+
+    live = {str(unit.source) for unit in units}
+    _write_atomic(state_path, json.dumps({k: v for k, v in state.items() if k in live}, indent=1, sort_keys=True))
+    if failures:
+        raise SystemExit(f"[error] Failed to compile: {', '.join(map(str, failures))}")
+    return [unit.object for unit in units]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incrementally compile the kernel's D sources")
+    parser.add_argument("sources", nargs="+", type=Path, help="Kernel D sources, in link order")
+    parser.add_argument("--dc", default=os.environ.get("KERNEL_DC", "ldc2"), help="D compiler (default: ldc2)")
+    parser.add_argument("--target", default="x86_64-unknown-linux-gnu", help="Target triple passed as -mtriple")
+    parser.add_argument("--dflags", default="", help="Extra compiler flags as one shell-quoted string")
+    parser.add_argument("--out-dir", type=Path, default=Path("build"), help="Directory for the objects")
+    parser.add_argument(
+        "--objects-file",
+        type=Path,
+        help="Write the object paths here, one per line, for the link step",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Parallel compiles (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Recompile every source")
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        raise SystemExit(f"--jobs must be at least 1 (got {args.jobs})")
+    missing = [str(source) for source in args.sources if not source.is_file()]
+    if missing:
+        raise SystemExit(f"Kernel source(s) not found: {', '.join(missing)}")
+
+    deps_dir = args.out_dir / "kernel-deps"
+    units = plan_units(args.dc, args.target, shlex.split(args.dflags), args.sources, args.out_dir, deps_dir)
+    objects = build_kernel_objects(units, deps_dir / STATE_NAME, args.jobs, args.force)
+    if args.objects_file is not None:
+        _write_atomic(args.objects_file, "".join(f"{obj}\n" for obj in objects))
+    print(f"[ok] {len(objects)} kernel object(s) up to date")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
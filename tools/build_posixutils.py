@@ -3,20 +3,27 @@
 
 This script scans src/minimal_os/posixutils for translated utilities and
 compiles each subdirectory that contains D sources into a standalone binary.
-By default the artifacts are placed under build/posixutils/bin so that the
+Utilities are compiled concurrently (see --jobs) but reported in a stable
+order. By default the artifacts are placed under build/posixutils/bin so that the
 kernel can extend PATH when launching the interactive shell.
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import os
+import re
 import shlex
 import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Callable, Collection, Iterable, List, Sequence
 
 
 @dataclass(frozen=True)
@@ -26,6 +33,26 @@ class BuildResult:
     output: Path
 
 
+@dataclass(frozen=True)
+class CompileJob:
+    name: str
+    sources: Sequence[Path]
+    output: Path
+    flags: Sequence[str]
+    libraries: Sequence[Path] = ()
+
+
+@dataclass(frozen=True)
+class CompileOutcome:
+    job: CompileJob
+    returncode: int
+    log: str
+    elapsed: float
+    cached: bool = False
+    peak_rss_kib: int = 0
+    binary_bytes: int = 0
+
+
 def repo_root_from(start: Path | None = None) -> Path:
     if start is None:
         return Path(__file__).resolve().parents[1]
@@ -80,40 +107,95 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Directory containing the POSIX utility D sources",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of utilities to compile concurrently (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory for cached binaries (default: <output>/../cache)",
+    )
+    parser.add_argument(
+        "--no-helper-lib",
+        action="store_true",
+        help="Do not precompile the shared helper directories into a static library",
+    )
+    parser.add_argument(
+        "--multicall",
+        action="store_true",
+        help="Link every utility into one binary that dispatches on argv[0]",
+    )
+    parser.add_argument(
+        "--report",
+        nargs="?",
+        const=10,
+        type=int,
+        metavar="N",
+        help="Print the N slowest/largest utilities and the change since the last build (default N: 10)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay resident and rebuild the affected utilities whenever a source changes",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between scans when inotify is unavailable (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always recompile instead of restoring unchanged utilities from the cache",
+    )
     return parser.parse_args()
 
 
+# Whitespace, // line comments and /* block comments */ ahead of the first token.
+_LEADING_TRIVIA = re.compile(r"(?:[\r\n\t \f\v]+|//[^\n]*\n|/\*.*?\*/)*", re.DOTALL)
+
+# Bytes read up front when classifying a source; doubled until the first
+# token is found, which in practice means a single read per file.
+SOURCE_PREFIX_BYTES = 4096
+
+
+def _first_significant(text: str, complete: bool) -> str | None:
+    """Return the first character after leading comments, "" if there is none.
+
+    None means ``text`` is a truncated prefix and more input is required.
+    """
+
+    rest = text[_LEADING_TRIVIA.match(text).end() :]
+    if rest and not rest.startswith(("//", "/*")) and (complete or rest != "/"):
+        return rest[0]
+    return "" if complete else None
+
+
 def first_non_comment_char(text: str) -> str | None:
-    i = 0
-    length = len(text)
-    while i < length:
-        ch = text[i]
-        if ch in "\r\n\t \f\v":
-            i += 1
-            continue
-        if text.startswith("//", i):
-            newline = text.find("\n", i + 2)
-            if newline == -1:
-                return None
-            i = newline + 1
-            continue
-        if text.startswith("/*", i):
-            end = text.find("*/", i + 2)
-            if end == -1:
-                return None
-            i = end + 2
-            continue
-        return text[i]
-    return None
+    return _first_significant(text, complete=True) or None
 
 
 def is_d_source(path: Path) -> bool:
     try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
+        with path.open("rb") as handle:
+            data = b""
+            request = SOURCE_PREFIX_BYTES
+            while True:
+                chunk = handle.read(request)
+                data += chunk
+                complete = len(chunk) < request
+                first = _first_significant(data.decode("utf-8", errors="ignore"), complete)
+                if first is not None:
+                    break
+                request *= 2
     except OSError:
         return False
-    first = first_non_comment_char(text)
-    if first is None:
+    if not first:
         return False
     if first == "#":
         # Original C sources keep their .d extension but rely on preprocessor
@@ -122,6 +204,48 @@ def is_d_source(path: Path) -> bool:
     return True
 
 
+class SourceIndex:
+    """Persistent is_d_source() verdicts keyed by (path, mtime, size).
+
+    Discovering commands in an unchanged tree then costs one stat() per file
+    instead of reading every source.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, list] = {}
+        self._dirty = False
+        try:
+            loaded = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(loaded, dict):
+            self._entries = loaded
+
+    def is_d_source(self, src: Path) -> bool:
+        try:
+            st = src.stat()
+        except OSError:
+            return False
+        key = os.fspath(src)
+        entry = self._entries.get(key)
+        if entry is not None and entry[:2] == [st.st_mtime_ns, st.st_size]:
+            return bool(entry[2])
+        verdict = is_d_source(src)
+        self._entries[key] = [st.st_mtime_ns, st.st_size, verdict]
+        self._dirty = True
+        return verdict
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._entries, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
 def ensure_compiler_available(dc: str) -> None:
     if shutil.which(dc) is None:
         raise SystemExit(f"D compiler '{dc}' not found in PATH")
@@ -164,22 +288,69 @@ def adjust_flags_for_compiler(flags: Sequence[str], dc: str) -> List[str]:
     return adjusted
 
 
-def compile_command(dc: str, flags: Sequence[str], sources: Sequence[Path], output: Path) -> None:
+def string_import_dirs(sources: Sequence[Path]) -> List[Path]:
+    return sorted({src.parent for src in sources})
+
+
+def compile_command(
+    dc: str,
+    flags: Sequence[str],
+    sources: Sequence[Path],
+    output: Path,
+    libraries: Sequence[Path] = (),
+) -> tuple[subprocess.CompletedProcess[str], int]:
+    """Compile a single utility, capturing the compiler output for later replay.
+
+    Returns the completed process and the compiler's peak RSS in KiB.
+    """
+
     output.parent.mkdir(parents=True, exist_ok=True)
     cmd: List[str] = [dc]
     cmd.extend(str(src) for src in sources)
+    cmd.extend(str(lib) for lib in libraries)
     cmd.extend(adjust_flags_for_compiler(flags, dc))
-    string_import_dirs = {src.parent for src in sources}
-    for import_dir in sorted(string_import_dirs):
+    for import_dir in string_import_dirs(sources):
         cmd.append(f"-J{os.fspath(import_dir)}")
-    cmd.append(f"-of={output}")
-    subprocess.run(cmd, check=True)
-    try:
-        mode = output.stat().st_mode
-        output.chmod(mode | 0o111)
-    except FileNotFoundError:
-        # Some compilers may emit into a slightly different path on failure.
-        pass
+    # Link into a scratch name and rename over the real output afterwards:
+    # the previous binary may be hard-linked into the build cache, and
+    # anything staging bin/ concurrently must never see a half-written file.
+    scratch = output.with_name(f".tmp.{output.name}")
+    cmd.append(f"-of={scratch}")
+    completed, peak_rss_kib = run_measured(cmd)
+    if completed.returncode == 0:
+        try:
+            if "-lib" not in flags:
+                mode = scratch.stat().st_mode
+                scratch.chmod(mode | 0o111)
+            os.replace(scratch, output)
+        except FileNotFoundError:
+            # Some compilers may emit into a slightly different path on failure.
+            pass
+    else:
+        try:
+            scratch.unlink()
+        except FileNotFoundError:
+            pass
+    return completed, peak_rss_kib
+
+
+def run_measured(cmd: Sequence[str]) -> tuple[subprocess.CompletedProcess[str], int]:
+    """Run ``cmd`` to completion and report its peak RSS (KiB, 0 if unknown)."""
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert proc.stdout is not None
+    with proc.stdout:
+        output = proc.stdout.read()
+    if hasattr(os, "wait4"):
+        # wait4 reaps the compiler together with its rusage; ru_maxrss also
+        # covers the linker it waited for.
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        peak_rss_kib = usage.ru_maxrss
+    else:
+        proc.wait()
+        peak_rss_kib = 0
+    return subprocess.CompletedProcess(list(cmd), proc.returncode, output, None), peak_rss_kib
 
 
 # Some directories under src/minimal_os/posixutils export helper libraries that
@@ -189,7 +360,9 @@ def compile_command(dc: str, flags: Sequence[str], sources: Sequence[Path], outp
 NON_COMMAND_DIRECTORIES = {"process", "api"}
 
 
-def discover_commands(source_root: Path) -> Iterable[tuple[str, List[Path]]]:
+def discover_commands(
+    source_root: Path, classify: Callable[[Path], bool] = is_d_source
+) -> Iterable[tuple[str, List[Path]]]:
     commands_root = source_root / "commands"
     search_root = commands_root if commands_root.is_dir() else source_root
 
@@ -198,15 +371,181 @@ def discover_commands(source_root: Path) -> Iterable[tuple[str, List[Path]]]:
             continue
         if entry.name in NON_COMMAND_DIRECTORIES:
             continue
-        sources = [src for src in sorted(entry.glob("*.d")) if is_d_source(src)]
+        sources = [src for src in sorted(entry.glob("*.d")) if classify(src)]
         if not sources:
             continue
         yield entry.name, sources
 
 
+HELPER_LIBRARY_NAME = "libposixutils_helpers.a"
+
+
+def discover_helper_sources(
+    source_root: Path, classify: Callable[[Path], bool] = is_d_source
+) -> List[Path]:
+    """Collect the D sources of every NON_COMMAND_DIRECTORIES helper tree."""
+
+    candidates = []
+    for parent in (source_root, source_root / "commands"):
+        for name in sorted(NON_COMMAND_DIRECTORIES):
+            helper_dir = parent / name
+            if helper_dir.is_dir():
+                candidates.extend(sorted(helper_dir.rglob("*.d")))
+    seen: set[Path] = set()
+    sources: List[Path] = []
+    for src in candidates:
+        if src in seen or not classify(src):
+            continue
+        seen.add(src)
+        sources.append(src)
+    return sources
+
+
+def plan_helper_library(
+    flags: Sequence[str],
+    source_root: Path,
+    lib_dir: Path,
+    classify: Callable[[Path], bool] = is_d_source,
+) -> CompileJob | None:
+    sources = discover_helper_sources(source_root, classify)
+    if not sources:
+        return None
+    return CompileJob(HELPER_LIBRARY_NAME, tuple(sources), lib_dir / HELPER_LIBRARY_NAME, (*flags, "-lib"))
+
+
+_MODULE_DECLARATION = re.compile(r"^\s*module\s+([\w.]+)\s*;", re.MULTILINE)
+_IMPORT_STATEMENT = re.compile(r"\bimport\s+([\w.\s,=]+?)\s*[:;]")
+
+
+def declared_modules(sources: Sequence[Path]) -> frozenset[str]:
+    """Module names of ``sources`` (the file stem when there is no declaration)."""
+
+    names = set()
+    for src in sources:
+        declared = _MODULE_DECLARATION.search(src.read_text(encoding="utf-8", errors="replace"))
+        names.add(declared.group(1) if declared else src.stem)
+    return frozenset(names)
+
+
+def imported_modules(sources: Sequence[Path]) -> set[str]:
+    """Every module named in an import declaration of ``sources``."""
+
+    names: set[str] = set()
+    for src in sources:
+        for statement in _IMPORT_STATEMENT.findall(src.read_text(encoding="utf-8", errors="replace")):
+            for item in statement.split(","):
+                # "import io = std.stdio" binds an alias; the module is on the right.
+                name = item.split("=")[-1].strip()
+                if name:
+                    names.add(name)
+    return names
+
+
 COMMAND_FLAG_OVERRIDES: dict[str, Sequence[str]] = {}
 
 
+def compiler_identity(dc: str) -> str:
+    """Return a string that changes whenever the D compiler does."""
+
+    resolved = shutil.which(dc) or dc
+    try:
+        completed = subprocess.run(
+            [resolved, "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return resolved
+    return f"{resolved}\n{completed.stdout}"
+
+
+class BuildCache:
+    """Content-addressed store of previously linked utility binaries.
+
+    Entries are keyed by a SHA-256 over the utility's sources, every file in
+    its string-import (-J) directories, the effective compiler flags and the
+    compiler identity, so any change to one of those inputs is a miss.
+    """
+
+    def __init__(self, root: Path, compiler_id: str) -> None:
+        self.root = root
+        self.compiler_id = compiler_id
+        self._library_digests: dict[tuple[Path, int, int], bytes] = {}
+        self._lock = threading.Lock()
+
+    def _library_digest(self, lib: Path) -> bytes:
+        """SHA-256 of a linked library, computed once per build rather than per job."""
+
+        info = lib.stat()
+        stamp = (lib, info.st_mtime_ns, info.st_size)
+        with self._lock:
+            digest = self._library_digests.get(stamp)
+        if digest is None:
+            digest = hashlib.sha256(lib.read_bytes()).digest()
+            with self._lock:
+                self._library_digests[stamp] = digest
+        return digest
+
+    def key_for(self, job: CompileJob) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.compiler_id.encode("utf-8"))
+        for flag in job.flags:
+            digest.update(b"\0flag\0" + flag.encode("utf-8"))
+        for lib in job.libraries:
+            # Libraries are themselves restored from (or stored into) this
+            # cache, so their bytes only change when their inputs do.
+            digest.update(b"\0library\0" + lib.name.encode("utf-8") + b"\0")
+            digest.update(self._library_digest(lib))
+        for src in job.sources:
+            digest.update(b"\0source\0" + src.name.encode("utf-8"))
+        for import_dir in string_import_dirs(job.sources):
+            for path in sorted(p for p in import_dir.rglob("*") if p.is_file()):
+                rel = path.relative_to(import_dir).as_posix()
+                digest.update(b"\0file\0" + rel.encode("utf-8") + b"\0")
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def restore(self, key: str, output: Path) -> bool:
+        entry = self._entry(key)
+        if not entry.is_file():
+            return False
+        output.parent.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(entry, output)
+        return True
+
+    def store(self, key: str, output: Path) -> None:
+        entry = self._entry(key)
+        if entry.is_file():
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(output, entry)
+        except OSError as exc:
+            print(f"[warn] Could not cache {output.name}: {exc}")
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    """Atomically place ``src`` at ``dest``, preferring a hard link."""
+
+    if dest.exists() and os.path.samefile(src, dest):
+        return
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        tmp.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
 # Some utilities have external library dependencies beyond the D runtime
 # and Phobos.  Specify those here as linker flags so that they are only
 # applied to the relevant binaries.
@@ -219,21 +558,492 @@ COMMAND_LINKER_FLAGS: dict[str, Sequence[str]] = {
 }
 
 
-def build_all(dc: str, flags: Sequence[str], source_root: Path, output_dir: Path) -> List[BuildResult]:
-    results: List[BuildResult] = []
-    for name, sources in discover_commands(source_root):
-        output = output_dir / name
-        print(f"[build] {name}")
-        effective_flags = list(flags)
-        extra_flags = COMMAND_FLAG_OVERRIDES.get(name, ())
-        if extra_flags:
-            effective_flags.extend(extra_flags)
-        linker_flags = COMMAND_LINKER_FLAGS.get(name, ())
-        if linker_flags:
-            effective_flags.extend(linker_flags)
-        compile_command(dc, effective_flags, sources, output)
-        results.append(BuildResult(name, tuple(sources), output))
-    return results
+def effective_flags_for(name: str, flags: Sequence[str]) -> List[str]:
+    effective_flags = list(flags)
+    extra_flags = COMMAND_FLAG_OVERRIDES.get(name, ())
+    if extra_flags:
+        effective_flags.extend(extra_flags)
+    linker_flags = COMMAND_LINKER_FLAGS.get(name, ())
+    if linker_flags:
+        effective_flags.extend(linker_flags)
+    return effective_flags
+
+
+def plan_jobs(
+    flags: Sequence[str],
+    source_root: Path,
+    output_dir: Path,
+    libraries: Sequence[Path] = (),
+    classify: Callable[[Path], bool] = is_d_source,
+    library_modules: Collection[str] | None = None,
+) -> List[CompileJob]:
+    """Plan one job per command.
+
+    ``libraries`` are linked into every command, or, when ``library_modules``
+    is given, only into commands that import one of those modules.
+    """
+
+    def needs_libraries(sources: Sequence[Path]) -> bool:
+        return library_modules is None or not imported_modules(sources).isdisjoint(library_modules)
+
+    return [
+        CompileJob(
+            name,
+            tuple(sources),
+            output_dir / name,
+            tuple(effective_flags_for(name, flags)),
+            tuple(libraries) if needs_libraries(sources) else (),
+        )
+        for name, sources in discover_commands(source_root, classify)
+    ]
+
+
+def run_job(dc: str, job: CompileJob, cache: BuildCache | None = None) -> CompileOutcome:
+    started = time.monotonic()
+    key = cache.key_for(job) if cache is not None else None
+    if cache is not None and key is not None and cache.restore(key, job.output):
+        elapsed = time.monotonic() - started
+        return CompileOutcome(job, 0, "", elapsed, cached=True, binary_bytes=_file_size(job.output))
+    completed, peak_rss_kib = compile_command(dc, job.flags, job.sources, job.output, job.libraries)
+    if cache is not None and key is not None and completed.returncode == 0 and job.output.is_file():
+        cache.store(key, job.output)
+    elapsed = time.monotonic() - started
+    return CompileOutcome(
+        job,
+        completed.returncode,
+        completed.stdout or "",
+        elapsed,
+        peak_rss_kib=peak_rss_kib,
+        binary_bytes=_file_size(job.output) if completed.returncode == 0 else 0,
+    )
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def report_outcome(outcome: CompileOutcome) -> None:
+    if outcome.cached:
+        status = "cached"
+    elif outcome.returncode == 0:
+        status = "build"
+    else:
+        status = "fail"
+    print(f"[{status}] {outcome.job.name} ({outcome.elapsed:.1f}s)")
+    if outcome.log:
+        sys.stdout.write(outcome.log if outcome.log.endswith("\n") else outcome.log + "\n")
+    sys.stdout.flush()
+
+
+def run_jobs(
+    dc: str,
+    jobs: Sequence[CompileJob],
+    max_workers: int,
+    cache: BuildCache | None = None,
+) -> List[CompileOutcome]:
+    """Compile ``jobs`` concurrently, reporting each one in submission order.
+
+    Compiler output is captured per job and replayed once the job is at the
+    head of the queue, so the log reads the same regardless of which compile
+    happens to finish first.
+    """
+
+    outcomes: List[CompileOutcome] = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures: List[Future[CompileOutcome]] = []
+        for job in jobs:
+            futures.append(pool.submit(run_job, dc, job, cache))
+        for future in futures:
+            outcome = future.result()
+            report_outcome(outcome)
+            outcomes.append(outcome)
+    return outcomes
+
+
+def report_cache_stats(outcomes: Sequence[CompileOutcome]) -> None:
+    hits = sum(1 for outcome in outcomes if outcome.cached)
+    total = len(outcomes)
+    rate = (100.0 * hits / total) if total else 0.0
+    compiling = sum(outcome.elapsed for outcome in outcomes if not outcome.cached)
+    print(f"[cache] {hits} hit(s), {total - hits} miss(es) ({rate:.0f}% hit rate, {compiling:.1f}s compiling)")
+
+
+MULTICALL_BINARY_NAME = "posixutils"
+
+_MAIN_DECLARATION = re.compile(
+    r"^(?P<prefix>[ \t]*(?:(?:@\w+|extern\s*\(\s*C\s*\))\s*)*(?:int|void)\s+)main(?=\s*\()",
+    re.MULTILINE,
+)
+
+
+@dataclass(frozen=True)
+class MulticallApplet:
+    name: str
+    module: str
+    entry_point: str
+    job: CompileJob
+
+
+def _identifier(name: str) -> str:
+    return re.sub(r"\W", "_", name)
+
+
+def stage_multicall_applet(job: CompileJob, staging_root: Path) -> tuple[MulticallApplet, List[Path]] | None:
+    """Copy ``job``'s command directory with its ``main`` renamed.
+
+    Returns None when the entry point cannot be identified unambiguously; such
+    utilities are built as standalone binaries instead.
+    """
+
+    entry_point = f"posixutils_{_identifier(job.name)}_main"
+    staged_dir = staging_root / job.name
+    rewritten: dict[Path, str] = {}
+    main_module: str | None = None
+    for src in job.sources:
+        text = src.read_text(encoding="utf-8", errors="ignore")
+        text, renamed = _MAIN_DECLARATION.subn(rf"\g<prefix>{entry_point}", text)
+        module_match = _MODULE_DECLARATION.search(text)
+        if module_match is not None:
+            module = module_match.group(1)
+        elif len(job.sources) == 1:
+            # Default module names come from the file name and may clash with
+            # other utilities (or be keywords such as "true"), so pin one.
+            module = f"multicall_{_identifier(job.name)}"
+            text = f"module {module};\n{text}"
+        else:
+            module = src.stem
+        if renamed:
+            if renamed > 1 or main_module is not None:
+                return None
+            main_module = module
+        rewritten[src] = text
+    if main_module is None:
+        return None
+
+    for import_dir in string_import_dirs(job.sources):
+        shutil.copytree(import_dir, staged_dir, dirs_exist_ok=True)
+    staged: List[Path] = []
+    for src, text in rewritten.items():
+        target = staged_dir / src.name
+        target.write_text(text, encoding="utf-8")
+        staged.append(target)
+    return MulticallApplet(job.name, main_module, entry_point, job), staged
+
+
+def multicall_dispatcher_source(applets: Sequence[MulticallApplet]) -> str:
+    imports = "\n".join(
+        f"import applet{index} = {applet.module};" for index, applet in enumerate(applets)
+    )
+    cases = "\n".join(
+        f'        case "{applet.name}": return invoke!(applet{index}.{applet.entry_point})(args, shift);'
+        for index, applet in enumerate(applets)
+    )
+    return f"""// Auto-generated by tools/build_posixutils.py. Do not edit by hand.
+module posixutils_multicall;
+
+import core.runtime : Runtime;
+import core.stdc.stdio : fprintf, stderr;
+import std.path : baseName;
+import std.traits : Parameters, ReturnType;
+
+{imports}
+
+private int invoke(alias fn)(string[] args, size_t shift)
+{{
+    alias Params = Parameters!fn;
+    static if (Params.length == 0)
+    {{
+        static if (is(ReturnType!fn == void)) {{ fn(); return 0; }}
+        else return fn();
+    }}
+    else static if (Params.length == 1)
+    {{
+        static if (is(ReturnType!fn == void)) {{ fn(args); return 0; }}
+        else return fn(args);
+    }}
+    else
+    {{
+        // C-style entry points see the raw argv, minus the multicall prefix.
+        auto cargs = Runtime.cArgs;
+        auto argc = cast(Params[0])(cargs.argc - shift);
+        auto argv = cast(Params[1])(cargs.argv + shift);
+        static if (is(ReturnType!fn == void)) {{ fn(argc, argv); return 0; }}
+        else return fn(argc, argv);
+    }}
+}}
+
+int main(string[] args)
+{{
+    size_t shift = 0;
+    string applet = args.length ? baseName(args[0]) : "";
+    if (applet == "{MULTICALL_BINARY_NAME}" && args.length > 1)
+    {{
+        shift = 1;
+        args = args[1 .. $];
+        applet = baseName(args[0]);
+    }}
+
+    switch (applet)
+    {{
+{cases}
+        default:
+            break;
+    }}
+
+    fprintf(stderr, "{MULTICALL_BINARY_NAME}: unknown applet '%.*s'\\n", cast(int) applet.length, applet.ptr);
+    return 127;
+}}
+"""
+
+
+def plan_multicall(
+    planned: Sequence[CompileJob],
+    flags: Sequence[str],
+    staging_root: Path,
+    output_dir: Path,
+    libraries: Sequence[Path] = (),
+) -> tuple[CompileJob | None, List[MulticallApplet], List[CompileJob]]:
+    """Split ``planned`` into one multicall job plus any standalone leftovers."""
+
+    if staging_root.exists():
+        shutil.rmtree(staging_root)
+    staging_root.mkdir(parents=True)
+
+    applets: List[MulticallApplet] = []
+    sources: List[Path] = []
+    standalone: List[CompileJob] = []
+    for job in planned:
+        staged = stage_multicall_applet(job, staging_root)
+        if staged is None:
+            print(f"[warn] {job.name}: no unique main(); building it standalone")
+            standalone.append(job)
+            continue
+        applet, applet_sources = staged
+        applets.append(applet)
+        sources.extend(applet_sources)
+    if not applets:
+        return None, [], standalone
+
+    dispatcher = staging_root / "multicall_main.d"
+    dispatcher.write_text(multicall_dispatcher_source(applets), encoding="utf-8")
+    sources.append(dispatcher)
+
+    # One link has to satisfy every applet, so merge the per-command flags.
+    merged_flags: List[str] = list(flags)
+    for applet in applets:
+        for flag in applet.job.flags:
+            if flag not in merged_flags:
+                merged_flags.append(flag)
+    job = CompileJob(
+        MULTICALL_BINARY_NAME,
+        tuple(sources),
+        output_dir / MULTICALL_BINARY_NAME,
+        tuple(merged_flags),
+        tuple(libraries),
+    )
+    return job, applets, standalone
+
+
+def link_applets(output_dir: Path, applets: Sequence[MulticallApplet]) -> None:
+    """Point bin/<applet> at the multicall binary so PATH lookups still work."""
+
+    for applet in applets:
+        link = output_dir / applet.name
+        if link.is_symlink() and os.readlink(link) == MULTICALL_BINARY_NAME:
+            continue
+        scratch = output_dir / f".tmp.{applet.name}"
+        if scratch.is_symlink() or scratch.exists():
+            scratch.unlink()
+        scratch.symlink_to(MULTICALL_BINARY_NAME)
+        os.replace(scratch, link)
+
+
+class BuildReport:
+    """Per-utility build telemetry written next to manifest.txt.
+
+    report.json is the machine-readable copy (and the baseline for the next
+    run's deltas); report.tsv is the same data for quick sorting in a shell.
+    Cached utilities carry their last real compile time and peak RSS forward
+    so that a warm build does not hide the slow units.
+    """
+
+    FIELDS = ("seconds", "peak_rss_kib", "binary_bytes")
+
+    def __init__(self, manifest_dir: Path) -> None:
+        self.json_path = manifest_dir / "report.json"
+        self.tsv_path = manifest_dir / "report.tsv"
+        self.previous = self._load(self.json_path)
+        self.entries: dict[str, dict[str, float | int | bool]] = {}
+
+    @staticmethod
+    def _load(path: Path) -> dict[str, dict]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        utilities = data.get("utilities") if isinstance(data, dict) else None
+        return utilities if isinstance(utilities, dict) else {}
+
+    def record(self, outcomes: Iterable[CompileOutcome]) -> None:
+        for outcome in outcomes:
+            if outcome.returncode != 0:
+                continue
+            entry: dict[str, float | int | bool] = {
+                "seconds": round(outcome.elapsed, 3),
+                "peak_rss_kib": outcome.peak_rss_kib,
+                "binary_bytes": outcome.binary_bytes,
+                "cached": outcome.cached,
+            }
+            previous = self.previous.get(outcome.job.name)
+            if outcome.cached and previous:
+                entry["seconds"] = previous.get("seconds", entry["seconds"])
+                entry["peak_rss_kib"] = previous.get("peak_rss_kib", 0)
+            self.entries[outcome.job.name] = entry
+
+    def carry_forward(self, names: Iterable[str]) -> None:
+        """Keep the previous entries for utilities that were not rebuilt."""
+
+        for name in names:
+            if name not in self.entries and name in self.previous:
+                self.entries[name] = dict(self.previous[name])
+
+    def write(self) -> None:
+        self.json_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "total_seconds": round(sum(float(e["seconds"]) for e in self.entries.values()), 3),
+            "total_binary_bytes": sum(int(e["binary_bytes"]) for e in self.entries.values()),
+            "utilities": dict(sorted(self.entries.items())),
+        }
+        self.json_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        lines = ["name\t" + "\t".join(self.FIELDS) + "\tcached\n"]
+        for name, entry in sorted(self.entries.items()):
+            values = "\t".join(str(entry[field]) for field in self.FIELDS)
+            lines.append(f"{name}\t{values}\t{int(bool(entry['cached']))}\n")
+        self.tsv_path.write_text("".join(lines), encoding="utf-8")
+        print(f"[ok] Wrote build report: {self.json_path}")
+
+    def _delta(self, name: str, field: str) -> str:
+        previous = self.previous.get(name)
+        if not previous or field not in previous:
+            return "new"
+        change = float(self.entries[name][field]) - float(previous[field])
+        return f"{change:+.1f}" if field == "seconds" else f"{int(change):+d}"
+
+    def summarize(self, top: int) -> None:
+        titles = {
+            "seconds": "Slowest to build (s)",
+            "peak_rss_kib": "Peak compiler RSS (KiB)",
+            "binary_bytes": "Largest binaries (bytes)",
+        }
+        for field in self.FIELDS:
+            ranked = sorted(self.entries, key=lambda name: (-float(self.entries[name][field]), name))
+            print(f"[report] {titles[field]}:")
+            for name in ranked[:top]:
+                print(f"[report]   {name:<24} {self.entries[name][field]:>12}  ({self._delta(name, field)})")
+        removed = sorted(set(self.previous) - set(self.entries))
+        if removed:
+            print(f"[report] No longer built: {', '.join(removed)}")
+
+
+def build_all(
+    dc: str,
+    flags: Sequence[str],
+    source_root: Path,
+    output_dir: Path,
+    jobs: int = 1,
+    cache: BuildCache | None = None,
+    helper_lib_dir: Path | None = None,
+    multicall: bool = False,
+    source_index: SourceIndex | None = None,
+    report: BuildReport | None = None,
+    only: set[str] | None = None,
+) -> List[BuildResult]:
+    """Build every utility under ``source_root``.
+
+    ``only`` restricts compilation to the named utilities (the rest must
+    already exist in ``output_dir``); the returned results always describe
+    the complete set so that the manifests stay whole.
+    """
+
+    classify = source_index.is_d_source if source_index is not None else is_d_source
+    helper_job = None
+    if helper_lib_dir is not None:
+        helper_job = plan_helper_library(flags, source_root, helper_lib_dir, classify)
+    if helper_job is not None:
+        planned = plan_jobs(
+            flags, source_root, output_dir, [helper_job.output], classify, declared_modules(helper_job.sources)
+        )
+    else:
+        planned = plan_jobs(flags, source_root, output_dir, [], classify)
+    libraries: List[Path] = []
+    if helper_job is not None and any(job.libraries for job in planned):
+        libraries.append(helper_job.output)
+        if only is None or not helper_job.output.is_file():
+            # Build the helpers once, before the commands that import them,
+            # instead of letting each of those commands recompile them.
+            helper = run_job(dc, helper_job, cache)
+            report_outcome(helper)
+            if report is not None:
+                report.record([helper])
+            if helper.returncode != 0:
+                raise SystemExit(f"[error] Failed to build helper library {helper_job.output}")
+
+    if source_index is not None:
+        source_index.save()
+    applets: List[MulticallApplet] = []
+    if multicall:
+        multicall_job, applets, planned = plan_multicall(
+            planned, flags, output_dir.parent / "multicall", output_dir, libraries
+        )
+        if multicall_job is not None:
+            planned = [multicall_job, *planned]
+    else:
+        # Drop the binary left behind by an earlier --multicall build so that
+        # it is not staged alongside the standalone utilities.
+        stale = output_dir / MULTICALL_BINARY_NAME
+        if stale.is_file() and all(job.name != MULTICALL_BINARY_NAME for job in planned):
+            stale.unlink()
+
+    def affected(job: CompileJob) -> bool:
+        if only is None or not job.output.is_file():
+            return True
+        if job.name == MULTICALL_BINARY_NAME and applets:
+            return any(applet.name in only for applet in applets)
+        return job.name in only
+
+    to_run = [job for job in planned if affected(job)]
+    outcomes = run_jobs(dc, to_run, jobs, cache)
+    if report is not None:
+        report.record(outcomes)
+        report.carry_forward(job.name for job in planned if job not in to_run)
+    if cache is not None:
+        report_cache_stats(outcomes)
+    failed = [outcome.job.name for outcome in outcomes if outcome.returncode != 0]
+    if failed:
+        raise SystemExit(f"[error] Failed to build: {', '.join(failed)}")
+    results = [
+        BuildResult(job.name, job.sources, job.output)
+        for job in planned
+        if job.name != MULTICALL_BINARY_NAME or not applets
+    ]
+    if applets:
+        link_applets(output_dir, applets)
+        multicall_binary = output_dir / MULTICALL_BINARY_NAME
+        results.extend(
+            BuildResult(applet.name, applet.job.sources, multicall_binary) for applet in applets
+        )
+    return sorted(results, key=lambda result: result.name)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace ``path`` in one rename so readers never see a partial file."""
+
+    scratch = path.with_name(f".tmp.{path.name}")
+    scratch.write_text(text, encoding="utf-8")
+    os.replace(scratch, path)
 
 
 def write_manifest(manifest_dir: Path, results: Sequence[BuildResult], root: Path) -> None:
@@ -243,7 +1053,7 @@ def write_manifest(manifest_dir: Path, results: Sequence[BuildResult], root: Pat
     for result in results:
         rel_sources = ",".join(str(src.relative_to(root)) for src in result.sources)
         lines.append(f"{result.name}\t{rel_sources}\n")
-    manifest_path.write_text("".join(lines), encoding="utf-8")
+    write_atomic(manifest_path, "".join(lines))
     print(f"[ok] Wrote manifest: {manifest_path}")
 
 
@@ -259,10 +1069,233 @@ def write_object_manifest(manifest_dir: Path, results: Sequence[BuildResult], ro
         except ValueError:
             binary_path = result.output
         lines.append(f"{object_id}\t{object_path}\t{binary_path}\n")
-    object_manifest.write_text("".join(lines), encoding="utf-8")
+    write_atomic(object_manifest, "".join(lines))
     print(f"[ok] Wrote object manifest: {object_manifest}")
 
 
+def affected_commands(changed: Iterable[Path], source_root: Path) -> set[str] | None:
+    """Map changed paths to the utilities that need rebuilding.
+
+    Returns None when a shared helper changed, meaning everything is affected.
+    """
+
+    commands_root = source_root / "commands"
+    search_root = commands_root if commands_root.is_dir() else source_root
+    names: set[str] = set()
+    for path in changed:
+        for base in (search_root, source_root):
+            try:
+                parts = path.relative_to(base).parts
+            except ValueError:
+                continue
+            if len(parts) < 2:
+                continue
+            if parts[0] in NON_COMMAND_DIRECTORIES:
+                return None
+            if base == search_root:
+                names.add(parts[0])
+            break
+    return names
+
+
+class PollingWatcher:
+    """Detect source changes by periodically comparing (mtime, size) snapshots."""
+
+    def __init__(self, root: Path, interval: float) -> None:
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self) -> set[Path]:
+        while True:
+            time.sleep(self.interval)
+            current = self._scan()
+            changed = {
+                path
+                for path in current.keys() | self._snapshot.keys()
+                if current.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = current
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher over every directory below ``root`` (via ctypes)."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    # Editors save in bursts (write, rename, chmod); collect them into one rebuild.
+    SETTLE_SECONDS = 0.3
+
+    def __init__(self, root: Path) -> None:
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[int, Path] = {}
+        for dirpath, _, _ in os.walk(root):
+            self._add(Path(dirpath))
+
+    def _add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._watches[wd] = directory
+
+    def _drain(self) -> set[Path]:
+        import select
+        import struct
+
+        changed: set[Path] = set()
+        while select.select([self._fd], [], [], 0)[0]:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + 16 <= len(buffer):
+                wd, mask, _, length = struct.unpack_from("iIII", buffer, offset)
+                raw_name = buffer[offset + 16 : offset + 16 + length].rstrip(b"\0")
+                offset += 16 + length
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                path = directory / os.fsdecode(raw_name) if raw_name else directory
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    for dirpath, _, filenames in os.walk(path):
+                        self._add(Path(dirpath))
+                        changed.update(Path(dirpath) / name for name in filenames)
+                changed.add(path)
+        return changed
+
+    def wait(self) -> set[Path]:
+        import select
+
+        while True:
+            select.select([self._fd], [], [])
+            changed = self._drain()
+            while select.select([self._fd], [], [], self.SETTLE_SECONDS)[0]:
+                changed |= self._drain()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_watcher(root: Path, poll_interval: float) -> InotifyWatcher | PollingWatcher:
+    try:
+        watcher: InotifyWatcher | PollingWatcher = InotifyWatcher(root)
+        print(f"[watch] Watching {root} (inotify)")
+    except (OSError, AttributeError) as exc:
+        print(f"[watch] inotify unavailable ({exc}); polling every {poll_interval}s")
+        watcher = PollingWatcher(root, poll_interval)
+    return watcher
+
+
+def run_build(
+    args: argparse.Namespace,
+    root: Path,
+    source_root: Path,
+    output_dir: Path,
+    flags: Sequence[str],
+    cache: BuildCache | None,
+    only: set[str] | None = None,
+) -> List[BuildResult]:
+    helper_lib_dir = None if args.no_helper_lib else output_dir.parent / "lib"
+    report = BuildReport(output_dir.parent)
+    results = build_all(
+        args.dc,
+        flags,
+        source_root,
+        output_dir,
+        jobs=args.jobs,
+        cache=cache,
+        helper_lib_dir=helper_lib_dir,
+        multicall=args.multicall,
+        source_index=SourceIndex(output_dir.parent / "sources.json"),
+        report=report,
+        only=only,
+    )
+    if not results:
+        print("[warn] No POSIX utilities were built; nothing to do")
+        return results
+
+    write_manifest(output_dir.parent, results, root)
+    write_object_manifest(output_dir.parent, results, root)
+    report.write()
+    if args.report is not None:
+        report.summarize(args.report)
+    print(f"[ok] Built {len(results)} POSIX utilities into {output_dir}")
+    return results
+
+
+def watch(
+    args: argparse.Namespace,
+    root: Path,
+    source_root: Path,
+    output_dir: Path,
+    flags: Sequence[str],
+    cache: BuildCache | None,
+) -> None:
+    """Rebuild affected utilities on every source change until interrupted.
+
+    A failed rebuild leaves the previous manifests in place, so whatever was
+    last published stays consistent with the binaries in ``output_dir``.
+    """
+
+    watcher = make_watcher(source_root, args.poll_interval)
+    try:
+        while True:
+            changed = watcher.wait()
+            only = affected_commands(changed, source_root)
+            if only is not None and not only:
+                continue
+            label = "all utilities" if only is None else ", ".join(sorted(only))
+            print(f"[watch] Change detected; rebuilding {label}")
+            try:
+                run_build(args, root, source_root, output_dir, flags, cache, only)
+            except SystemExit as exc:
+                print(exc)
+                print("[watch] Keeping the previous manifests; waiting for the next change")
+    except KeyboardInterrupt:
+        print("[watch] Stopped")
+    finally:
+        watcher.close()
+
+
 def main() -> None:
     args = parse_args()
     ensure_compiler_available(args.dc)
@@ -273,15 +1306,24 @@ def main() -> None:
     output_dir = args.output or (root / "build" / "posixutils" / "bin")
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.jobs < 1:
+        raise SystemExit(f"--jobs must be at least 1 (got {args.jobs})")
+
     flags = parse_flag_list(args.flags, args.dc)
-    results = build_all(args.dc, flags, source_root, output_dir)
-    if not results:
-        print("[warn] No POSIX utilities were built; nothing to do")
+    cache = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or (output_dir.parent / "cache")
+        cache = BuildCache(cache_dir, compiler_identity(args.dc))
+
+    if not args.watch:
+        run_build(args, root, source_root, output_dir, flags, cache)
         return
 
-    write_manifest(output_dir.parent, results, root)
-    write_object_manifest(output_dir.parent, results, root)
-    print(f"[ok] Built {len(results)} POSIX utilities into {output_dir}")
+    try:
+        run_build(args, root, source_root, output_dir, flags, cache)
+    except SystemExit as exc:
+        print(exc)
+    watch(args, root, source_root, output_dir, flags, cache)
 
 
 if __name__ == "__main__":
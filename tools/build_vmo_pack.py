@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Build a page-deduplicated VMO pack from a staged file tree.
+
+Files are split into pages and every page is named by the hash VmoStore
+(src/anonymos/kernel/vmo.d) gives its page node: SHA-256 over "page",
+the big-endian u64 length (twice) and the bytes. A file's root hash is
+the node ``VmoStore.fromBytes`` would produce -- the page itself for a
+file of at most one page, otherwise a "concat" node over its pages -- so
+the kernel can intern pack contents without rehashing and get the same
+handles. Each distinct page is stored once.
+
+Pack layout (little-endian, offsets from the start of the file)::
+
+    header     magic "VMOPACK1", u32 version, u32 page size, u32 page
+               count, u32 file count, u64 page table, file table, page
+               refs, strings and page data offsets
+    page table per page:  hash[32], u32 length, 4 bytes padding
+    file table per file:  root hash[32], u64 length, u32 first ref,
+               u32 ref count, u32 name offset, u32 name length, u32
+               mode, 4 bytes padding        (sorted by path bytes)
+    page refs  u32 page indexes, each file's run starting at "first ref"
+    strings    file paths
+    page data  page i at data offset + i * page size (page-aligned;
+               short tail pages are zero-padded)
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Sequence
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import pack_initrd
+
+PACK_MAGIC = b"VMOPACK1"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<8sIIIIQQQQQ")
+PAGE_ENTRY = struct.Struct("<32sI4x")
+FILE_ENTRY = struct.Struct("<32sQIIIII4x")
+REF = struct.Struct("<I")
+DEFAULT_PAGE_SIZE = 4096
+
+
+def _u64(value: int) -> bytes:
+    # VmoStore.encodeU64 writes big-endian.
+    return value.to_bytes(8, "big")
+
+
+def page_hash(data: bytes) -> bytes:
+    """HashBytes of ``VmoStore.page(data)``."""
+
+    return hashlib.sha256(b"page" + _u64(len(data)) + _u64(len(data)) + data).digest()
+
+
+def concat_hash(children: Sequence[bytes], total_length: int) -> bytes:
+    """HashBytes of ``VmoStore.concat`` over child nodes of ``total_length`` bytes."""
+
+    return hashlib.sha256(b"concat" + _u64(total_length) + _u64(len(children)) + b"".join(children)).digest()
+
+
+@dataclass
+class PackedFile:
+    path: str
+    length: int
+    mode: int
+    root: bytes
+    pages: List[int]
+
+
+@dataclass
+class PagePool:
+    """Distinct pages in first-seen order, keyed by their VMO page hash."""
+
+    page_size: int
+    hashes: List[bytes] = field(default_factory=list)
+    lengths: List[int] = field(default_factory=list)
+    data: List[bytes] = field(default_factory=list)
+    slots: Dict[bytes, int] = field(default_factory=dict)
+    logical_pages: int = 0
+
+    def add_file(self, path: str, content: bytes, mode: int) -> PackedFile:
+        """Split ``content`` the way VmoStore.fromBytes does and intern each page."""
+
+        if not content:
+            chunks = [b""]
+        else:
+            chunks = [content[start : start + self.page_size] for start in range(0, len(content), self.page_size)]
+        indexes = []
+        child_hashes = []
+        for chunk in chunks:
+            digest = page_hash(chunk)
+            slot = self.slots.get(digest)
+            if slot is None:
+                slot = self.slots[digest] = len(self.hashes)
+                self.hashes.append(digest)
+                self.lengths.append(len(chunk))
+                self.data.append(chunk)
+            indexes.append(slot)
+            child_hashes.append(digest)
+        self.logical_pages += len(chunks)
+        root = child_hashes[0] if len(chunks) == 1 else concat_hash(child_hashes, len(content))
+        return PackedFile(path, len(content), mode, root, indexes)
+
+
+def write_pack(out: BinaryIO, pool: PagePool, files: Sequence[PackedFile]) -> None:
+    ordered = sorted(files, key=lambda packed: packed.path.encode())
+    page_table = b"".join(PAGE_ENTRY.pack(digest, length) for digest, length in zip(pool.hashes, pool.lengths))
+    strings = bytearray()
+    refs = bytearray()
+    file_table = bytearray()
+    for packed in ordered:
+        name = packed.path.encode()
+        file_table += FILE_ENTRY.pack(
+            packed.root, packed.length, len(refs) // REF.size, len(packed.pages), len(strings), len(name), packed.mode
+        )
+        refs += b"".join(REF.pack(index) for index in packed.pages)
+        strings += name
+
+    page_table_offset = PACK_HEADER.size
+    file_table_offset = page_table_offset + len(page_table)
+    refs_offset = file_table_offset + len(file_table)
+    strings_offset = refs_offset + len(refs)
+    data_offset = -(-(strings_offset + len(strings)) // pool.page_size) * pool.page_size
+    out.write(
+        PACK_HEADER.pack(
+            PACK_MAGIC,
+            PACK_VERSION,
+            pool.page_size,
+            len(pool.hashes),
+            len(ordered),
+            page_table_offset,
+            file_table_offset,
+            refs_offset,
+            strings_offset,
+            data_offset,
+        )
+    )
+    out.write(page_table)
+    out.write(file_table)
+    out.write(refs)
+    out.write(strings)
+    out.write(b"\0" * (data_offset - strings_offset - len(strings)))
+    for chunk in pool.data:
+        out.write(chunk)
+        out.write(b"\0" * (pool.page_size - len(chunk)))
+
+
+def read_pack(blob: bytes) -> Dict[str, bytes]:
+    """Rebuild every file from a pack, checking page and root hashes on the way."""
+
+    header = PACK_HEADER.unpack_from(blob, 0)
+    magic, version, page_size, page_count, file_count, page_table, file_table, refs, strings, data = header
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        raise ValueError("not a VMO pack")
+    pages = []
+    for index in range(page_count):
+        digest, length = PAGE_ENTRY.unpack_from(blob, page_table + index * PAGE_ENTRY.size)
+        start = data + index * page_size
+        chunk = blob[start : start + length]
+        if page_hash(chunk) != digest:
+            raise ValueError(f"page {index} does not match its hash")
+        pages.append((digest, chunk))
+
+    files = {}
+    for index in range(file_count):
+        root, length, first, count, name_offset, name_length, _ = FILE_ENTRY.unpack_from(
+            blob, file_table + index * FILE_ENTRY.size
+        )
+        path = blob[strings + name_offset : strings + name_offset + name_length].decode()
+        slots = [REF.unpack_from(blob, refs + (first + i) * REF.size)[0] for i in range(count)]
+        content = b"".join(pages[slot][1] for slot in slots)
+        children = [pages[slot][0] for slot in slots]
+        expected = children[0] if count == 1 else concat_hash(children, length)
+        if len(content) != length or expected != root:
+            raise ValueError(f"{path} does not match its root hash")
+        files[path] = content
+    return files
+
+
+def build_pack(
+    root: Path, output: Path, excludes: Sequence[str] = (), page_size: int = DEFAULT_PAGE_SIZE
+) -> tuple[PagePool, List[PackedFile]]:
+    if not root.is_dir():
+        raise SystemExit(f"Staging directory not found: {root}")
+    pool = PagePool(page_size)
+    files = [
+        pool.add_file(member.path, member.source.read_bytes(), member.mode)
+        for member in pack_initrd.collect_members(root, excludes)
+        if member.kind == "file"
+    ]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    scratch = output.with_name(f".tmp.{output.name}")
+    with scratch.open("wb") as out:
+        write_pack(out, pool, files)
+    os.replace(scratch, output)
+    return pool, files
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build a page-deduplicated VMO pack from a staged tree")
+    parser.add_argument("source", type=Path, help="Staged directory (e.g. build/desktop-stack)")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Pack file to write")
+    parser.add_argument(
+        "--exclude", action="append", default=[], metavar="PATH", help="Relative path or glob to leave out"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help="Must match the kernel VmoStore's page size (default: 4096)",
+    )
+    args = parser.parse_args()
+
+    if args.page_size <= 0 or args.page_size & (args.page_size - 1):
+        raise SystemExit(f"--page-size must be a positive power of two (got {args.page_size})")
+    pool, files = build_pack(args.source, args.output, args.exclude, args.page_size)
+    logical = sum(packed.length for packed in files)
+    stored = len(pool.hashes) * args.page_size
+    print(
+        f"[ok] {len(files)} files, {pool.logical_pages} pages -> {len(pool.hashes)} unique "
+        f"({logical} bytes of files, {stored} bytes of page data) in {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
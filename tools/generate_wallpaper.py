@@ -4,21 +4,36 @@
 The script intentionally avoids external dependencies so it can run in the
 build environment without pulling additional packages. It supports
 non-interlaced 8-bit PNG files in RGB or RGBA format and basic GIF89a files
-with a global or local palette.
+with a global or local palette. NumPy is used to speed up PNG decoding when
+it happens to be installed; the pure Python path produces identical output.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import os
 import struct
+import sys
 import zlib
+from array import array
+from contextlib import ExitStack, contextmanager
+from itertools import accumulate, groupby
 from pathlib import Path
-from typing import NamedTuple
+from typing import IO, Iterable, Iterator, NamedTuple, Sequence
+
+try:  # Optional accelerator; never required.
+    import numpy as _np
+except ImportError:  # pragma: no cover - depends on the build host
+    _np = None
 
 
 PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 GIF_SIGNATURES = (b"GIF87a", b"GIF89a")
 
+# Canvas words hold one ARGB32 pixel each.
+_WORD_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
 
 class PngDecodeError(RuntimeError):
     pass
@@ -33,16 +48,138 @@ class Frame(NamedTuple):
     pixels: bytes  # ARGB32, row-major
 
 
-def _paeth_predictor(a: int, b: int, c: int) -> int:
-    p = a + b - c
-    pa = abs(p - a)
-    pb = abs(p - b)
-    pc = abs(p - c)
-    if pa <= pb and pa <= pc:
-        return a
-    if pb <= pc:
-        return b
-    return c
+def _add_rows(a: bytes, b: bytes, low_mask: int, high_mask: int) -> bytes:
+    """Bytewise ``(a + b) & 0xFF`` over a whole row with one big-integer add.
+
+    Adding only the low seven bits of each byte cannot carry into the next
+    byte; the top bits are then folded back in with XOR.
+    """
+
+    x = int.from_bytes(a, "little")
+    y = int.from_bytes(b, "little")
+    total = ((x & low_mask) + (y & low_mask)) ^ ((x ^ y) & high_mask)
+    return total.to_bytes(len(a), "little")
+
+
+def _unfilter_average(raw: bytes, prev: bytes, bpp: int) -> bytearray:
+    out = [(x + (b >> 1)) & 0xFF for x, b in zip(raw[:bpp], prev[:bpp])]
+    append = out.append
+    for i, (x, b) in enumerate(zip(raw[bpp:], prev[bpp:])):
+        append((x + ((out[i] + b) >> 1)) & 0xFF)
+    return bytearray(out)
+
+
+def _unfilter_paeth(raw: bytes, prev: bytes, bpp: int) -> bytearray:
+    # The first pixel has a = c = 0, so the predictor is always b.
+    out = [(x + b) & 0xFF for x, b in zip(raw[:bpp], prev[:bpp])]
+    append = out.append
+    for i, (x, b, c) in enumerate(zip(raw[bpp:], prev[bpp:], prev)):
+        a = out[i]
+        # |p - a|, |p - b| and |p - c| for p = a + b - c, without abs() calls.
+        pa = b - c
+        pb = a - c
+        pc = pa + pb
+        if pa < 0:
+            pa = -pa
+        if pb < 0:
+            pb = -pb
+        if pc < 0:
+            pc = -pc
+        if pa <= pb and pa <= pc:
+            append((x + a) & 0xFF)
+        elif pb <= pc:
+            append((x + b) & 0xFF)
+        else:
+            append((x + c) & 0xFF)
+    return bytearray(out)
+
+
+def _unfilter_png(data: bytes, stride: int, height: int, bpp: int) -> bytearray:
+    """Undo the per-row PNG filters, returning ``height * stride`` raw bytes.
+
+    Sub runs as one C-level ``accumulate`` per channel lane and Up as a single
+    big-integer add per row; Average and Paeth are inherently sequential.
+    """
+
+    low_mask = int.from_bytes(b"\x7f" * stride, "little")
+    high_mask = int.from_bytes(b"\x80" * stride, "little")
+    mask_byte = (0xFF).__and__
+    pixels = bytearray(stride * height)
+    prev = bytes(stride)
+    pos = 0
+    for y in range(height):
+        filter_type = data[pos]
+        raw = data[pos + 1 : pos + 1 + stride]
+        pos += stride + 1
+
+        if filter_type == 0:
+            row = raw
+        elif filter_type == 1:  # Sub
+            row = bytearray(stride)
+            for lane in range(bpp):
+                row[lane::bpp] = bytes(map(mask_byte, accumulate(raw[lane::bpp])))
+        elif filter_type == 2:  # Up
+            row = _add_rows(raw, prev, low_mask, high_mask)
+        elif filter_type == 3:  # Average
+            row = _unfilter_average(raw, prev, bpp)
+        elif filter_type == 4:  # Paeth
+            row = _unfilter_paeth(raw, prev, bpp)
+        else:
+            raise PngDecodeError(f"Unsupported PNG filter type {filter_type}")
+
+        pixels[y * stride : (y + 1) * stride] = row
+        prev = row
+    return pixels
+
+
+def _unfilter_png_numpy(data: bytes, stride: int, height: int, bpp: int) -> bytes:
+    """NumPy variant of :func:`_unfilter_png` with identical output."""
+
+    rows = _np.frombuffer(data, dtype=_np.uint8).reshape(height, stride + 1)
+    filters = rows[:, 0]
+    bad = _np.flatnonzero(filters > 4)
+    if bad.size:
+        raise PngDecodeError(f"Unsupported PNG filter type {int(filters[bad[0]])}")
+
+    pixels = rows[:, 1:].copy()
+    for y in range(height):
+        filter_type = filters[y]
+        if filter_type == 1:  # Sub: running sum per channel, wrapping at 256
+            pixels[y] = _np.cumsum(pixels[y].reshape(-1, bpp), axis=0, dtype=_np.uint8).reshape(-1)
+        elif y == 0:
+            # The row above the image is all zeros: Up is a no-op, Average
+            # and Paeth reduce to scalar loops over the row itself.
+            if filter_type in (3, 4):
+                unfilter = _unfilter_average if filter_type == 3 else _unfilter_paeth
+                row = unfilter(pixels[0].tobytes(), bytes(stride), bpp)
+                pixels[0] = _np.frombuffer(row, dtype=_np.uint8)
+        elif filter_type == 2:  # Up
+            pixels[y] += pixels[y - 1]
+        elif filter_type in (3, 4):
+            unfilter = _unfilter_average if filter_type == 3 else _unfilter_paeth
+            row = unfilter(pixels[y].tobytes(), pixels[y - 1].tobytes(), bpp)
+            pixels[y] = _np.frombuffer(row, dtype=_np.uint8)
+    return pixels.tobytes()
+
+
+def _rgb_to_argb(pixels: bytes | bytearray, bpp: int) -> bytearray:
+    """Reorder packed RGB/RGBA bytes into big-endian ARGB32 with strided copies."""
+
+    count = len(pixels) // bpp
+    output = bytearray(count * 4)
+    output[0::4] = pixels[3::4] if bpp == 4 else b"\xff" * count
+    output[1::4] = pixels[0::bpp]
+    output[2::4] = pixels[1::bpp]
+    output[3::4] = pixels[2::bpp]
+    return output
+
+
+def _rgb_to_argb_numpy(pixels: bytes, bpp: int) -> bytes:
+    source = _np.frombuffer(pixels, dtype=_np.uint8).reshape(-1, bpp)
+    output = _np.empty((source.shape[0], 4), dtype=_np.uint8)
+    output[:, 0] = source[:, 3] if bpp == 4 else 0xFF
+    output[:, 1:] = source[:, :3]
+    return output.tobytes()
 
 
 def _read_png(path: Path) -> tuple[int, int, list[Frame]]:
@@ -93,45 +230,12 @@ def _read_png(path: Path) -> tuple[int, int, list[Frame]]:
     if len(decompressed) != expected:
         raise PngDecodeError("Unexpected decompressed data length")
 
-    output = bytearray(width * height * 4)
-    prev = bytearray(stride)
-    pos = 0
-    out_pos = 0
-
-    for _ in range(height):
-        filter_type = decompressed[pos]
-        pos += 1
-        row = bytearray(decompressed[pos : pos + stride])
-        pos += stride
-
-        if filter_type == 1:  # Sub
-            for i in range(stride):
-                left = row[i - pixel_size] if i >= pixel_size else 0
-                row[i] = (row[i] + left) & 0xFF
-        elif filter_type == 2:  # Up
-            for i in range(stride):
-                row[i] = (row[i] + prev[i]) & 0xFF
-        elif filter_type == 3:  # Average
-            for i in range(stride):
-                left = row[i - pixel_size] if i >= pixel_size else 0
-                up = prev[i]
-                row[i] = (row[i] + ((left + up) // 2)) & 0xFF
-        elif filter_type == 4:  # Paeth
-            for i in range(stride):
-                a = row[i - pixel_size] if i >= pixel_size else 0
-                b = prev[i]
-                c = prev[i - pixel_size] if i >= pixel_size else 0
-                row[i] = (row[i] + _paeth_predictor(a, b, c)) & 0xFF
-        elif filter_type != 0:
-            raise PngDecodeError(f"Unsupported PNG filter type {filter_type}")
-
-        for i in range(0, stride, pixel_size):
-            r, g, b = row[i : i + 3]
-            a = 255 if pixel_size == 3 else row[i + 3]
-            output[out_pos : out_pos + 4] = bytes((a, r, g, b))
-            out_pos += 4
-
-        prev = row
+    if _np is not None:
+        pixels = _unfilter_png_numpy(decompressed, stride, height, pixel_size)
+        output = _rgb_to_argb_numpy(pixels, pixel_size)
+    else:
+        pixels = _unfilter_png(decompressed, stride, height, pixel_size)
+        output = _rgb_to_argb(pixels, pixel_size)
 
     frame = Frame(100, bytes(output))  # Static PNG, arbitrary default duration
     return width, height, [frame]
@@ -163,72 +267,95 @@ def _parse_palette(raw: bytes) -> list[tuple[int, int, int, int]]:
     return palette
 
 
-def _lzw_decode(min_code_size: int, data: bytes, expected_pixels: int) -> list[int]:
+def _lzw_decode(min_code_size: int, data: bytes, expected_pixels: int) -> bytearray:
+    """Decode a GIF LZW stream into at most ``expected_pixels`` palette indexes.
+
+    Every multi-symbol code expands to the string emitted for the previous
+    code plus the first symbol of the following one, and those symbols sit
+    next to each other in the output.  The code table therefore only records
+    an (offset, length) pair into the output, and expanding a code is a
+    single slice copy rather than a walk down a prefix chain.
+    """
+
     clear_code = 1 << min_code_size
     end_code = clear_code + 1
     code_size = min_code_size + 1
     next_code = end_code + 1
     max_code = 1 << code_size
+    code_mask = max_code - 1
 
-    dictionary = {i: bytes([i]) for i in range(clear_code)}
-
-    output: list[int] = []
-    bit_pos = 0
-    data_bits = len(data) * 8
-    prev_code: int | None = None
+    offsets = [0] * 4096
+    lengths = [0] * 4096
 
-    def read_code() -> int | None:
-        nonlocal bit_pos
-        if bit_pos + code_size > data_bits:
-            return None
-        raw = 0
-        for i in range(code_size):
-            byte_index = (bit_pos + i) // 8
-            bit_index = (bit_pos + i) % 8
-            raw |= ((data[byte_index] >> bit_index) & 1) << i
-        bit_pos += code_size
-        return raw
-
-    while True:
-        code = read_code()
-        if code is None:
+    # The longest string is 4096 symbols, so this slack absorbs any overrun
+    # past ``expected_pixels`` without bounds checks in the loop.
+    output = bytearray(expected_pixels + 4096)
+    pos = 0
+    prev_pos = 0
+    prev_len = 0
+    prev_code = -1
+
+    bit_buffer = 0
+    bit_count = 0
+    byte_pos = 0
+    data_len = len(data)
+
+    while pos < expected_pixels:
+        while bit_count < code_size and byte_pos < data_len:
+            bit_buffer |= data[byte_pos] << bit_count
+            byte_pos += 1
+            bit_count += 8
+        if bit_count < code_size:
             break
+        code = bit_buffer & code_mask
+        bit_buffer >>= code_size
+        bit_count -= code_size
+
         if code == clear_code:
-            dictionary = {i: bytes([i]) for i in range(clear_code)}
             code_size = min_code_size + 1
             next_code = end_code + 1
             max_code = 1 << code_size
-            prev_code = None
+            code_mask = max_code - 1
+            prev_code = -1
             continue
         if code == end_code:
             break
 
-        if code in dictionary:
-            entry = dictionary[code]
-        elif prev_code is not None and code == next_code:
-            entry = dictionary[prev_code] + dictionary[prev_code][:1]
+        if code < clear_code:
+            output[pos] = code
+            length = 1
+        elif code < next_code and code > end_code:
+            length = lengths[code]
+            start = offsets[code]
+            output[pos : pos + length] = output[start : start + length]
+        elif prev_code >= 0 and code == next_code:
+            # KwKwK: the previous string followed by its own first symbol.
+            length = prev_len + 1
+            output[pos : pos + prev_len] = output[prev_pos : prev_pos + prev_len]
+            output[pos + prev_len] = output[prev_pos]
         else:
             raise GifDecodeError("Invalid LZW code encountered")
 
-        output.extend(entry)
-
-        if prev_code is not None:
-            dictionary[next_code] = dictionary[prev_code] + entry[:1]
+        if prev_code >= 0 and next_code < 4096:
+            offsets[next_code] = prev_pos
+            lengths[next_code] = prev_len + 1
             next_code += 1
             if next_code >= max_code and code_size < 12:
                 code_size += 1
                 max_code = 1 << code_size
+                code_mask = max_code - 1
 
         prev_code = code
+        prev_pos = pos
+        prev_len = length
+        pos += length
 
-        if len(output) >= expected_pixels:
-            break
-
-    return output[:expected_pixels]
+    del output[min(pos, expected_pixels) :]
+    return output
 
 
-def _deinterlace(indexes: list[int], width: int, height: int) -> list[int]:
-    out = [0] * (width * height)
+def _deinterlace(indexes: bytes | bytearray, width: int, height: int) -> bytearray:
+    out = bytearray(width * height)
     pos = 0
     for start, step in ((0, 8), (4, 8), (2, 4), (1, 2)):
         for y in range(start, height, step):
@@ -238,7 +365,14 @@ def _deinterlace(indexes: list[int], width: int, height: int) -> list[int]:
     return out
 
 
-def _read_gif(path: Path) -> tuple[int, int, list[Frame]]:
+def _iter_gif(path: Path) -> tuple[int, int, Iterator[Frame]]:
+    """Parse the GIF header and return a generator of composited frames.
+
+    Only the canvas and the frame being emitted are alive at any time, so
+    the caller can stream frames to a writer instead of holding them all.
+    Header errors are raised immediately; frame errors while iterating.
+    """
+
     data = path.read_bytes()
     if data[:6] not in GIF_SIGNATURES:
         raise GifDecodeError("Not a GIF file")
@@ -260,11 +394,25 @@ def _read_gif(path: Path) -> tuple[int, int, list[Frame]]:
 
     background_color = 0xFF000000
     if global_palette and bg_index < len(global_palette):
-        r, g, b, a = global_palette[bg_index]
-        background_color = (a << 24) | (r << 16) | (g << 8) | b
+        background_color = _palette_words(global_palette)[bg_index]
+
+    return width, height, _gif_frames(data, offset, width, height, global_palette, background_color)
+
 
-    frames: list[Frame] = []
-    canvas = [background_color] * (width * height)
+def _palette_words(palette: list[tuple[int, int, int, int]]) -> list[int]:
+    return [(a << 24) | (r << 16) | (g << 8) | b for r, g, b, a in palette]
+
+
+def _gif_frames(
+    data: bytes,
+    offset: int,
+    width: int,
+    height: int,
+    global_palette: list[tuple[int, int, int, int]],
+    background_color: int,
+) -> Iterator[Frame]:
+    canvas = array(_WORD_TYPECODE, [background_color]) * (width * height)
+    emitted = 0
 
     gce_delay_ms = 100
     gce_transparent: int | None = None
@@ -341,102 +489,660 @@ def _read_gif(path: Path) -> tuple[int, int, list[Frame]]:
         if interlace_flag:
             indexes = _deinterlace(indexes, frame_w, frame_h)
 
-        prev_canvas = list(canvas)
-        working = list(canvas)
-
-        for y in range(frame_h):
-            dest_y = top + y
-            if dest_y >= height:
-                continue
-            row_offset = y * frame_w
-            for x in range(frame_w):
-                dest_x = left + x
-                if dest_x >= width:
-                    continue
-                color_idx = indexes[row_offset + x]
-                if gce_transparent is not None and color_idx == gce_transparent:
-                    continue
-                if color_idx >= len(palette):
-                    raise GifDecodeError("Color index out of range")
-                r, g, b, a = palette[color_idx]
-                working[dest_y * width + dest_x] = (a << 24) | (r << 16) | (g << 8) | b
-
-        # Capture the fully composited frame.
-        frame_bytes = bytearray(width * height * 4)
-        for i, color in enumerate(working):
-            struct.pack_into(">I", frame_bytes, i * 4, color)
-        frames.append(Frame(gce_delay_ms, bytes(frame_bytes)))
+        # Clip the frame rectangle to the canvas once; only it is touched.
+        right = min(left + frame_w, width)
+        bottom = min(top + frame_h, height)
+        span = max(right - left, 0)
+        saved: list[array] = []
+        if gce_disposal == 3:  # Restore to previous: keep what we overwrite.
+            saved = [canvas[y * width + left : y * width + right] for y in range(top, bottom)]
+
+        # Out-of-range indexes map to None, which array() rejects below.
+        lookup: list[int | None] = _palette_words(palette)[:256]
+        lookup += [None] * (256 - len(lookup))
+        try:
+            for y in range(top, bottom):
+                row_start = (y - top) * frame_w
+                row = indexes[row_start : row_start + span]
+                dest = y * width + left
+                if gce_transparent is not None and gce_transparent in row:
+                    colors = [
+                        old if idx == gce_transparent else lookup[idx]
+                        for idx, old in zip(row, canvas[dest : dest + span])
+                    ]
+                else:
+                    colors = [lookup[idx] for idx in row]
+                canvas[dest : dest + span] = array(_WORD_TYPECODE, colors)
+        except TypeError:
+            raise GifDecodeError("Color index out of range") from None
+
+        # Capture the fully composited frame as big-endian ARGB32. Swapping
+        # the canvas in place and back avoids a third canvas-sized buffer.
+        if sys.byteorder == "little":
+            canvas.byteswap()
+            pixels = canvas.tobytes()
+            canvas.byteswap()
+        else:
+            pixels = canvas.tobytes()
+        yield Frame(gce_delay_ms, pixels)
+        del pixels
+        emitted += 1
 
         # Apply disposal method for the next frame.
         if gce_disposal == 2:  # Restore to background
-            for y in range(frame_h):
-                dest_y = top + y
-                if dest_y >= height:
-                    continue
-                for x in range(frame_w):
-                    dest_x = left + x
-                    if dest_x >= width:
-                        continue
-                    working[dest_y * width + dest_x] = background_color
-            canvas = working
+            fill = array(_WORD_TYPECODE, [background_color]) * span
+            for y in range(top, bottom):
+                canvas[y * width + left : y * width + right] = fill
         elif gce_disposal == 3:  # Restore to previous
-            canvas = prev_canvas
-        else:  # None or keep
-            canvas = working
+            for y, pixels in zip(range(top, bottom), saved):
+                canvas[y * width + left : y * width + right] = pixels
 
-    if not frames:
+    if not emitted:
         raise GifDecodeError("No frames found in GIF")
 
-    return width, height, frames
 
+def _read_gif(path: Path) -> tuple[int, int, list[Frame]]:
+    width, height, frames = _iter_gif(path)
+    return width, height, list(frames)
 
-def _write_d_module(out_path: Path, width: int, height: int, frames: list[Frame]) -> None:
-    if not frames:
-        raise RuntimeError("No frames to write")
 
-    duration_values = ", ".join(str(frame.duration_ms) for frame in frames)
-
-    frame_defs: list[str] = []
-    frame_names: list[str] = []
-    for idx, frame in enumerate(frames):
-        values = [f"0x{int.from_bytes(frame.pixels[i:i+4], 'big'):08X}" for i in range(0, len(frame.pixels), 4)]
-        lines = []
-        for i in range(0, len(values), 8):
-            lines.append(", ".join(values[i : i + 8]))
-        frame_defs.append(
-            f"enum uint[] wallpaperFrame{idx} = [\n    {"\n    ".join(lines)}\n];"
+def _merge_repeated_frames(frames: Iterable[Frame]) -> Iterator[Frame]:
+    """Fold runs of identical consecutive frames into one longer frame."""
+
+    pending: Frame | None = None
+    for frame in frames:
+        if pending is not None and pending.pixels == frame.pixels:
+            pending = Frame(pending.duration_ms + frame.duration_ms, frame.pixels)
+            continue
+        if pending is not None:
+            yield pending
+        pending = frame
+    if pending is not None:
+        yield pending
+
+
+def _tally(frames: Iterable[Frame], durations: list[int]) -> Iterator[Frame]:
+    """Pass frames through, recording each duration as it goes by."""
+
+    for frame in frames:
+        durations.append(frame.duration_ms)
+        yield frame
+
+
+class _FrameSlots:
+    """Give every distinct frame a storage slot, keeping only its digest."""
+
+    def __init__(self) -> None:
+        self._slots: dict[bytes, int] = {}
+        self.frame_map: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, pixels: bytes) -> int | None:
+        """Record the next frame; return its slot if it has not been seen."""
+
+        digest = hashlib.blake2b(pixels, digest_size=16).digest()
+        slot = self._slots.get(digest)
+        if slot is not None:
+            self.frame_map.append(slot)
+            return None
+        slot = self._slots[digest] = len(self._slots)
+        self.frame_map.append(slot)
+        return slot
+
+
+class _Palette:
+    """A shared palette of at most 256 colors, grown as frames arrive."""
+
+    def __init__(self) -> None:
+        self.colors: list[int] = []
+        self._lookup: dict[int, int] = {}
+
+    def index_frame(self, pixels: bytes) -> bytes:
+        """Return one palette index byte per big-endian ARGB32 pixel."""
+
+        words = struct.unpack(f">{len(pixels) // 4}I", pixels)
+        for color in sorted(set(words).difference(self._lookup)):
+            self._lookup[color] = len(self.colors)
+            self.colors.append(color)
+        if len(self.colors) > 256:
+            raise RuntimeError(
+                f"Wallpaper uses at least {len(self.colors)} colors; indexed output needs at most 256"
+            )
+        return bytes(map(self._lookup.__getitem__, words))
+
+
+@contextmanager
+def _atomic_open(path: Path, mode: str = "w") -> Iterator[IO]:
+    """Open a scratch file that replaces ``path`` only if the block succeeds.
+
+    A decode error halfway through a wallpaper then leaves the last good
+    output in place instead of a truncated one.
+    """
+
+    scratch = path.with_name(f".tmp.{path.name}")
+    try:
+        with scratch.open(mode) as handle:
+            yield handle
+    except BaseException:
+        scratch.unlink(missing_ok=True)
+        raise
+    os.replace(scratch, path)
+
+
+def _write_atomic(path: Path, data: str | bytes) -> None:
+    """Replace ``path`` with ``data`` in one rename."""
+
+    with _atomic_open(path, "wb" if isinstance(data, bytes) else "w") as out:
+        out.write(data)
+
+
+def _write_d_module(out_path: Path, width: int, height: int, frames: Iterable[Frame]) -> None:
+    durations: list[int] = []
+    slots = _FrameSlots()
+    with _atomic_open(out_path) as out:
+        out.write(
+            f"""// Auto-generated by tools/generate_wallpaper.py. Do not edit by hand.
+module anonymos.display.generated_wallpaper;
+
+import anonymos.display.wallpaper_types;
+
+nothrow:
+@nogc:
+
+enum uint wallpaperWidth  = {width};
+enum uint wallpaperHeight = {height};
+
+"""
+        )
+        # Frames are written as they arrive; repeats reuse an earlier array.
+        for frame in _tally(frames, durations):
+            slot = slots.add(frame.pixels)
+            if slot is None:
+                continue
+            words = struct.unpack(f">{len(frame.pixels) // 4}I", frame.pixels)
+            values = [f"0x{word:08X}" for word in words]
+            lines = []
+            for i in range(0, len(values), 8):
+                lines.append(", ".join(values[i : i + 8]))
+            body = "\n    ".join(lines)
+            out.write(f"enum uint[] wallpaperFrame{slot} = [\n    {body}\n];\n\n")
+
+        if not durations:
+            raise RuntimeError("No frames to write")
+
+        duration_values = ", ".join(str(duration) for duration in durations)
+        frame_list = "\n    ".join(f"wallpaperFrame{slot}" for slot in slots.frame_map)
+        out.write(
+            f"""enum uint[] wallpaperFrameDurations = [{duration_values}];
+
+enum const(uint[])[] wallpaperFrames = [
+    {frame_list}
+];
+"""
+        )
+
+
+def _little_endian_words(pixels: bytes) -> bytearray:
+    """Byte-swap big-endian ARGB32 pixels into the kernel's native word order."""
+
+    out = bytearray(len(pixels))
+    out[0::4] = pixels[3::4]
+    out[1::4] = pixels[2::4]
+    out[2::4] = pixels[1::4]
+    out[3::4] = pixels[0::4]
+    return out
+
+
+class PixelFormat(NamedTuple):
+    bpp: int
+    bgr: bool  # Matches Framebuffer.isBGR; ignored for 16bpp like the kernel does.
+
+
+# Native layouts framebuffer.d writes for each bpp/isBGR combination.
+PIXEL_FORMATS = {
+    "xrgb8888": PixelFormat(32, False),
+    "xbgr8888": PixelFormat(32, True),
+    "rgb888": PixelFormat(24, False),
+    "bgr888": PixelFormat(24, True),
+    "rgb565": PixelFormat(16, False),
+}
+
+# 4x4 ordered-dither thresholds, in sixteenths.
+_BAYER_4X4 = (0, 8, 2, 10, 12, 4, 14, 6, 3, 11, 1, 9, 15, 7, 13, 5)
+
+
+def _parse_modes(text: str) -> list[tuple[int, int]]:
+    """Parse ``WxH[,WxH...]`` for ``--target``."""
+
+    modes = []
+    for part in text.split(","):
+        try:
+            width, height = (int(value) for value in part.lower().split("x"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid mode {part!r}; expected WIDTHxHEIGHT") from None
+        if width <= 0 or height <= 0:
+            raise argparse.ArgumentTypeError(f"invalid mode {part!r}; dimensions must be positive")
+        modes.append((width, height))
+    return modes
+
+
+def _box_taps(src: int, dst: int) -> list[list[tuple[int, int]]]:
+    """Integer area weights mapping ``src`` samples onto ``dst``.
+
+    Output sample ``i`` covers ``[i * src, (i + 1) * src)`` measured in
+    units of ``1 / dst`` source samples, so every weight is an integer and
+    each output's weights sum to ``src``.
+    """
+
+    taps = []
+    for i in range(dst):
+        lo, hi = i * src, (i + 1) * src
+        taps.append(
+            [(j, min(hi, (j + 1) * dst) - max(lo, j * dst)) for j in range(lo // dst, (hi - 1) // dst + 1)]
         )
-        frame_names.append(f"wallpaperFrame{idx}")
+    return taps
+
+
+def _box_scale(pixels: bytes, src_w: int, src_h: int, dst_w: int, dst_h: int) -> list[list[int]]:
+    """Area-filter ARGB32 pixels to ``dst_w`` x ``dst_h``.
+
+    Returns A, R, G, B planes of weighted sums; divide by ``src_w * src_h``
+    for the channel value. Keeping the sums exact lets the NumPy path and
+    the dithering step agree bit for bit with this one.
+    """
+
+    x_taps = _box_taps(src_w, dst_w)
+    y_taps = _box_taps(src_h, dst_h)
+    planes = []
+    for channel in range(4):
+        samples = pixels[channel::4]
+        rows = []
+        for y in range(src_h):
+            row = samples[y * src_w : (y + 1) * src_w]
+            rows.append([sum(row[j] * weight for j, weight in taps) for taps in x_taps])
+        plane: list[int] = []
+        for taps in y_taps:
+            acc = [0] * dst_w
+            for j, weight in taps:
+                acc = [total + value * weight for total, value in zip(acc, rows[j])]
+            plane.extend(acc)
+        planes.append(plane)
+    return planes
+
+
+def _encode_native(
+    planes: list[list[int]], denominator: int, width: int, height: int, fmt: PixelFormat, dither: bool
+) -> bytes:
+    """Convert weighted-sum planes into framebuffer-native little-endian pixels."""
+
+    _, red, green, blue = planes
+    if fmt.bpp == 16:
+        if dither:
+            # floor(value * levels / 255 + threshold) computed exactly, with
+            # the Bayer threshold centred in its sixteenth.
+            scale = 32 * 255 * denominator
+            thresholds = [
+                (2 * _BAYER_4X4[(y & 3) * 4 + (x & 3)] + 1) * 255 * denominator
+                for y in range(height)
+                for x in range(width)
+            ]
+
+            def quantize(plane: list[int], levels: int) -> list[int]:
+                return [min(levels, (32 * levels * t + th) // scale) for t, th in zip(plane, thresholds)]
+
+            r5, g6, b5 = quantize(red, 31), quantize(green, 63), quantize(blue, 31)
+        else:
+            # Round to 8 bits, then convert exactly like argbToRgb565().
+            r5 = [((2 * t + denominator) // (2 * denominator)) * 31 // 255 for t in red]
+            g6 = [((2 * t + denominator) // (2 * denominator)) * 63 // 255 for t in green]
+            b5 = [((2 * t + denominator) // (2 * denominator)) * 31 // 255 for t in blue]
+        words = array("H", [r << 11 | g << 5 | b for r, g, b in zip(r5, g6, b5)])
+        if sys.byteorder == "big":
+            words.byteswap()
+        return words.tobytes()
+
+    r8, g8, b8 = (bytes((2 * t + denominator) // (2 * denominator) for t in plane) for plane in (red, green, blue))
+    low, high = (r8, b8) if fmt.bgr else (b8, r8)
+    step = fmt.bpp // 8
+    out = bytearray(width * height * step)
+    out[0::step] = low
+    out[1::step] = g8
+    out[2::step] = high
+    return bytes(out)
+
+
+def _scale_to_mode_numpy(
+    pixels: bytes, src_w: int, src_h: int, mode: tuple[int, int], fmt: PixelFormat, dither: bool
+) -> bytes:
+    """NumPy variant of :func:`_box_scale` plus :func:`_encode_native`."""
+
+    dst_w, dst_h = mode
+
+    def weights(src: int, dst: int) -> "_np.ndarray":
+        matrix = _np.zeros((dst, src))
+        for i, taps in enumerate(_box_taps(src, dst)):
+            for j, weight in taps:
+                matrix[i, j] = weight
+        return matrix
+
+    # Integer weights and 8-bit samples keep every sum exact in float64.
+    image = _np.frombuffer(pixels, dtype=_np.uint8).reshape(src_h, src_w, 4).astype(_np.float64)
+    wx, wy = weights(src_w, dst_w), weights(src_h, dst_h)
+    totals = _np.stack([wy @ image[:, :, c] @ wx.T for c in range(1, 4)]).astype(_np.int64)
+    denominator = src_w * src_h
+    red, green, blue = totals
+
+    if fmt.bpp == 16:
+        if dither:
+            ys, xs = _np.indices((dst_h, dst_w))
+            threshold = (2 * _np.array(_BAYER_4X4)[(ys & 3) * 4 + (xs & 3)] + 1) * 255 * denominator
+            scale = 32 * 255 * denominator
+            r5 = _np.minimum(31, (32 * 31 * red + threshold) // scale)
+            g6 = _np.minimum(63, (32 * 63 * green + threshold) // scale)
+            b5 = _np.minimum(31, (32 * 31 * blue + threshold) // scale)
+        else:
+            r5, g6, b5 = (
+                ((2 * plane + denominator) // (2 * denominator)) * levels // 255
+                for plane, levels in ((red, 31), (green, 63), (blue, 31))
+            )
+        return (r5 << 11 | g6 << 5 | b5).astype("<u2").tobytes()
+
+    r8, g8, b8 = ((2 * plane + denominator) // (2 * denominator) for plane in (red, green, blue))
+    low, high = (r8, b8) if fmt.bgr else (b8, r8)
+    step = fmt.bpp // 8
+    out = _np.zeros((dst_h, dst_w, step), dtype=_np.uint8)
+    out[:, :, 0], out[:, :, 1], out[:, :, 2] = low, g8, high
+    return out.tobytes()
 
+
+def _scale_to_mode(
+    pixels: bytes, src_w: int, src_h: int, mode: tuple[int, int], fmt: PixelFormat, dither: bool = False
+) -> bytes:
+    """Box-filter one ARGB32 frame to ``mode`` in the framebuffer's native layout."""
+
+    if _np is not None:
+        return _scale_to_mode_numpy(pixels, src_w, src_h, mode, fmt, dither)
+    dst_w, dst_h = mode
+    planes = _box_scale(pixels, src_w, src_h, dst_w, dst_h)
+    return _encode_native(planes, src_w * src_h, dst_w, dst_h, fmt, dither)
+
+
+def _string_import_name(blob_path: Path, string_import_root: Path) -> str:
+    try:
+        return blob_path.resolve().relative_to(string_import_root.resolve()).as_posix()
+    except ValueError:
+        raise RuntimeError(
+            f"{blob_path} is not under the string import directory {string_import_root}"
+        ) from None
+
+
+def _write_binary_asset(
+    out_path: Path,
+    string_import_root: Path,
+    width: int,
+    height: int,
+    frames: Iterable[Frame],
+    indexed: bool = False,
+    targets: Sequence[tuple[int, int]] = (),
+    pixel_format: str = "xrgb8888",
+    dither: bool = False,
+) -> Path:
+    """Write the pixels to a ``.bin`` next to ``out_path`` plus a metadata module.
+
+    ldc2 pulls the blob in with ``import()`` as a single string literal, so
+    neither the generator nor the compiler has to walk one array element per
+    pixel. Identical frames are stored once. With ``indexed`` every pixel is
+    one byte into a shared 256-entry palette. Each of ``targets`` adds a
+    ``<stem>_<W>x<H>.bin`` with the frames box-filtered to that mode in the
+    framebuffer's native ``pixel_format``. Returns the path of the blob.
+    """
+
+    blob_path = out_path.with_suffix(".bin")
+    import_name = _string_import_name(blob_path, string_import_root)
+    fmt = PIXEL_FORMATS[pixel_format]
+    mode_paths = [out_path.with_name(f"{out_path.stem}_{w}x{h}.bin") for w, h in targets]
+    mode_names = [_string_import_name(path, string_import_root) for path in mode_paths]
+    durations: list[int] = []
+    slots = _FrameSlots()
+    palette = _Palette()
+
+    with ExitStack() as stack:
+        blob = stack.enter_context(_atomic_open(blob_path, "wb"))
+        mode_blobs = [stack.enter_context(_atomic_open(path, "wb")) for path in mode_paths]
+        for frame in _tally(frames, durations):
+            if slots.add(frame.pixels) is None:
+                continue
+            if indexed:
+                blob.write(palette.index_frame(frame.pixels))
+            else:
+                blob.write(_little_endian_words(frame.pixels))
+            for mode, mode_blob in zip(targets, mode_blobs):
+                mode_blob.write(_scale_to_mode(frame.pixels, width, height, mode, fmt, dither))
+
+        if not durations:
+            raise RuntimeError("No frames to write")
+
+    if indexed:
+        colors = palette.colors + [0] * (256 - len(palette.colors))
+        palette_values = ", ".join(f"0x{color:08X}" for color in colors)
+        pixel_decl = f"""enum uint[] wallpaperPalette = [{palette_values}];
+
+// Frames back to back, one palette index per pixel.
+align(16) immutable ubyte[wallpaperWidth * wallpaperHeight * {len(slots)}] wallpaperIndexData =
+    cast(immutable(ubyte)[]) import("{import_name}");"""
+    else:
+        pixel_decl = f"""// Frames back to back as little-endian ARGB32 words, width * height per frame.
+align(16) immutable ubyte[wallpaperWidth * wallpaperHeight * 4 * {len(slots)}] wallpaperPixelData =
+    cast(immutable(ubyte)[]) import("{import_name}");"""
+
+    if targets:
+        mode_values = ", ".join(f"[{w}, {h}]" for w, h in targets)
+        mode_decls = "\n".join(
+            f"""align(16) immutable ubyte[{w} * {h} * {fmt.bpp // 8} * {len(slots)}] wallpaperNative{i} =
+    cast(immutable(ubyte)[]) import("{name}");"""
+            for i, ((w, h), name) in enumerate(zip(targets, mode_names))
+        )
+        mode_cases = "\n".join(
+            f"        case {i}: return wallpaperNative{i}[];" for i in range(len(targets))
+        )
+        pixel_decl += f"""
+
+// Frames pre-scaled for specific framebuffer modes, already in the native
+// pixel layout, so a matching framebuffer takes one copy per scanline.
+enum uint wallpaperNativeBpp = {fmt.bpp};
+enum bool wallpaperNativeIsBGR = {"true" if fmt.bgr else "false"};
+enum uint[2][] wallpaperNativeModes = [{mode_values}];
+
+{mode_decls}
+
+immutable(ubyte)[] wallpaperNativeData(size_t mode)
+{{
+    switch (mode)
+    {{
+{mode_cases}
+        default: return null;
+    }}
+}}"""
+
+    duration_values = ", ".join(str(duration) for duration in durations)
+    map_values = ", ".join(str(slot) for slot in slots.frame_map)
     content = f"""// Auto-generated by tools/generate_wallpaper.py. Do not edit by hand.
-module minimal_os.display.generated_wallpaper;
+module anonymos.display.generated_wallpaper;
 
-import minimal_os.display.wallpaper_types;
+nothrow:
+@nogc:
+
+enum uint wallpaperWidth  = {width};
+enum uint wallpaperHeight = {height};
+enum uint wallpaperFrameCount = {len(durations)};
+
+enum uint[] wallpaperFrameDurations = [{duration_values}];
+
+// Stored frame shown at each step; repeated frames are stored once.
+enum uint[] wallpaperFrameMap = [{map_values}];
+
+{pixel_decl}
+"""
+    _write_atomic(out_path, content)
+    return blob_path
+
+
+# Op words in the delta stream: the top four bits select the op, the rest
+# hold a pixel count. RUN is followed by one color word, LITERAL by ``count``.
+DELTA_OP_SKIP = 0
+DELTA_OP_RUN = 1
+DELTA_OP_LITERAL = 2
+DELTA_COUNT_MASK = 0x0FFFFFFF
+_MIN_RUN = 3
+
+
+def _encode_span(words: list[int], colors: tuple[int, ...]) -> None:
+    """Append RUN/LITERAL ops covering ``colors`` to ``words``."""
+
+    literal: list[int] = []
+    for color, group in groupby(colors):
+        count = len(list(group))
+        if count < _MIN_RUN:
+            literal.extend([color] * count)
+            continue
+        if literal:
+            words.append(DELTA_OP_LITERAL << 28 | len(literal))
+            words.extend(literal)
+            literal = []
+        words.append(DELTA_OP_RUN << 28 | count)
+        words.append(color)
+    if literal:
+        words.append(DELTA_OP_LITERAL << 28 | len(literal))
+        words.extend(literal)
+
+
+def _dirty_rect(
+    current: tuple[int, ...], previous: tuple[int, ...], width: int, height: int
+) -> tuple[int, int, int, int]:
+    rows = [
+        y
+        for y in range(height)
+        if current[y * width : (y + 1) * width] != previous[y * width : (y + 1) * width]
+    ]
+    if not rows:
+        return 0, 0, 0, 0
+    left, right = width, 0
+    for y in rows:
+        start = y * width
+        cur = current[start : start + width]
+        prev = previous[start : start + width]
+        first = next(x for x in range(width) if cur[x] != prev[x])
+        last = next(x for x in range(width - 1, -1, -1) if cur[x] != prev[x])
+        left = min(left, first)
+        right = max(right, last + 1)
+    return left, rows[0], right - left, rows[-1] - rows[0] + 1
+
+
+def _encode_delta_frames(
+    width: int, height: int, frames: Iterable[Frame], keyframe_interval: int = 0
+) -> tuple[list[int], array]:
+    """Encode frames as keyframes plus dirty-rect deltas of RLE spans.
+
+    Each frame is ``x, y, w, h`` followed by ops covering the rectangle one
+    row at a time; ops never straddle rows. Keyframes span the whole canvas
+    and never skip, so playback can start or loop back at any of them; the
+    first frame is always one. Returns the word offset of every frame (plus
+    the end of the stream) and the little-endian ARGB32 word stream.
+    """
+
+    words: list[int] = []
+    offsets: list[int] = []
+    previous: tuple[int, ...] | None = None
+    for index, frame in enumerate(frames):
+        offsets.append(len(words))
+        current = struct.unpack(f">{width * height}I", frame.pixels)
+        keyframe = previous is None or (keyframe_interval > 0 and index % keyframe_interval == 0)
+        if keyframe:
+            x, y, w, h = 0, 0, width, height
+        else:
+            x, y, w, h = _dirty_rect(current, previous, width, height)
+        words.extend((x, y, w, h))
+        for row in range(y, y + h):
+            start = row * width + x
+            cur = current[start : start + w]
+            if keyframe:
+                _encode_span(words, cur)
+                continue
+            prev = previous[start : start + w]
+            pos = 0
+            for is_changed, group in groupby(a != b for a, b in zip(cur, prev)):
+                count = len(list(group))
+                if is_changed:
+                    _encode_span(words, cur[pos : pos + count])
+                else:
+                    words.append(DELTA_OP_SKIP << 28 | count)
+                pos += count
+        previous = current
+    offsets.append(len(words))
+
+    stream = array("I", words)
+    if sys.byteorder == "big":
+        stream.byteswap()
+    return offsets, stream
+
+
+def _write_delta_asset(
+    out_path: Path,
+    string_import_root: Path,
+    width: int,
+    height: int,
+    frames: Iterable[Frame],
+    keyframe_interval: int = 0,
+) -> Path:
+    """Like :func:`_write_binary_asset`, but the blob is a delta stream."""
+
+    if width > DELTA_COUNT_MASK:
+        raise RuntimeError(f"Wallpaper is too wide for the delta format ({width} pixels)")
+
+    blob_path = out_path.with_suffix(".bin")
+    import_name = _string_import_name(blob_path, string_import_root)
+    durations: list[int] = []
+    offsets, stream = _encode_delta_frames(width, height, _tally(frames, durations), keyframe_interval)
+    if not durations:
+        raise RuntimeError("No frames to write")
+    _write_atomic(blob_path, stream.tobytes())
+
+    duration_values = ", ".join(str(duration) for duration in durations)
+    offset_values = ", ".join(str(offset) for offset in offsets)
+    content = f"""// Auto-generated by tools/generate_wallpaper.py. Do not edit by hand.
+module anonymos.display.generated_wallpaper;
 
 nothrow:
 @nogc:
 
 enum uint wallpaperWidth  = {width};
 enum uint wallpaperHeight = {height};
+enum uint wallpaperFrameCount = {len(durations)};
 
 enum uint[] wallpaperFrameDurations = [{duration_values}];
 
-{"\n\n".join(frame_defs)}
+// Word offset of each frame in wallpaperDeltaData, plus the end of the stream.
+enum uint[] wallpaperFrameOffsets = [{offset_values}];
 
-enum const(uint[])[] wallpaperFrames = [
-    {"\n    ".join(frame_names)}
-];
+// Little-endian uint words. Each frame is x, y, w, h, then per row of that
+// rectangle ops whose top four bits are 0 = skip, 1 = run of the next word,
+// 2 = literal of the next count words; the low 28 bits hold the count.
+align(16) immutable ubyte[{len(stream) * 4}] wallpaperDeltaData =
+    cast(immutable(ubyte)[]) import("{import_name}");
 """
-    out_path.write_text(content)
+    _write_atomic(out_path, content)
+    return blob_path
 
 
-def _read_image(path: Path) -> tuple[int, int, list[Frame]]:
+def _read_image(path: Path) -> tuple[int, int, Iterable[Frame]]:
     with path.open("rb") as handle:
-        header = handle.read(6)
-    if header.startswith(PNG_SIGNATURE):
+        header = handle.read(len(PNG_SIGNATURE))
+    if header == PNG_SIGNATURE:
         return _read_png(path)
-    if header in GIF_SIGNATURES:
-        return _read_gif(path)
+    if header[:6] in GIF_SIGNATURES:
+        return _iter_gif(path)
     raise RuntimeError("Unsupported wallpaper format. Please use PNG or GIF.")
 
 
@@ -450,22 +1156,96 @@ def main() -> int:
     )
     parser.add_argument(
         "--output",
-        default=Path("src/minimal_os/display/generated_wallpaper.d"),
+        default=Path("src/anonymos/display/generated_wallpaper.d"),
         type=Path,
         help="Destination D module",
     )
+    parser.add_argument(
+        "--format",
+        choices=("d", "bin", "delta"),
+        default="d",
+        help="Embed pixels as D array literals, a raw .bin string import next to the module, "
+        "or a .bin of keyframes plus RLE dirty-rect deltas",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=0,
+        help="Emit a full keyframe every N frames in delta format (default: first frame only)",
+    )
+    parser.add_argument(
+        "--indexed",
+        action="store_true",
+        help="Store one byte per pixel plus a 256-color palette (bin format; suits GIF sources)",
+    )
+    parser.add_argument(
+        "--string-import-dir",
+        default=Path("src/anonymos"),
+        type=Path,
+        help="-J directory the kernel build resolves the .bin against (bin and delta formats)",
+    )
+    parser.add_argument(
+        "--target",
+        type=_parse_modes,
+        action="extend",
+        default=[],
+        metavar="WxH[,WxH...]",
+        help="Also store frames box-filtered to these framebuffer modes (bin format; repeatable)",
+    )
+    parser.add_argument(
+        "--pixel-format",
+        choices=sorted(PIXEL_FORMATS),
+        default="xrgb8888",
+        help="Native framebuffer layout for --target frames (default: xrgb8888)",
+    )
+    parser.add_argument(
+        "--dither",
+        action="store_true",
+        help="Ordered-dither --target frames when the pixel format has fewer than 8 bits per channel",
+    )
     args = parser.parse_args()
-
+    if args.indexed and args.format != "bin":
+        parser.error("--indexed requires --format bin")
+    if args.target and args.format != "bin":
+        parser.error("--target requires --format bin")
+
+    # GIF frames are decoded lazily while the writer consumes them, so
+    # decode errors can surface from any of the calls below.
+    durations: list[int] = []
     try:
         width, height, frames = _read_image(args.input)
+        frames = _tally(_merge_repeated_frames(frames), durations)
+
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        if args.format == "bin":
+            blob_path = _write_binary_asset(
+                args.output,
+                args.string_import_dir,
+                width,
+                height,
+                frames,
+                args.indexed,
+                args.target,
+                args.pixel_format,
+                args.dither,
+            )
+            print(f"Wrote wallpaper pixels to {blob_path}")
+            for target_w, target_h in args.target:
+                mode_path = args.output.with_name(f"{args.output.stem}_{target_w}x{target_h}.bin")
+                print(f"Wrote {target_w}x{target_h} {args.pixel_format} pixels to {mode_path}")
+        elif args.format == "delta":
+            blob_path = _write_delta_asset(
+                args.output, args.string_import_dir, width, height, frames, args.keyframe_interval
+            )
+            print(f"Wrote wallpaper pixels to {blob_path}")
+        else:
+            _write_d_module(args.output, width, height, frames)
     except (OSError, RuntimeError, PngDecodeError, GifDecodeError) as exc:  # noqa: PERF203
         parser.error(str(exc))
         return 1
 
-    args.output.parent.mkdir(parents=True, exist_ok=True)
-    _write_d_module(args.output, width, height, frames)
     print(
-        f"Wrote wallpaper module to {args.output} ({width}x{height}, {len(frames)} frame{'s' if len(frames) != 1 else ''})"
+        f"Wrote wallpaper module to {args.output} ({width}x{height}, {len(durations)} frame{'s' if len(durations) != 1 else ''})"
     )
     return 0
 
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Pack a directory into the kernel's initrd: a tar with page-aligned files and an index.
+
+The output is an ordinary ustar archive (``tar -tf`` lists it and
+fs.d's parseTarball() walks it as before), with three additions:
+
+* every non-empty file payload starts on a 4 KiB boundary, so the kernel
+  can map it in place; the gap is filled by a pax extended header whose
+  ``comment`` record tar ignores;
+* after the end-of-archive blocks comes an index of regular files sorted
+  by path bytes, for binary search;
+* the last 16 bytes are a trailer pointing at the index.
+
+Index layout (little-endian)::
+
+    header  magic "INITRDIX", u32 version, u32 count, u32 entry size,
+            u32 reserved, u64 string table offset (from index start)
+    entry   u64 data offset, u64 size, u64 stored size, u32 name offset,
+            u32 name length, u32 mode, u32 flags          (``count`` times)
+    strings the paths, without a leading "./" or "/"
+    trailer u64 index offset, magic "INITRDIX"             (end of file)
+
+Data offsets are absolute. With ``--compress`` the file is no longer a
+tar: the index comes first and each payload is a separate zlib stream
+(flag bit 0), so single files can still be found and inflated on their own.
+Entry order, ownership and timestamps are normalized so identical trees
+produce identical archives.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import os
+import stat
+import struct
+import sys
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple
+
+BLOCK = 512
+PAGE = 4096
+INDEX_MAGIC = b"INITRDIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<8sIIIIQ")
+INDEX_ENTRY = struct.Struct("<QQQIIII")
+INDEX_TRAILER = struct.Struct("<Q8s")
+FLAG_ZLIB = 1
+_MAX_OCTAL_SIZE = 8**11 - 1
+
+
+@dataclass(frozen=True)
+class Member:
+    path: str  # archive path, "/"-separated, no leading "./"
+    source: Path
+    kind: str  # "file", "dir" or "symlink"
+    mode: int
+    size: int = 0
+    link: str = ""
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    path: str
+    offset: int
+    size: int
+    stored_size: int
+    mode: int
+    flags: int = 0
+
+
+def collect_members(root: Path, excludes: Sequence[str] = ()) -> List[Member]:
+    """Walk ``root`` in a stable order, skipping paths that match an exclude glob."""
+
+    members: List[Member] = []
+
+    def excluded(relative: str) -> bool:
+        for pattern in excludes:
+            if fnmatch.fnmatch(relative, pattern) or relative.startswith(pattern.rstrip("/") + "/"):
+                return True
+        return False
+
+    def walk(directory: Path, prefix: str) -> None:
+        with os.scandir(directory) as entries:
+            names = sorted(entries, key=lambda entry: entry.name.encode())
+        for entry in names:
+            relative = f"{prefix}{entry.name}"
+            if excluded(relative):
+                continue
+            info = entry.stat(follow_symlinks=False)
+            mode = stat.S_IMODE(info.st_mode)
+            if stat.S_ISLNK(info.st_mode):
+                members.append(Member(relative, Path(entry.path), "symlink", 0o777, link=os.readlink(entry.path)))
+            elif stat.S_ISDIR(info.st_mode):
+                members.append(Member(relative, Path(entry.path), "dir", mode))
+                walk(Path(entry.path), relative + "/")
+            elif stat.S_ISREG(info.st_mode):
+                if info.st_size > _MAX_OCTAL_SIZE:
+                    raise SystemExit(f"{relative} is too large for a ustar entry ({info.st_size} bytes)")
+                members.append(Member(relative, Path(entry.path), "file", mode, info.st_size))
+            else:
+                print(f"[warn] Skipping special file {relative}", file=sys.stderr)
+
+    walk(root, "")
+    return members
+
+
+def _pax_record(key: str, value: str) -> bytes:
+    body = f" {key}={value}\n".encode()
+    length = len(body) + 1
+    while len(str(length)) + len(body) != length:
+        length += 1
+    return str(length).encode() + body
+
+
+def _pax_padding(size: int) -> bytes:
+    """A ``comment`` record exactly ``size`` bytes long (size must be at least 12)."""
+
+    for digits in range(2, 12):
+        filler = size - digits - len(" comment=\n")
+        if filler >= 0 and len(str(size)) == digits:
+            return f"{size} comment={'0' * filler}\n".encode()
+    raise ValueError(f"cannot build a {size}-byte pax record")
+
+
+def _octal(value: int, width: int) -> bytes:
+    return f"{value:0{width - 1}o}".encode() + b"\0"
+
+
+def _split_name(name: str) -> Optional[Tuple[bytes, bytes]]:
+    """``(prefix, name)`` ustar fields for ``name``, or None if it needs a pax ``path``.
+
+    The split never happens at a directory's trailing slash: an empty
+    ``name`` field reads as the end of the archive to fs.d's parseTarball().
+    """
+
+    raw = name.encode()
+    if len(raw) <= 100:
+        return b"", raw
+    stem, slash = (name[:-1], "/") if name.endswith("/") else (name, "")
+    head, _, tail = stem.rpartition("/")
+    tail += slash
+    if head and len(head.encode()) <= 155 and len(tail.encode()) <= 100:
+        return head.encode(), tail.encode()
+    return None
+
+
+def _header(name: str, size: int, typeflag: bytes, mode: int, mtime: int, link: str = "") -> bytes:
+    """A ustar header; names that do not fit are carried by a preceding pax record."""
+
+    prefix, raw_name = _split_name(name) or (b"", name.encode()[:100])
+    header = bytearray(BLOCK)
+    header[0:100] = raw_name.ljust(100, b"\0")
+    header[100:108] = _octal(mode, 8)
+    header[108:116] = _octal(0, 8)
+    header[116:124] = _octal(0, 8)
+    header[124:136] = _octal(size, 12)
+    header[136:148] = _octal(mtime, 12)
+    header[148:156] = b" " * 8
+    header[156:157] = typeflag
+    header[157:257] = link.encode()[:100].ljust(100, b"\0")
+    header[257:263] = b"ustar\0"
+    header[263:265] = b"00"
+    header[265:297] = b"root".ljust(32, b"\0")
+    header[297:329] = b"root".ljust(32, b"\0")
+    header[345:500] = prefix.ljust(155, b"\0")
+    header[148:156] = f"{sum(header):06o}".encode() + b"\0 "
+    return bytes(header)
+
+
+def _needs_pax_path(name: str) -> bool:
+    return _split_name(name) is None
+
+
+def _copy(source: Path, out: BinaryIO, size: int) -> None:
+    with source.open("rb") as handle:
+        remaining = size
+        while remaining:
+            chunk = handle.read(min(remaining, 1 << 20))
+            if not chunk:
+                raise SystemExit(f"{source} shrank while it was being packed")
+            out.write(chunk)
+            remaining -= len(chunk)
+
+
+def _write_index(out: BinaryIO, entries: Sequence[IndexEntry]) -> int:
+    """Write the index block (entries sorted by path bytes) and return its offset."""
+
+    ordered = sorted(entries, key=lambda entry: entry.path.encode())
+    strings = bytearray()
+    records = bytearray()
+    for entry in ordered:
+        name = entry.path.encode()
+        records += INDEX_ENTRY.pack(
+            entry.offset, entry.size, entry.stored_size, len(strings), len(name), entry.mode, entry.flags
+        )
+        strings += name
+    offset = out.tell()
+    strings_offset = INDEX_HEADER.size + len(records)
+    out.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(ordered), INDEX_ENTRY.size, 0, strings_offset))
+    out.write(records)
+    out.write(strings)
+    return offset
+
+
+def write_tar(members: Iterable[Member], out: BinaryIO, mtime: int = 0) -> List[IndexEntry]:
+    """Write ``members`` as a page-aligned ustar archive followed by the index and trailer."""
+
+    index: List[IndexEntry] = []
+    for member in members:
+        name = member.path + "/" if member.kind == "dir" else member.path
+        records = b""
+        if _needs_pax_path(name):
+            records += _pax_record("path", name)
+        if len(member.link.encode()) > 100:
+            records += _pax_record("linkpath", member.link)
+
+        position = out.tell()
+        aligned = member.kind == "file" and member.size > 0
+        if aligned or records:
+            if not records and (position + BLOCK) % PAGE == 0:
+                pax_size = None
+            else:
+                pax_size = -(-len(records) // BLOCK) * BLOCK
+                if aligned:
+                    pax_size += -(position + 2 * BLOCK + pax_size) % PAGE
+                if 0 < pax_size - len(records) < 12:
+                    # Too small for a filler record; grow by a block (a page when aligning).
+                    pax_size += PAGE if aligned else BLOCK
+            if pax_size is not None:
+                payload = records + (_pax_padding(pax_size - len(records)) if pax_size > len(records) else b"")
+                out.write(_header(f"PaxHeaders/{member.path}"[:100], len(payload), b"x", 0o644, mtime))
+                out.write(payload)
+
+        if member.kind == "dir":
+            out.write(_header(name, 0, b"5", member.mode, mtime))
+        elif member.kind == "symlink":
+            out.write(_header(member.path, 0, b"2", member.mode, mtime, member.link))
+        else:
+            out.write(_header(member.path, member.size, b"0", member.mode, mtime))
+            data_offset = out.tell()
+            _copy(member.source, out, member.size)
+            out.write(b"\0" * (-member.size % BLOCK))
+            index.append(IndexEntry(member.path, data_offset, member.size, member.size, member.mode))
+
+    out.write(b"\0" * (2 * BLOCK))
+    index_offset = _write_index(out, index)
+    out.write(INDEX_TRAILER.pack(index_offset, INDEX_MAGIC))
+    return index
+
+
+def write_compressed(members: Iterable[Member], out: BinaryIO, level: int = 9) -> List[IndexEntry]:
+    """Write the index first, then one zlib stream per regular file."""
+
+    files = [member for member in members if member.kind == "file"]
+    streams = [zlib.compress(member.source.read_bytes(), level) for member in files]
+    names = sum(len(member.path.encode()) for member in files)
+    data_offset = INDEX_HEADER.size + INDEX_ENTRY.size * len(files) + names
+    index: List[IndexEntry] = []
+    for member, stream in zip(files, streams):
+        index.append(IndexEntry(member.path, data_offset, member.size, len(stream), member.mode, FLAG_ZLIB))
+        data_offset += len(stream)
+    # Payload offsets were computed in file order; the index itself is sorted.
+    _write_index(out, index)
+    for stream in streams:
+        out.write(stream)
+    out.write(INDEX_TRAILER.pack(0, INDEX_MAGIC))
+    return index
+
+
+def read_index(blob: bytes) -> List[IndexEntry]:
+    """Parse the index of a packed initrd (either variant) via its trailer."""
+
+    if len(blob) < INDEX_TRAILER.size:
+        raise ValueError("initrd is too small to hold an index")
+    index_offset, magic = INDEX_TRAILER.unpack_from(blob, len(blob) - INDEX_TRAILER.size)
+    if magic != INDEX_MAGIC:
+        raise ValueError("initrd has no index trailer")
+    magic, version, count, entry_size, _, strings_offset = INDEX_HEADER.unpack_from(blob, index_offset)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION or entry_size != INDEX_ENTRY.size:
+        raise ValueError("unsupported initrd index")
+    strings = index_offset + strings_offset
+    entries = []
+    for i in range(count):
+        offset, size, stored, name_offset, name_length, mode, flags = INDEX_ENTRY.unpack_from(
+            blob, index_offset + INDEX_HEADER.size + i * entry_size
+        )
+        path = blob[strings + name_offset : strings + name_offset + name_length].decode()
+        entries.append(IndexEntry(path, offset, size, stored, mode, flags))
+    return entries
+
+
+def pack(
+    root: Path,
+    output: Path,
+    excludes: Sequence[str] = (),
+    compress: bool = False,
+    mtime: int = 0,
+) -> List[IndexEntry]:
+    if not root.is_dir():
+        raise SystemExit(f"Initrd source directory not found: {root}")
+    members = collect_members(root, excludes)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    scratch = output.with_name(f".tmp.{output.name}")
+    with scratch.open("wb") as out:
+        index = write_compressed(members, out) if compress else write_tar(members, out, mtime)
+    os.replace(scratch, output)
+    return index
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pack a directory into a page-aligned, indexed initrd")
+    parser.add_argument("source", type=Path, help="Directory to pack (becomes the initrd root)")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Archive to write")
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Relative path or glob to leave out (repeatable), e.g. usr/share/install",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Write the zlib-per-file variant instead of a tar (not mappable in place)",
+    )
+    args = parser.parse_args()
+
+    # Honour SOURCE_DATE_EPOCH for reproducible builds; default to the epoch.
+    mtime = int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
+    index = pack(args.source, args.output, args.exclude, args.compress, mtime)
+    total = sum(entry.size for entry in index)
+    print(f"[ok] Packed {len(index)} files ({total} bytes) into {args.output} ({args.output.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
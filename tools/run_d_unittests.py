@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Build and run the unittests of each D module separately, in parallel.
+
+Every module under src/anonymos that contains a ``unittest`` block gets
+its own executable: the module is compiled with ``-unittest`` next to a
+generated runner whose module unit tester only runs that module's tests,
+with its imports pulled in via ``-i``. Executables are built and run
+concurrently with a per-module timeout, and the results (pass, fail,
+timeout or compile error, with durations) are printed and written as
+JUnit XML.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import os
+import re
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SOURCE_ROOT = ROOT / "src" / "anonymos"
+# The kernel build's search paths (scripts/buildscript.sh, tools/build_kernel.py).
+DEFAULT_IMPORT_DIRS = (ROOT, ROOT / "src")
+DEFAULT_STRING_IMPORT_DIRS = (ROOT, ROOT / "src" / "anonymos")
+DEFAULT_OUT = ROOT / "build" / "d-unittests"
+
+_UNITTEST = re.compile(rb"^\s*unittest\b", re.MULTILINE)
+_MODULE_DECL = re.compile(rb"^\s*module\s+([\w.]+)\s*;", re.MULTILINE)
+_MAIN = re.compile(rb"^\s*(?:extern\s*\(\s*C\s*\)\s*)?(?:int|void)\s+main\s*\(", re.MULTILINE)
+
+RUNNER_TEMPLATE = """\
+// Generated by tools/run_d_unittests.py.
+module {runner};
+
+import core.runtime : Runtime, UnitTestResult;
+import core.stdc.stdio : fprintf, stderr;
+
+shared static this()
+{{
+    Runtime.extendedModuleUnitTester = &runSelectedModule;
+}}
+
+UnitTestResult runSelectedModule()
+{{
+    UnitTestResult result;
+    foreach (m; ModuleInfo)
+    {{
+        if (m is null || m.name != "{module}")
+            continue;
+        auto test = m.unitTest;
+        if (test is null)
+            continue;
+        ++result.executed;
+        try
+        {{
+            test();
+            ++result.passed;
+        }}
+        catch (Throwable t)
+        {{
+            auto message = t.toString();
+            fprintf(stderr, "%.*s\\n", cast(int) message.length, message.ptr);
+        }}
+    }}
+    result.runMain = false;
+    result.summarize = true;
+    return result;
+}}
+{main}"""
+
+
+@dataclass(frozen=True)
+class TestModule:
+    name: str
+    source: Path
+    has_main: bool
+
+
+@dataclass(frozen=True)
+class ModuleResult:
+    module: TestModule
+    status: str  # "passed", "failed", "timeout" or "error" (did not compile)
+    output: str
+    build_seconds: float
+    run_seconds: float
+
+
+def discover_test_modules(
+    source_root: Path, include: Sequence[str] = (), exclude: Sequence[str] = ()
+) -> List[TestModule]:
+    """Modules under ``source_root`` with unittest blocks, filtered by module-name globs."""
+
+    modules: List[TestModule] = []
+    import_root = source_root.parent
+    for source in sorted(source_root.rglob("*.d")):
+        text = source.read_bytes()
+        if not _UNITTEST.search(text):
+            continue
+        declared = _MODULE_DECL.search(text)
+        if declared is not None:
+            name = declared.group(1).decode()
+        else:
+            name = ".".join(source.relative_to(import_root).with_suffix("").parts)
+        if include and not any(fnmatch.fnmatch(name, pattern) for pattern in include):
+            continue
+        if any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+            continue
+        modules.append(TestModule(name, source, bool(_MAIN.search(text))))
+    return modules
+
+
+def runner_source(module: TestModule) -> str:
+    runner = "unittest_runner_" + re.sub(r"\W", "_", module.name)
+    # Command-line tools keep their own main(); the runner never lets it run.
+    main = "" if module.has_main else "\nvoid main() {}\n"
+    return RUNNER_TEMPLATE.format(runner=runner, module=module.name, main=main)
+
+
+def build_command(
+    dc: str,
+    module: TestModule,
+    runner: Path,
+    output: Path,
+    import_dirs: Sequence[Path],
+    string_import_dirs: Sequence[Path],
+    flags: Sequence[str],
+) -> List[str]:
+    package = module.name.split(".", 1)[0]
+    cmd = [dc, str(module.source), str(runner), "-unittest", f"-i={package}", *flags]
+    cmd.extend(f"-I{path}" for path in import_dirs)
+    cmd.extend(f"-J{path}" for path in string_import_dirs)
+    cmd.append(f"-of={output}")
+    return cmd
+
+
+def run_module(
+    dc: str,
+    module: TestModule,
+    work_dir: Path,
+    import_dirs: Sequence[Path],
+    string_import_dirs: Sequence[Path],
+    flags: Sequence[str],
+    timeout: float,
+) -> ModuleResult:
+    """Compile one module's unittest executable and run it under ``timeout``."""
+
+    module_dir = work_dir / module.name
+    module_dir.mkdir(parents=True, exist_ok=True)
+    runner = module_dir / "runner.d"
+    runner.write_text(runner_source(module), encoding="utf-8")
+    binary = module_dir / "unittests"
+
+    started = time.monotonic()
+    built = subprocess.run(
+        build_command(dc, module, runner, binary, import_dirs, string_import_dirs, flags),
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    build_seconds = time.monotonic() - started
+    if built.returncode != 0:
+        return ModuleResult(module, "error", built.stdout or "", build_seconds, 0.0)
+
+    started = time.monotonic()
+    try:
+        ran = subprocess.run(
+            [str(binary)],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as exc:
+        output = exc.stdout.decode(errors="replace") if isinstance(exc.stdout, bytes) else exc.stdout or ""
+        return ModuleResult(module, "timeout", output, build_seconds, time.monotonic() - started)
+    status = "passed" if ran.returncode == 0 else "failed"
+    return ModuleResult(module, status, ran.stdout or "", build_seconds, time.monotonic() - started)
+
+
+def run_all(
+    dc: str,
+    modules: Sequence[TestModule],
+    work_dir: Path,
+    import_dirs: Sequence[Path],
+    string_import_dirs: Sequence[Path],
+    flags: Sequence[str] = (),
+    jobs: int | None = None,
+    timeout: float = 60.0,
+) -> List[ModuleResult]:
+    """Run every module concurrently, reporting results in module order."""
+
+    results: List[ModuleResult] = []
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        futures = [
+            pool.submit(run_module, dc, module, work_dir, import_dirs, string_import_dirs, flags, timeout)
+            for module in modules
+        ]
+        for future in futures:
+            result = future.result()
+            report_result(result)
+            results.append(result)
+    return results
+
+
+def report_result(result: ModuleResult) -> None:
+    label = {"passed": "ok", "failed": "fail", "timeout": "fail", "error": "fail"}[result.status]
+    detail = result.status if result.status != "error" else "compile error"
+    print(f"[{label}] {result.module.name}: {detail} ({result.build_seconds:.1f}s build, {result.run_seconds:.1f}s run)")
+    if result.status != "passed" and result.output:
+        sys.stdout.write(result.output if result.output.endswith("\n") else result.output + "\n")
+    sys.stdout.flush()
+
+
+def junit_xml(results: Sequence[ModuleResult], suite_name: str = "d-unittests") -> ET.ElementTree:
+    suite = ET.Element(
+        "testsuite",
+        name=suite_name,
+        tests=str(len(results)),
+        failures=str(sum(result.status in ("failed", "timeout") for result in results)),
+        errors=str(sum(result.status == "error" for result in results)),
+        time=f"{sum(result.build_seconds + result.run_seconds for result in results):.3f}",
+    )
+    for result in results:
+        case = ET.SubElement(
+            suite,
+            "testcase",
+            classname=result.module.name,
+            name="unittest",
+            file=str(result.module.source),
+            time=f"{result.run_seconds:.3f}",
+        )
+        if result.status == "failed":
+            ET.SubElement(case, "failure", message="unittest failed").text = result.output
+        elif result.status == "timeout":
+            ET.SubElement(case, "failure", message="timed out", type="timeout").text = result.output
+        elif result.status == "error":
+            ET.SubElement(case, "error", message="compilation failed", type="compile").text = result.output
+        elif result.output:
+            ET.SubElement(case, "system-out").text = result.output
+    ET.indent(suite)
+    return ET.ElementTree(suite)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run each D module's unittests as its own executable")
+    parser.add_argument("--dc", default=os.environ.get("DC", "ldc2"), help="D compiler (default: $DC or ldc2)")
+    parser.add_argument("--source-root", type=Path, default=DEFAULT_SOURCE_ROOT, help="Directory to scan for modules")
+    parser.add_argument(
+        "-I",
+        "--import-dir",
+        dest="import_dirs",
+        type=Path,
+        action="append",
+        help="Import directory (default: the kernel build's . and src)",
+    )
+    parser.add_argument(
+        "-J",
+        "--string-import-dir",
+        dest="string_import_dirs",
+        type=Path,
+        action="append",
+        help="String-import directory (default: the kernel build's . and src/anonymos)",
+    )
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB", help="Only modules whose name matches")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="Skip modules whose name matches")
+    parser.add_argument("--flags", nargs=argparse.REMAINDER, default=[], help="Extra compiler flags (must come last)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Modules built and run at once (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds each module's tests may run (default: 60)")
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_OUT, help="Where runners and executables go")
+    parser.add_argument("--junit", type=Path, default=DEFAULT_OUT / "junit.xml", help="JUnit XML report path")
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        raise SystemExit(f"--jobs must be at least 1 (got {args.jobs})")
+    modules = discover_test_modules(args.source_root, args.include, args.exclude)
+    if not modules:
+        print("[warn] No modules with unittests matched")
+        return 0
+
+    import_dirs = args.import_dirs or list(DEFAULT_IMPORT_DIRS)
+    string_import_dirs = args.string_import_dirs or list(DEFAULT_STRING_IMPORT_DIRS)
+    results = run_all(
+        args.dc, modules, args.work_dir, import_dirs, string_import_dirs, args.flags, args.jobs, args.timeout
+    )
+    args.junit.parent.mkdir(parents=True, exist_ok=True)
+    junit_xml(results).write(args.junit, encoding="utf-8", xml_declaration=True)
+
+    failed = [result.module.name for result in results if result.status != "passed"]
+    print(f"[ok] Wrote {args.junit}: {len(results) - len(failed)}/{len(results)} modules passed")
+    if failed:
+        raise SystemExit(f"[error] Unittests failed: {', '.join(failed)}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
+    raise SystemExit(main())
@@ -1,12 +1,61 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import subprocess
+import json
+import os
 from pathlib import Path
 import textwrap
 
-def count_source_files(sh_root: Path) -> int:
-    return sum(1 for _ in sh_root.joinpath("src").rglob("*.d"))
+COUNT_CACHE = Path("build") / "sh_metadata" / "source_counts.json"
+
+
+def _load_count_cache(cache_path: Path | None) -> dict[str, list]:
+    if cache_path is None:
+        return {}
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def count_source_files(sh_root: Path, cache_path: Path | None = None) -> int:
+    """Count ``*.d`` files under ``sh_root/src``.
+
+    Each directory's own count and subdirectories are cached against its
+    mtime, which changes whenever an entry is added, removed or renamed in
+    it. Unchanged directories are only stat()ed, not listed.
+    """
+
+    previous = _load_count_cache(cache_path)
+    current: dict[str, list] = {}
+    total = 0
+    pending = [str(sh_root / "src")]
+    while pending:
+        directory = pending.pop()
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+        entry = previous.get(directory)
+        if entry is None or entry[0] != mtime:
+            files = 0
+            subdirs = []
+            with os.scandir(directory) as entries:
+                for item in entries:
+                    if item.is_dir(follow_symlinks=False):
+                        subdirs.append(item.path)
+                    elif item.name.endswith(".d"):
+                        files += 1
+            entry = [mtime, files, sorted(subdirs)]
+        current[directory] = entry
+        total += entry[1]
+        pending.extend(entry[2])
+
+    if cache_path is not None and current != previous:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(current, sort_keys=True), encoding="utf-8")
+    return total
 
 
 def count_documented_commands(commands_file: Path) -> int:
@@ -23,14 +72,59 @@ def count_documented_commands(commands_file: Path) -> int:
     return count
 
 
+def _find_git_dir(path: Path) -> Path | None:
+    """Locate the git directory for ``path`` the way ``git -C path`` would."""
+
+    for candidate in (path, *path.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # Submodules and worktrees use a "gitdir: <path>" pointer file.
+            text = dot_git.read_text(encoding="utf-8", errors="ignore").strip()
+            if text.startswith("gitdir:"):
+                return (candidate / text[len("gitdir:") :].strip()).resolve()
+            return None
+    return None
+
+
 def git_revision(path: Path) -> str:
+    """Resolve HEAD by reading the git directory instead of spawning git."""
+
+    if not path.is_dir():
+        return "unknown"
+    git_dir = _find_git_dir(path.resolve())
+    if git_dir is None:
+        return "unknown"
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return "unknown"
+    if not head.startswith("ref:"):
+        return head or "unknown"
+
+    ref = head[len("ref:") :].strip()
+    # Linked worktrees keep branch refs in the shared "common" directory.
+    common_dir = git_dir
+    commondir_file = git_dir / "commondir"
+    if commondir_file.is_file():
+        common_dir = (git_dir / commondir_file.read_text(encoding="utf-8").strip()).resolve()
+    for base in (git_dir, common_dir):
+        try:
+            return (base / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            pass
     try:
-        return subprocess.check_output(
-            ["git", "-C", str(path), "rev-parse", "HEAD"],
-            text=True,
-        ).strip()
-    except (FileNotFoundError, subprocess.CalledProcessError):
+        packed = (common_dir / "packed-refs").read_text(encoding="utf-8")
+    except OSError:
         return "unknown"
+    for line in packed.splitlines():
+        if line.startswith(("#", "^")):
+            continue
+        sha, _, name = line.partition(" ")
+        if name == ref:
+            return sha
+    return "unknown"
 
 
 def binary_size(sh_root: Path, binary_name: str) -> int:
@@ -40,12 +134,24 @@ def binary_size(sh_root: Path, binary_name: str) -> int:
     return 0
 
 
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write ``content`` unless ``path`` already holds it, keeping its mtime for incremental builds."""
+
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
 def main() -> None:
     repo_root = Path(__file__).resolve().parents[1]
     sh_root = repo_root / "-sh"
     metadata_path = repo_root / "src" / "sh_metadata.d"
 
-    source_count = count_source_files(sh_root)
+    source_count = count_source_files(sh_root, repo_root / COUNT_CACHE)
     command_count = count_documented_commands(sh_root / "commands.txt")
     revision = git_revision(sh_root)
     binary_name = "lfe-sh"
@@ -64,7 +170,7 @@ enum size_t shBinarySizeBytes = {binary_bytes}u;
 """
     )
 
-    metadata_path.write_text(module, encoding="utf-8")
+    write_if_changed(metadata_path, module)
 
 
 if __name__ == "__main__":